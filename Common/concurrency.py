@@ -0,0 +1,240 @@
+# file: concurrency.py
+
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from Common.ollama_hosts import format_hosts, host_count
+from Common.profiling import PROFILER
+from Common.token_budget import count_tokens
+
+# ---------------------------------------------------------
+# CONFIGURATION
+# ---------------------------------------------------------
+
+# Upper bound of parallel requests per model; --workers of a script caps it further
+MAX_CLOUD_CONCURRENCY = 16
+MAX_LOCAL_CONCURRENCY = 4      # per Ollama host, keep in line with OLLAMA_NUM_PARALLEL
+INITIAL_CONCURRENCY = 2
+
+# Multiplicative decrease on throttling, errors or degraded latency
+BACKOFF_FACTOR = 0.5
+
+# Latency counts as degraded above this multiple of the best observed one
+LATENCY_TOLERANCE = 2.0
+LATENCY_SMOOTHING = 0.2
+BASELINE_DRIFT = 0.02          # lets the baseline follow a server that got slower for good
+
+# Retries of throttled / 5xx requests, with exponential backoff + jitter
+MAX_RETRIES = 5
+RETRY_BASE_SECONDS = 1.0
+RETRY_MAX_SECONDS = 60.0
+
+THROTTLE_STATUS = {429, 500, 502, 503, 504}
+THROTTLE_CODE = re.compile(r"\b(429|50[0234])\b")
+THROTTLE_TEXT = re.compile(r"too many requests|rate.?limit|overloaded|temporarily unavailable", re.I)
+
+# ---------------------------------------------------------
+# ERROR CLASSIFICATION
+# ---------------------------------------------------------
+def throttle_status(error: Exception) -> Optional[int]:
+    """
+    HTTP status of a throttled / overloaded response, or None for other errors.
+    ollama.ResponseError and httpx errors carry the status code.
+    """
+    status = getattr(error, "status_code", None)
+    response = getattr(error, "response", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None)
+    if status is not None:
+        return int(status) if int(status) in THROTTLE_STATUS else None
+    code = THROTTLE_CODE.search(str(error))
+    if code:
+        return int(code.group(1))
+    return 429 if THROTTLE_TEXT.search(str(error)) else None
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after") or headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+# ---------------------------------------------------------
+# AIMD LIMITER
+# ---------------------------------------------------------
+class AdaptiveLimiter:
+    """
+    Concurrency limit for one model, adapted like TCP congestion control:
+    every successful request adds 1/limit (one slot per round of requests),
+    throttling, server errors or latency above LATENCY_TOLERANCE times the
+    best observed latency halve it. At most one decrease per request
+    duration, so a burst of failures from the same round counts once.
+    """
+
+    def __init__(self, model: str, maximum: int, minimum: int = 1, initial: int = INITIAL_CONCURRENCY):
+        self.model = model
+        self.maximum = maximum
+        self.minimum = minimum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.in_flight = 0
+        self._condition = threading.Condition()
+        self._smoothed: Optional[float] = None
+        self._baseline: Optional[float] = None
+        self._last_decrease = 0.0
+        self._last_seconds = 0.0
+        self.stats = {"requests": 0, "throttled": 0, "errors": 0, "retries": 0, "decreases": 0,
+                      "peak_limit": self.limit, "peak_in_flight": 0, "seconds": 0.0}
+
+    @contextmanager
+    def slot(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.in_flight)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.in_flight -= 1
+                self._condition.notify_all()
+
+    def _decrease(self):
+        now = time.monotonic()
+        if now - self._last_decrease < self._last_seconds:
+            return
+        self._last_decrease = now
+        self.limit = max(self.minimum, self.limit * BACKOFF_FACTOR)
+        self.stats["decreases"] += 1
+
+    def success(self, seconds: float, input_tokens: int):
+        # Latency per 1k input tokens, so long prompts do not look like degradation
+        rate = seconds * 1000 / max(input_tokens, 500)
+        with self._condition:
+            self.stats["requests"] += 1
+            self.stats["seconds"] += seconds
+            self._last_seconds = seconds
+            self._smoothed = rate if self._smoothed is None else \
+                LATENCY_SMOOTHING * rate + (1 - LATENCY_SMOOTHING) * self._smoothed
+            self._baseline = self._smoothed if self._baseline is None else \
+                min(self._smoothed, self._baseline * (1 + BASELINE_DRIFT))
+
+            if self._smoothed > LATENCY_TOLERANCE * self._baseline:
+                self._decrease()
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+                self.stats["peak_limit"] = max(self.stats["peak_limit"], self.limit)
+            self._condition.notify_all()
+
+    def failure(self, throttled: bool, seconds: float):
+        with self._condition:
+            self.stats["throttled" if throttled else "errors"] += 1
+            self._last_seconds = max(self._last_seconds, seconds)
+            self._decrease()
+
+    def snapshot(self) -> dict:
+        requests = self.stats["requests"]
+        return dict(self.stats, model=self.model, limit=round(self.limit, 2), maximum=self.maximum,
+                    in_flight=self.in_flight, seconds=round(self.stats["seconds"], 2),
+                    peak_limit=round(self.stats["peak_limit"], 2),
+                    average_seconds=round(self.stats["seconds"] / requests, 2) if requests else None)
+
+# ---------------------------------------------------------
+# REGISTRY (one limiter per model and process)
+# ---------------------------------------------------------
+LIMITERS: Dict[str, AdaptiveLimiter] = {}
+_registry_lock = threading.Lock()
+_worker_cap: Optional[int] = None
+
+
+def is_cloud_model(model: str) -> bool:
+    model = model.strip()
+    return model.endswith("-cloud") or ":cloud" in model
+
+
+def limiter_for(model: str) -> AdaptiveLimiter:
+    model = model.strip()
+    with _registry_lock:
+        if model not in LIMITERS:
+            # Local models scale with the host pool, cloud ones are bound by the service
+            ceiling = MAX_CLOUD_CONCURRENCY if is_cloud_model(model) else MAX_LOCAL_CONCURRENCY * host_count()
+            LIMITERS[model] = AdaptiveLimiter(model, min(ceiling, _worker_cap or ceiling))
+        return LIMITERS[model]
+
+
+class LimitedModel:
+    """
+    Chat model wrapper: invoke() waits for a slot of the model's limiter and
+    retries throttled requests with backoff. Other attributes pass through.
+    """
+
+    def __init__(self, llm):
+        self.llm = llm
+        self.limiter = limiter_for(str(llm.model))
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    def invoke(self, prompt, *args, **kwargs):
+        input_tokens = count_tokens(str(prompt))
+        for attempt in range(MAX_RETRIES + 1):
+            with self.limiter.slot():
+                start = time.perf_counter()
+                try:
+                    response = self.llm.invoke(prompt, *args, **kwargs)
+                except Exception as e:
+                    status = throttle_status(e)
+                    self.limiter.failure(status is not None, time.perf_counter() - start)
+                    if status is None or attempt == MAX_RETRIES:
+                        raise
+                    error = e
+                else:
+                    self.limiter.success(time.perf_counter() - start, input_tokens)
+                    return response
+
+            # Sleep outside the slot so other requests are not blocked
+            self.limiter.stats["retries"] += 1
+            wait = retry_after(error) or min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** attempt)
+            print(f"⏳ {self.limiter.model}: HTTP {status}, retry {attempt + 1}/{MAX_RETRIES} in {wait:.1f}s "
+                  f"(limit {self.limiter.limit:.1f})")
+            time.sleep(wait * random.uniform(0.8, 1.2))
+
+
+def limited(llm) -> LimitedModel:
+    return llm if isinstance(llm, LimitedModel) else LimitedModel(llm)
+
+
+def set_max_concurrency(maximum: int):
+    """
+    Caps every limiter, existing and future (a script's --workers).
+    """
+    global _worker_cap
+    _worker_cap = max(1, maximum)
+    for limiter in LIMITERS.values():
+        limiter.maximum = max(1, min(limiter.maximum, maximum))
+        limiter.limit = min(limiter.limit, limiter.maximum)
+
+# ---------------------------------------------------------
+# METRICS
+# ---------------------------------------------------------
+def format_limits() -> str:
+    """
+    Console summary of every used limiter; also stored in the --profile report.
+    """
+    used = [l.snapshot() for l in LIMITERS.values() if l.stats["requests"] or l.stats["throttled"] or l.stats["errors"]]
+    PROFILER.metrics["concurrency"] = used
+    if not used:
+        return "🚦 Concurrency: no model calls"
+    hosts = [format_hosts()] if host_count() > 1 else []
+    lines = ["🚦 Concurrency (AIMD):"]
+    for s in used:
+        lines.append(f"  {s['model']:<26} limit {s['limit']:>5.1f}/{s['maximum']:<3} peak {s['peak_limit']:>5.1f}  "
+                     f"{s['requests']} ok, {s['throttled']} throttled, {s['errors']} errors, "
+                     f"{s['retries']} retries, avg {s['average_seconds'] or 0:.1f}s")
+    return "\n".join(lines + hosts)
@@ -0,0 +1,272 @@
+# file: feature_sharding.py
+
+import glob
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from Common.gherkin import Feature, Scenario, normalize_text, parse_features, render_features
+
+# ---------------------------------------------------------
+# COST MODEL
+# ---------------------------------------------------------
+
+# Estimated milliseconds; refitted from timing reports by update_cost_model()
+DEFAULT_WEIGHTS = {
+    "scenario": 1000.0,     # browser context + fixtures
+    "step": 300.0,
+    "navigation": 1500.0,   # extra for page loads / redirects
+}
+
+NAVIGATION_STEP = re.compile(
+    r"\b(navigate|open|go(es)? to|visit|load|reload|refresh|redirect(ed)?|am on|is on|log(ged)? ?in|sign(ed)? ?in)\b",
+    re.IGNORECASE
+)
+
+# Measured durations are smoothed so one slow run does not dominate
+MEASUREMENT_SMOOTHING = 0.5
+MIN_SAMPLES_FOR_FIT = 3
+
+
+@dataclass
+class CostModel:
+    weights: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_WEIGHTS))
+    measured: Dict[str, float] = field(default_factory=dict)   # scenario key → ms
+
+    @staticmethod
+    def load(path: Optional[str]) -> "CostModel":
+        if not path or not os.path.exists(path):
+            return CostModel()
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return CostModel(
+            weights={**DEFAULT_WEIGHTS, **data.get("weights", {})},
+            measured=data.get("measured", {})
+        )
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"weights": self.weights, "measured": self.measured}, f, indent=2, sort_keys=True)
+
+
+def scenario_key(feature_name: str, scenario_name: str) -> str:
+    return f"{normalize_text(feature_name)}::{normalize_text(scenario_name)}"
+
+
+def _cost_inputs(scenario: Scenario, background_steps: int, background_navigation: int) -> Tuple[int, int, int]:
+    runs = max(1, sum(len(block.rows) for block in scenario.examples))
+    steps = len(scenario.steps) + background_steps
+    navigation = sum(1 for s in scenario.steps if NAVIGATION_STEP.search(s.text)) + background_navigation
+    return runs, steps, navigation
+
+
+def scenario_cost(feature: Feature, scenario: Scenario, model: CostModel) -> float:
+    measured = model.measured.get(scenario_key(feature.name, scenario.name))
+    if measured is not None:
+        return measured
+    background_navigation = sum(1 for s in feature.background if NAVIGATION_STEP.search(s.text))
+    runs, steps, navigation = _cost_inputs(scenario, len(feature.background), background_navigation)
+    w = model.weights
+    return runs * (w["scenario"] + steps * w["step"] + navigation * w["navigation"])
+
+# ---------------------------------------------------------
+# TIMING REPORTS
+# ---------------------------------------------------------
+def _cucumber_durations(report: list) -> Dict[Tuple[str, str], float]:
+    # cucumber-js JSON formatter: durations in nanoseconds
+    durations: Dict[Tuple[str, str], float] = {}
+    for feature in report:
+        for element in feature.get("elements", []):
+            if element.get("type") == "background":
+                continue
+            nanoseconds = sum(
+                (step.get("result") or {}).get("duration", 0)
+                for step in element.get("before", []) + element.get("steps", []) + element.get("after", [])
+            )
+            key = (feature.get("name", ""), element.get("name", ""))
+            durations[key] = durations.get(key, 0.0) + nanoseconds / 1e6
+    return durations
+
+
+def _playwright_durations(report: dict) -> Dict[Tuple[str, str], float]:
+    # Playwright JSON reporter (playwright-bdd: describe = feature, test = scenario), milliseconds
+    durations: Dict[Tuple[str, str], float] = {}
+
+    def walk(suite: dict, feature_name: str):
+        title = suite.get("title", "")
+        if not title.endswith((".ts", ".js", ".feature")):
+            feature_name = title or feature_name
+        for spec in suite.get("specs", []):
+            total = sum(
+                result.get("duration", 0)
+                for test in spec.get("tests", []) for result in test.get("results", [])[-1:]
+            )
+            key = (feature_name, spec.get("title", ""))
+            durations[key] = durations.get(key, 0.0) + total
+        for child in suite.get("suites", []):
+            walk(child, feature_name)
+
+    for suite in report.get("suites", []):
+        walk(suite, "")
+    return durations
+
+
+def read_timing_report(path: str) -> Dict[Tuple[str, str], float]:
+    """
+    (feature name, scenario name) → milliseconds from a cucumber-js JSON
+    report or a Playwright JSON reporter output.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    if isinstance(report, list):
+        return _cucumber_durations(report)
+    return _playwright_durations(report)
+
+
+def _solve(matrix: List[List[float]], vector: List[float]) -> Optional[List[float]]:
+    # Gaussian elimination for the small normal-equation system
+    n = len(vector)
+    rows = [matrix[i][:] + [vector[i]] for i in range(n)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(rows[r][col]))
+        if abs(rows[pivot][col]) < 1e-9:
+            return None
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        for r in range(n):
+            if r != col:
+                factor = rows[r][col] / rows[col][col]
+                rows[r] = [a - factor * b for a, b in zip(rows[r], rows[col])]
+    return [rows[i][n] / rows[i][i] for i in range(n)]
+
+
+def update_cost_model(model: CostModel, features: List[Feature],
+                      durations: Dict[Tuple[str, str], float]) -> int:
+    """
+    Stores smoothed measured durations for known scenarios and refits the
+    per-scenario / per-step / per-navigation weights by least squares.
+    Returns the number of scenarios matched in the report.
+    """
+    # Same key as the timings: scenario names repeat across features
+    by_key = {scenario_key(f.name, s.name): (f, s) for f in features for s in f.scenarios}
+    samples = []
+    matched = 0
+    for (feature_name, scenario_name), ms in durations.items():
+        key = scenario_key(feature_name, scenario_name)
+        previous = model.measured.get(key)
+        model.measured[key] = ms if previous is None else \
+            MEASUREMENT_SMOOTHING * ms + (1 - MEASUREMENT_SMOOTHING) * previous
+
+        found = by_key.get(key)
+        if found is None:
+            continue
+        matched += 1
+        feature, scenario = found
+        background_navigation = sum(1 for s in feature.background if NAVIGATION_STEP.search(s.text))
+        runs, steps, navigation = _cost_inputs(scenario, len(feature.background), background_navigation)
+        samples.append(([runs, runs * steps, runs * navigation], ms))
+
+    if len(samples) >= MIN_SAMPLES_FOR_FIT:
+        xtx = [[sum(x[i] * x[j] for x, _ in samples) for j in range(3)] for i in range(3)]
+        xty = [sum(x[i] * y for x, y in samples) for i in range(3)]
+        solution = _solve(xtx, xty)
+        if solution and all(v >= 0 for v in solution):
+            model.weights.update(zip(("scenario", "step", "navigation"), solution))
+    return matched
+
+# ---------------------------------------------------------
+# SHARDING
+# ---------------------------------------------------------
+@dataclass
+class Shard:
+    index: int
+    cost: float = 0.0
+    features: Dict[int, Feature] = field(default_factory=dict)
+
+    @property
+    def tag(self) -> str:
+        return f"@shard-{self.index}"
+
+    def scenarios(self) -> int:
+        return sum(len(f.scenarios) for f in self.features.values())
+
+
+def shard_features(features: List[Feature], shard_count: int, model: Optional[CostModel] = None) -> List[Shard]:
+    """
+    Longest-processing-time-first partitioning: scenarios sorted by
+    estimated cost go to the currently cheapest shard. Each shard keeps
+    the feature name, tags and Background of its scenarios and is tagged
+    @shard-<n> for per-worker runs.
+    """
+    model = model or CostModel()
+    shards = [Shard(index=i + 1) for i in range(max(1, shard_count))]
+
+    items = [
+        (scenario_cost(feature, scenario, model), order, feature, scenario)
+        for order, (feature, scenario) in enumerate((f, s) for f in features for s in f.scenarios)
+    ]
+    placed: List[Tuple[int, int, Scenario]] = []   # (shard index, original order, scenario)
+    for cost, order, feature, scenario in sorted(items, key=lambda item: (-item[0], item[1])):
+        shard = min(shards, key=lambda s: (s.cost, s.index))
+        shard.cost += cost
+        placed.append((shard.index, order, scenario))
+        if id(feature) not in shard.features:
+            shard.features[id(feature)] = Feature(
+                name=feature.name,
+                tags=list(feature.tags) + [shard.tag],
+                description=list(feature.description),
+                background=list(feature.background)
+            )
+
+    # Keep the original scenario order inside each shard
+    owners = {id(s): f for f in features for s in f.scenarios}
+    for shard_index, _, scenario in sorted(placed, key=lambda p: p[1]):
+        shards[shard_index - 1].features[id(owners[id(scenario)])].scenarios.append(scenario)
+    return shards
+
+
+def write_shards(shards: List[Shard], output_file: str) -> List[str]:
+    """
+    <name>.shard-<n>.feature next to output_file; empty shards are skipped.
+    Shard files of a previous run are deleted first, so a run with fewer
+    shards leaves no stale ones behind.
+    """
+    stem, extension = os.path.splitext(output_file)
+    extension = extension or ".feature"
+    shard_file = re.compile(re.escape(stem) + r"\.shard-\d+" + re.escape(extension))
+    for stale in glob.glob(f"{glob.escape(stem)}.shard-*{extension}"):
+        if shard_file.fullmatch(stale):
+            os.remove(stale)
+
+    written = []
+    for shard in shards:
+        if not shard.features:
+            continue
+        path = f"{stem}.shard-{shard.index}{extension}"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(render_features(list(shard.features.values())))
+        written.append(path)
+    return written
+
+
+def format_shards(shards: List[Shard]) -> str:
+    total = sum(s.cost for s in shards) or 1.0
+    lines = []
+    for shard in shards:
+        lines.append(f"  {shard.tag}: {shard.scenarios()} scenario(s), "
+                     f"~{shard.cost / 1000:.1f}s ({shard.cost / total:.0%})")
+    return "\n".join(lines)
+
+
+def shard_feature_text(text: str, output_file: str, shard_count: int,
+                       cost_model_file: Optional[str] = None):
+    """
+    Parses generated Gherkin, shards it and writes the shard files.
+    Returns (shards, written paths); nothing is written if it does not parse.
+    """
+    features = parse_features(text)
+    if not features:
+        return [], []
+    shards = shard_features(features, shard_count, CostModel.load(cost_model_file))
+    return shards, write_shards(shards, output_file)
@@ -0,0 +1,495 @@
+# file: gherkin.py
+
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+# ---------------------------------------------------------
+# MODEL
+# ---------------------------------------------------------
+STEP_KEYWORDS = ("Given", "When", "Then", "And", "But", "*")
+SCENARIO_KEYWORDS = ("Scenario Outline", "Scenario Template", "Scenario", "Example")
+EXAMPLES_KEYWORDS = ("Examples", "Scenarios")
+
+
+@dataclass
+class Step:
+    keyword: str
+    text: str
+    kind: str = "Given"
+    extra: List[str] = field(default_factory=list)  # doc string / data table lines
+
+    def key(self) -> tuple:
+        return (self.kind, normalize_text(self.text), tuple(self.extra))
+
+
+@dataclass
+class Examples:
+    name: str = ""
+    tags: List[str] = field(default_factory=list)
+    header: List[str] = field(default_factory=list)
+    rows: List[List[str]] = field(default_factory=list)
+
+
+@dataclass
+class Scenario:
+    name: str
+    keyword: str = "Scenario"
+    tags: List[str] = field(default_factory=list)
+    description: List[str] = field(default_factory=list)
+    steps: List[Step] = field(default_factory=list)
+    examples: List[Examples] = field(default_factory=list)
+
+    @property
+    def is_outline(self) -> bool:
+        return bool(self.examples) or "Outline" in self.keyword or "Template" in self.keyword
+
+
+@dataclass
+class Feature:
+    name: str
+    tags: List[str] = field(default_factory=list)
+    description: List[str] = field(default_factory=list)
+    background: List[Step] = field(default_factory=list)
+    scenarios: List[Scenario] = field(default_factory=list)
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.lower().split())
+
+# ---------------------------------------------------------
+# PARSER
+# ---------------------------------------------------------
+def _split_row(line: str) -> List[str]:
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+def _keyword(line: str, keywords) -> Optional[str]:
+    for keyword in keywords:
+        if line.startswith(keyword + ":"):
+            return keyword
+    return None
+
+
+def parse_features(text: str) -> List[Feature]:
+    """
+    Parses one or more Gherkin features from (possibly LLM-generated) text.
+    Markdown fences and comments are ignored.
+    """
+    features: List[Feature] = []
+    feature: Optional[Feature] = None
+    scenario: Optional[Scenario] = None
+    examples: Optional[Examples] = None
+    steps: Optional[List[Step]] = None
+    pending_tags: List[str] = []
+    in_doc_string = False
+
+    for raw in text.splitlines():
+        line = raw.strip()
+
+        if in_doc_string:
+            if steps:
+                steps[-1].extra.append(line)
+            if line.startswith('"""'):
+                in_doc_string = False
+            continue
+
+        if not line or line.startswith("#") or line.startswith("```"):
+            continue
+
+        if line.startswith("@"):
+            pending_tags.extend(t for t in line.split() if t.startswith("@"))
+            continue
+
+        if line.startswith("Feature:"):
+            feature = Feature(name=line[len("Feature:"):].strip(), tags=pending_tags)
+            features.append(feature)
+            scenario, examples, steps, pending_tags = None, None, None, []
+            continue
+
+        if feature is None:
+            feature = Feature(name="")
+            features.append(feature)
+
+        if line.startswith("Background:"):
+            scenario, examples = None, None
+            steps = feature.background
+            pending_tags = []
+            continue
+
+        keyword = _keyword(line, SCENARIO_KEYWORDS)
+        if keyword:
+            scenario = Scenario(
+                name=line[len(keyword) + 1:].strip(),
+                keyword="Scenario Outline" if keyword in ("Scenario Outline", "Scenario Template") else "Scenario",
+                tags=pending_tags
+            )
+            feature.scenarios.append(scenario)
+            examples, steps, pending_tags = None, scenario.steps, []
+            continue
+
+        keyword = _keyword(line, EXAMPLES_KEYWORDS)
+        if keyword and scenario is not None:
+            examples = Examples(name=line[len(keyword) + 1:].strip(), tags=pending_tags)
+            scenario.examples.append(examples)
+            pending_tags = []
+            continue
+
+        if line.startswith("|"):
+            if examples is not None:
+                if not examples.header:
+                    examples.header = _split_row(line)
+                else:
+                    examples.rows.append(_split_row(line))
+            elif steps:
+                steps[-1].extra.append(line)
+            continue
+
+        if line.startswith('"""'):
+            if steps:
+                steps[-1].extra.append(line)
+            in_doc_string = True
+            continue
+
+        first = line.split(" ", 1)[0]
+        if first in STEP_KEYWORDS and steps is not None:
+            examples = None
+            previous = steps[-1].kind if steps else (
+                feature.background[-1].kind if feature.background and steps is not feature.background else "Given"
+            )
+            kind = previous if first in ("And", "But", "*") else first
+            steps.append(Step(keyword=first, text=line[len(first):].strip(), kind=kind))
+            continue
+
+        # Free text → description of the current feature / scenario
+        if scenario is not None and not scenario.steps:
+            scenario.description.append(line)
+        elif scenario is None and steps is None:
+            feature.description.append(line)
+
+    return [f for f in features if f.name or f.scenarios or f.background]
+
+# ---------------------------------------------------------
+# RENDERING
+# ---------------------------------------------------------
+def _render_table(rows: List[List[str]], indent: str) -> List[str]:
+    if not rows:
+        return []
+    widths = [max(len(row[i]) if i < len(row) else 0 for row in rows) for i in range(max(len(r) for r in rows))]
+    return [
+        indent + "| " + " | ".join(
+            (row[i] if i < len(row) else "").ljust(widths[i]) for i in range(len(widths))
+        ) + " |"
+        for row in rows
+    ]
+
+
+def _render_steps(steps: List[Step], indent: str) -> List[str]:
+    lines = []
+    previous = None
+    for step in steps:
+        if step.keyword == "*":
+            keyword = "*"
+        elif step.kind == previous:
+            keyword = "But" if step.keyword == "But" else "And"
+        else:
+            keyword = step.kind
+        previous = step.kind
+        lines.append(f"{indent}{keyword} {step.text}")
+
+        table = [_split_row(e) for e in step.extra if e.startswith("|")]
+        if table and len(table) == len(step.extra):
+            lines.extend(_render_table(table, indent + "  "))
+        else:
+            lines.extend(indent + "  " + e for e in step.extra)
+    return lines
+
+
+def render_feature(feature: Feature) -> str:
+    lines = []
+    if feature.tags:
+        lines.append(" ".join(feature.tags))
+    lines.append(f"Feature: {feature.name}".rstrip())
+    lines.extend("  " + d for d in feature.description)
+
+    if feature.background:
+        lines.append("")
+        lines.append("  Background:")
+        lines.extend(_render_steps(feature.background, "    "))
+
+    for scenario in feature.scenarios:
+        lines.append("")
+        if scenario.tags:
+            lines.append("  " + " ".join(scenario.tags))
+        keyword = "Scenario Outline" if scenario.is_outline else "Scenario"
+        lines.append(f"  {keyword}: {scenario.name}".rstrip())
+        lines.extend("    " + d for d in scenario.description)
+        lines.extend(_render_steps(scenario.steps, "    "))
+
+        for block in scenario.examples:
+            lines.append("")
+            if block.tags:
+                lines.append("    " + " ".join(block.tags))
+            lines.append(f"    Examples: {block.name}".rstrip())
+            lines.extend(_render_table([block.header] + block.rows, "      "))
+
+    return "\n".join(lines) + "\n"
+
+
+def render_features(features: List[Feature]) -> str:
+    return "\n".join(render_feature(f) for f in features)
+
+# ---------------------------------------------------------
+# MERGING
+# ---------------------------------------------------------
+def _scenario_key(background: List[Step], scenario: Scenario) -> tuple:
+    steps = tuple(s.key() for s in background + scenario.steps)
+    examples = tuple(
+        (tuple(b.header), tuple(tuple(r) for r in b.rows)) for b in scenario.examples
+    )
+    return steps, examples
+
+
+def hoist_background(feature: Feature) -> Feature:
+    """
+    Moves the longest Given prefix shared by every scenario into Background.
+    """
+    if not feature.scenarios:
+        return feature
+
+    expanded = [list(feature.background) + list(s.steps) for s in feature.scenarios]
+    prefix = 0
+    if len(expanded) > 1:
+        shortest = min(len(steps) for steps in expanded) - 1  # keep at least one step
+        while prefix < shortest:
+            candidate = expanded[0][prefix]
+            if candidate.kind != "Given" or "<" in candidate.text:
+                break
+            if any(steps[prefix].key() != candidate.key() for steps in expanded[1:]):
+                break
+            prefix += 1
+    else:
+        prefix = len(feature.background)
+
+    feature.background = expanded[0][:prefix]
+    for scenario, steps in zip(feature.scenarios, expanded):
+        scenario.steps = steps[prefix:]
+    return feature
+
+
+def merge_features(features: List[Feature], feature_name: Optional[str] = None) -> List[Feature]:
+    """
+    Merges features (e.g. generated per section) by name, de-duplicates
+    equivalent scenarios and hoists shared Given steps into Background.
+    With feature_name, everything is merged into one feature of that name.
+    """
+    merged = {}
+    order = []
+    for feature in features:
+        name = feature_name or feature.name
+        key = normalize_text(name)
+        if key not in merged:
+            merged[key] = (Feature(name=name, tags=list(feature.tags),
+                                   description=list(feature.description)), set())
+            order.append(key)
+        target, seen = merged[key]
+        for tag in feature.tags:
+            if tag not in target.tags:
+                target.tags.append(tag)
+
+        for scenario in feature.scenarios:
+            scenario_key = _scenario_key(feature.background, scenario)
+            if scenario_key in seen:
+                continue
+            seen.add(scenario_key)
+            scenario.steps = list(feature.background) + scenario.steps
+            target.scenarios.append(scenario)
+
+    return [hoist_background(merged[key][0]) for key in order]
+
+
+def merge_feature_texts(texts: List[str], feature_name: Optional[str] = None) -> str:
+    """
+    One feature from Gherkin answers generated per chunk of the same input
+    (named feature_name, else after the first feature). Falls back to the
+    joined answers when none of them parses.
+    """
+    features = [feature for text in texts for feature in parse_features(text)]
+    if not features:
+        return "\n\n".join(text.strip() for text in texts)
+    merged = merge_features(features, feature_name=feature_name or features[0].name)
+    return render_features(merged).strip()
+
+# ---------------------------------------------------------
+# OUTLINE COMPACTION
+# ---------------------------------------------------------
+LITERAL = re.compile(r'"[^"]*"|\b\d+(?:\.\d+)?\b')
+COLUMN_STOP_WORDS = {
+    "a", "an", "the", "as", "with", "to", "is", "be", "of", "and", "or", "in", "into", "from", "for",
+    "i", "should", "see", "enter", "type", "select", "contain", "contains", "display", "displays",
+    "on", "at", "by", "up", "out", "has", "have", "not", "are", "was", "am", "my", "it", "its"
+}
+# Verbs that precede a literal in steps and would make poor column names
+COLUMN_VERBS = {
+    "log", "logs", "login", "logins", "sign", "signs", "click", "clicks", "presses", "press", "fill", "fills", "enters", "types", "choose",
+    "chooses", "selects", "open", "opens", "go", "goes", "navigate", "navigates", "visit", "visits",
+    "search", "searches", "submit", "submits", "wait", "waits", "retry", "retries", "set", "sets",
+    "upload", "uploads", "check", "checks", "uncheck", "add", "adds", "remove", "removes", "shows",
+    "show", "equal", "equals", "match", "matches", "get", "gets", "use", "uses", "try", "tries"
+}
+
+
+@dataclass
+class CompactionReport:
+    scenarios_before: int = 0
+    scenarios_after: int = 0
+    steps_before: int = 0
+    steps_after: int = 0
+    outlines: int = 0
+
+    def summary(self) -> str:
+        return (f"Scenarios: {self.scenarios_before} → {self.scenarios_after}, "
+                f"steps: {self.steps_before} → {self.steps_after}, "
+                f"{self.outlines} outline(s) created")
+
+
+def _literal_kind(match) -> str:
+    return "\0s" if match.group(0).startswith('"') else "\0n"
+
+
+def _step_template(step: Step) -> tuple:
+    # Quoted and numeric literals never share a column: the placeholder keeps its quotes
+    return step.kind, normalize_text(LITERAL.sub(_literal_kind, step.text)), tuple(step.extra)
+
+
+def _column_name(step: Step, match) -> Optional[str]:
+    """
+    The noun nearest to a literal: the word before it, else the word right
+    after it ('3 times'); None when both are verbs or stop words.
+    """
+    def noun(word: str) -> bool:
+        return word.lower() not in COLUMN_STOP_WORDS and word.lower() not in COLUMN_VERBS
+
+    before = [w for w in re.findall(r"[A-Za-z]+", step.text[:match.start()]) if noun(w)]
+    if before:
+        return before[-1].lower()
+    after = re.match(r"\s+([A-Za-z]+)", step.text[match.end():])
+    if after and noun(after.group(1)):
+        return after.group(1).lower()
+    return None
+
+
+def _common_name(names: List[str]) -> str:
+    split = [n.split() for n in names]
+    prefix = []
+    for words in zip(*split):
+        if any(w.lower() != words[0].lower() for w in words):
+            break
+        prefix.append(words[0])
+    while prefix and prefix[-1].lower() in COLUMN_STOP_WORDS | {"-", "–", "—"}:
+        prefix.pop()
+    return " ".join(prefix) if prefix else names[0]
+
+
+def _to_outline(group: List[Scenario]) -> Scenario:
+    # Literal positions per step; only positions whose values differ become columns
+    literals = [[[m for m in LITERAL.finditer(step.text)] for step in s.steps] for s in group]
+    header: List[str] = []
+    columns = {}   # (step index, literal index) → column name
+    for i, step in enumerate(group[0].steps):
+        for j, match in enumerate(literals[0][i]):
+            values = {lits[i][j].group(0) for lits in literals}
+            if len(values) == 1:
+                continue
+            name = _column_name(step, match) or f"value{sum(1 for h in header if h.startswith('value')) + 1}"
+            if name in header:
+                name = f"{name}_{sum(1 for h in header if h == name or h.startswith(name + '_')) + 1}"
+            header.append(name)
+            columns[(i, j)] = name
+
+    steps = []
+    for i, step in enumerate(group[0].steps):
+        text = step.text
+        for j, match in reversed(list(enumerate(literals[0][i]))):
+            if (i, j) in columns:
+                placeholder = f"<{columns[(i, j)]}>"
+                if match.group(0).startswith('"'):
+                    placeholder = f'"{placeholder}"'
+                text = text[:match.start()] + placeholder + text[match.end():]
+        steps.append(Step(keyword=step.keyword, text=text, kind=step.kind, extra=list(step.extra)))
+
+    rows = []
+    for lits in literals:
+        rows.append([
+            lits[i][j].group(0).strip('"').replace("|", "\\|")
+            for i in range(len(group[0].steps)) for j in range(len(lits[i])) if (i, j) in columns
+        ])
+
+    return Scenario(
+        name=_common_name([s.name for s in group]),
+        keyword="Scenario Outline",
+        tags=list(group[0].tags),
+        description=list(group[0].description),
+        steps=steps,
+        examples=[Examples(header=header, rows=rows)]
+    )
+
+
+def _step_count(features: List[Feature]) -> int:
+    return sum(len(f.background) + sum(len(s.steps) for s in f.scenarios) for f in features)
+
+
+def compact_outlines(features: List[Feature]):
+    """
+    Collapses scenarios that differ only in literal values (quoted strings
+    and numbers) into Scenario Outlines with an Examples table.
+    Returns the features and a CompactionReport.
+    """
+    report = CompactionReport(
+        scenarios_before=sum(len(f.scenarios) for f in features),
+        steps_before=_step_count(features)
+    )
+
+    for feature in features:
+        groups = {}
+        order = []
+        for scenario in feature.scenarios:
+            if scenario.is_outline or not scenario.steps:
+                key = id(scenario)
+            else:
+                key = (tuple(scenario.tags), tuple(_step_template(s) for s in scenario.steps))
+            if key not in groups:
+                groups[key] = []
+                order.append(key)
+            groups[key].append(scenario)
+
+        scenarios = []
+        for key in order:
+            group = groups[key]
+            if len(group) == 1:
+                scenarios.append(group[0])
+                continue
+            outline = _to_outline(group)
+            if not outline.examples[0].header:
+                scenarios.append(group[0])  # identical scenarios: keep one
+                continue
+            scenarios.append(outline)
+            report.outlines += 1
+        feature.scenarios = scenarios
+
+    report.scenarios_after = sum(len(f.scenarios) for f in features)
+    report.steps_after = _step_count(features)
+    return features, report
+
+
+def compact_feature_text(text: str):
+    """
+    compact_outlines() on Gherkin text. The text is returned unchanged
+    when it does not parse or nothing collapses; identical scenarios
+    dropped without creating an outline are dropped from the text too.
+    """
+    features = parse_features(text)
+    features, report = compact_outlines(features)
+    if not report.outlines and report.scenarios_after == report.scenarios_before:
+        return text, report
+    return render_features(features).strip(), report
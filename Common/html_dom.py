@@ -0,0 +1,313 @@
+# file: html_dom.py
+
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+from Common.html_reducer import VOID_TAGS
+
+# ---------------------------------------------------------
+# DOM
+# ---------------------------------------------------------
+
+# Content that is never matched by locators
+IGNORED_TEXT_TAGS = {"script", "style", "noscript", "template"}
+
+
+class Node:
+    __slots__ = ("tag", "attrs", "children", "parent", "texts", "index")
+
+    def __init__(self, tag: str, attrs: Dict[str, str], parent: Optional["Node"] = None):
+        self.tag = tag
+        self.attrs = attrs
+        self.children: List["Node"] = []
+        self.parent = parent
+        self.texts: List[str] = []
+        self.index = 0
+
+    @property
+    def classes(self) -> List[str]:
+        return self.attrs.get("class", "").split()
+
+    def element_siblings(self) -> List["Node"]:
+        return self.parent.children if self.parent else [self]
+
+    def iter(self):
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+    def text(self) -> str:
+        if self.tag in IGNORED_TEXT_TAGS:
+            return ""
+        parts = list(self.texts)
+        parts.extend(child.text() for child in self.children)
+        return " ".join(" ".join(parts).split())
+
+    def __repr__(self) -> str:
+        attrs = "".join(f' {k}="{v}"' for k, v in self.attrs.items() if not k.startswith("data-v-"))
+        return f"<{self.tag}{attrs}>"
+
+
+class _DomBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Node("#document", {})
+        self.stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        node = Node(tag, {k: v or "" for k, v in attrs}, self.stack[-1])
+        node.index = len(self.stack[-1].children)
+        self.stack[-1].children.append(node)
+        if tag not in VOID_TAGS:
+            self.stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.stack.pop()
+
+    def handle_endtag(self, tag):
+        # Tolerate unclosed elements: pop up to the matching open tag
+        for i in range(len(self.stack) - 1, 0, -1):
+            if self.stack[i].tag == tag:
+                del self.stack[i:]
+                return
+
+    def handle_data(self, data):
+        if data.strip():
+            self.stack[-1].texts.append(data.strip())
+
+
+def parse_html(html: str) -> Node:
+    builder = _DomBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+# ---------------------------------------------------------
+# CSS SELECTORS
+# ---------------------------------------------------------
+class UnsupportedSelector(ValueError):
+    pass
+
+
+ATTRIBUTE = re.compile(r"\[\s*([\w:-]+)\s*(?:([*^$~|]?=)\s*(\"[^\"]*\"|'[^']*'|[^\]\s]+)\s*(i)?\s*)?\]")
+PSEUDO = re.compile(r":([\w-]+)(?:\(([^)]*)\))?")
+SIMPLE = re.compile(r"(#[\w-]+|\.[\w-]+|\*|[a-zA-Z][\w-]*)")
+
+POSITIONAL_PSEUDOS = {"first-child", "last-child", "nth-child", "nth-of-type", "first-of-type",
+                      "last-of-type", "only-child", "nth-last-child"}
+STATE_PSEUDOS = {"checked", "disabled", "enabled", "visible"}
+
+
+class Compound:
+    __slots__ = ("tag", "ids", "classes", "attributes", "pseudos")
+
+    def __init__(self):
+        self.tag = None
+        self.ids: List[str] = []
+        self.classes: List[str] = []
+        self.attributes: List[tuple] = []   # (name, operator, value, case-insensitive)
+        self.pseudos: List[tuple] = []      # (name, argument)
+
+
+def _split_top_level(text: str, separator: str) -> List[str]:
+    parts, depth, quote, current = [], 0, None, ""
+    for ch in text:
+        if quote:
+            quote = None if ch == quote else quote
+        elif ch in "'\"":
+            quote = ch
+        elif ch in "([":
+            depth += 1
+        elif ch in ")]":
+            depth -= 1
+        elif ch == separator and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        current += ch
+    parts.append(current)
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _parse_compound(text: str) -> Compound:
+    compound = Compound()
+    position = 0
+    while position < len(text):
+        attribute = ATTRIBUTE.match(text, position)
+        if attribute:
+            value = attribute.group(3)
+            if value and value[0] in "'\"":
+                value = value[1:-1]
+            compound.attributes.append((attribute.group(1), attribute.group(2), value, bool(attribute.group(4))))
+            position = attribute.end()
+            continue
+        pseudo = PSEUDO.match(text, position)
+        if pseudo:
+            name = pseudo.group(1)
+            if name not in POSITIONAL_PSEUDOS and name not in STATE_PSEUDOS and name != "not":
+                raise UnsupportedSelector(f":{name}")
+            compound.pseudos.append((name, (pseudo.group(2) or "").strip()))
+            position = pseudo.end()
+            continue
+        simple = SIMPLE.match(text, position)
+        if not simple:
+            raise UnsupportedSelector(text[position:])
+        token = simple.group(1)
+        if token.startswith("#"):
+            compound.ids.append(token[1:])
+        elif token.startswith("."):
+            compound.classes.append(token[1:])
+        elif token != "*":
+            compound.tag = token.lower()
+        position = simple.end()
+    return compound
+
+
+def parse_selector(selector: str) -> List[List[tuple]]:
+    """
+    Parses a CSS selector list into [(combinator, Compound), ...] chains.
+    Playwright-only syntax (text=, xpath=, >>, :has-text) raises
+    UnsupportedSelector.
+    """
+    if ">>" in selector or re.match(r"^\s*(text|xpath|id|data-testid|role)\s*=", selector) or selector.startswith("//"):
+        raise UnsupportedSelector(selector)
+
+    chains = []
+    for part in _split_top_level(selector, ","):
+        tokens = re.findall(r"\s*([>+~])\s*|(\s+)|((?:\[[^\]]*\]|\([^)]*\)|[^\s>+~\[(])+)", part)
+        chain = []
+        combinator = " "
+        for symbol, space, compound in tokens:
+            if symbol:
+                combinator = symbol
+            elif space:
+                combinator = " " if combinator in (" ", "") else combinator
+            elif compound:
+                if combinator in "+~" and chain:
+                    raise UnsupportedSelector(combinator)
+                chain.append((combinator if chain else "", _parse_compound(compound)))
+                combinator = " "
+        chains.append(chain)
+    return chains
+
+
+def _nth(argument: str, position: int) -> bool:
+    argument = argument.replace(" ", "")
+    if argument == "odd":
+        return position % 2 == 1
+    if argument == "even":
+        return position % 2 == 0
+    match = re.fullmatch(r"([+-]?\d*)n([+-]\d+)?", argument)
+    if not match:
+        return position == int(argument)
+    a = int(match.group(1) + "1" if match.group(1) in ("", "+", "-") else match.group(1))
+    b = int(match.group(2) or 0)
+    return (position - b) % a == 0 and (position - b) // a >= 0 if a else position == b
+
+
+def _attribute_matches(node: Node, name: str, operator: Optional[str], value: str, insensitive: bool) -> bool:
+    if name not in node.attrs:
+        return False
+    if operator is None:
+        return True
+    actual = node.attrs[name]
+    if insensitive:
+        actual, value = actual.lower(), value.lower()
+    if operator == "=":
+        return actual == value
+    if operator == "*=":
+        return value in actual
+    if operator == "^=":
+        return actual.startswith(value)
+    if operator == "$=":
+        return actual.endswith(value)
+    if operator == "~=":
+        return value in actual.split()
+    if operator == "|=":
+        return actual == value or actual.startswith(value + "-")
+    return False
+
+
+def _compound_matches(node: Node, compound: Compound) -> bool:
+    if node.tag.startswith("#"):
+        return False
+    if compound.tag and node.tag != compound.tag:
+        return False
+    if any(node.attrs.get("id") != i for i in compound.ids):
+        return False
+    classes = node.classes
+    if any(c not in classes for c in compound.classes):
+        return False
+    if not all(_attribute_matches(node, *a) for a in compound.attributes):
+        return False
+
+    for name, argument in compound.pseudos:
+        siblings = node.element_siblings()
+        if name == "not":
+            if any(_chain_matches(node, chain) for chain in parse_selector(argument)):
+                return False
+        elif name == "first-child" and siblings[0] is not node:
+            return False
+        elif name == "last-child" and siblings[-1] is not node:
+            return False
+        elif name == "only-child" and len(siblings) != 1:
+            return False
+        elif name == "nth-child" and not _nth(argument, siblings.index(node) + 1):
+            return False
+        elif name == "nth-last-child" and not _nth(argument, len(siblings) - siblings.index(node)):
+            return False
+        elif name in ("nth-of-type", "first-of-type", "last-of-type"):
+            same = [s for s in siblings if s.tag == node.tag]
+            position = same.index(node) + 1
+            if name == "first-of-type" and position != 1:
+                return False
+            if name == "last-of-type" and position != len(same):
+                return False
+            if name == "nth-of-type" and not _nth(argument, position):
+                return False
+        elif name == "checked" and "checked" not in node.attrs:
+            return False
+        elif name == "disabled" and "disabled" not in node.attrs:
+            return False
+        elif name == "enabled" and "disabled" in node.attrs:
+            return False
+    return True
+
+
+def _chain_matches(node: Node, chain: List[tuple], scope: Optional[Node] = None) -> bool:
+    if not _compound_matches(node, chain[-1][1]):
+        return False
+    current = node
+    for index in range(len(chain) - 1, 0, -1):
+        combinator = chain[index][0]
+        compound = chain[index - 1][1]
+        if combinator == ">":
+            current = current.parent
+            if current is None or current is scope or not _compound_matches(current, compound):
+                return False
+            continue
+        current = current.parent
+        while current is not None and current is not scope and not _compound_matches(current, compound):
+            current = current.parent
+        if current is None or current is scope:
+            return False
+    return True
+
+
+def select(scope: Node, selector: str) -> List[Node]:
+    """
+    Elements below scope matching a CSS selector, in document order.
+    """
+    chains = parse_selector(selector)
+    results = []
+    for node in scope.iter():
+        if node is scope:
+            continue
+        if any(_chain_matches(node, chain, scope if scope.tag != "#document" else None) for chain in chains):
+            results.append(node)
+    return results
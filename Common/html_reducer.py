@@ -0,0 +1,345 @@
+# file: html_reducer.py
+
+import re
+from html.parser import HTMLParser
+
+# ---------------------------------------------------------
+# CONFIGURATION
+# ---------------------------------------------------------
+DEFAULT_MAX_CHARS = 6000
+DEFAULT_CHUNK_SIZE = 64 * 1024
+MAX_SIMILAR_ROWS = 2
+MAX_ROW_LINES = 40
+MAX_TEXT_CHARS = 80
+MAX_ATTR_CHARS = 60
+
+# Subtrees that never carry testable structure
+SKIP_TAGS = {"script", "style", "svg", "noscript", "template", "iframe", "canvas", "object"}
+
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr"
+}
+
+# Elements a user can act on (emitted with their attributes)
+INTERACTIVE_TAGS = {"a", "button", "input", "select", "textarea", "option", "img"}
+
+# Elements whose short text is worth keeping (titles, labels, messages)
+TEXT_TAGS = {"title", "h1", "h2", "h3", "h4", "h5", "h6", "label", "p", "legend", "caption", "th"}
+
+# Containers that give structure, emitted only when something inside is kept
+LANDMARK_TAGS = {
+    "form", "nav", "header", "footer", "main", "aside", "section", "dialog",
+    "fieldset", "table", "thead", "tbody", "ul", "ol"
+}
+
+# Repeated children that are deduplicated by structural signature
+ROW_TAGS = {"li", "tr"}
+
+# Interactive elements emitted before their children (the options of a select)
+OPTION_CONTAINERS = {"select", "datalist", "optgroup"}
+
+# HTML's implied end tags: opening the key closes an open element of the
+# first set, looking no further up than the nearest element of the second
+_TABLE_PARTS = {"thead", "tbody", "tfoot", "tr", "td", "th"}
+_P_SCOPE = {"button", "table", "td", "th", "caption", "li", "dd", "dt", "select", "object", "template"}
+IMPLIED_END = {
+    "li": ({"li"}, {"ul", "ol", "menu"}),
+    "dt": ({"dt", "dd"}, {"dl"}),
+    "dd": ({"dt", "dd"}, {"dl"}),
+    "option": ({"option"}, {"select", "datalist", "optgroup"}),
+    "optgroup": ({"option", "optgroup"}, {"select", "datalist"}),
+    "tr": ({"tr", "td", "th"}, {"table", "thead", "tbody", "tfoot"}),
+    "td": ({"td", "th"}, {"tr", "table"}),
+    "th": ({"td", "th"}, {"tr", "table"}),
+    "thead": (_TABLE_PARTS, {"table"}),
+    "tbody": (_TABLE_PARTS, {"table"}),
+    "tfoot": (_TABLE_PARTS, {"table"}),
+}
+# Block elements that close an open <p>
+P_CLOSERS = {
+    "p", "div", "ul", "ol", "dl", "table", "form", "fieldset", "section", "nav", "header", "footer",
+    "main", "aside", "article", "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote", "hr", "menu"
+}
+
+# Open elements kept at most; deeper (malformed) nesting is not tracked
+MAX_STACK_DEPTH = 256
+
+INTERACTIVE_ROLES = {
+    "button", "link", "checkbox", "radio", "textbox", "combobox", "option",
+    "menuitem", "tab", "switch", "searchbox", "alert", "dialog", "listbox"
+}
+
+KEPT_ATTRS = (
+    "id", "name", "type", "role", "placeholder", "aria-label", "data-testid",
+    "for", "href", "alt", "title", "action", "method", "class"
+)
+
+# ---------------------------------------------------------
+# STREAMING REDUCER
+# ---------------------------------------------------------
+class _Frame:
+    __slots__ = ("tag", "line", "emitted", "text", "row_lines", "seen_rows", "omitted_rows")
+
+    def __init__(self, tag, line=None):
+        self.tag = tag
+        self.line = line
+        self.emitted = False
+        self.text = None
+        self.row_lines = [] if tag in ROW_TAGS else None
+        self.seen_rows = None
+        self.omitted_rows = 0
+
+
+class HtmlReducer(HTMLParser):
+    """
+    Incremental HTML → structural summary reducer.
+
+    Feed the page in chunks; only interactive elements, short labels and
+    the landmark containers around them are kept. Scripts, styles, SVGs,
+    hidden inputs and purely decorative subtrees are dropped, repeated
+    list/table rows are collapsed, and the summary stops growing once
+    max_chars is reached, so memory does not depend on page size.
+    """
+
+    def __init__(self, max_chars: int = DEFAULT_MAX_CHARS, max_similar_rows: int = MAX_SIMILAR_ROWS):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.max_similar_rows = max_similar_rows
+        self.lines = []
+        self.size = 0
+        self.truncated = False
+        self._stack = []
+        self._skip_depth = 0
+        self._overflow = 0      # open elements beyond MAX_STACK_DEPTH
+
+    # -----------------------------------------------------
+    # PARSER CALLBACKS
+    # -----------------------------------------------------
+    def handle_starttag(self, tag, attrs):
+        if self._skip_depth:
+            if tag not in VOID_TAGS:
+                self._skip_depth += 1
+            return
+        if tag in SKIP_TAGS:
+            self._skip_depth = 1
+            return
+
+        attrs = dict(attrs)
+        kind = self._classify(tag, attrs)
+        self._close_implied(tag)
+
+        if tag in VOID_TAGS or self._overflow or len(self._stack) >= MAX_STACK_DEPTH:
+            if kind == "interactive":
+                self._emit(self._describe(tag, attrs))
+            if tag not in VOID_TAGS:
+                self._overflow += 1
+            return
+
+        frame = _Frame(tag)
+        if kind == "interactive" or kind == "text":
+            frame.line = self._describe(tag, attrs)
+            frame.text = []
+        elif kind == "landmark":
+            frame.line = self._describe(tag, attrs)
+        self._stack.append(frame)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and not self._skip_depth:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self._skip_depth:
+            if tag not in VOID_TAGS:
+                self._skip_depth -= 1
+            return
+        if tag in VOID_TAGS:
+            return
+        if self._overflow:
+            self._overflow -= 1
+            return
+
+        # Tolerate unclosed tags the way browsers do
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index].tag == tag:
+                while len(self._stack) > index:
+                    self._close(self._stack.pop())
+                return
+
+    def _close_implied(self, tag):
+        """
+        Pops the open sibling a new li / option / tr / td / p implicitly
+        ends, so unclosed list and table markup stays flat.
+        """
+        if self._overflow:
+            return
+        closes, boundary = IMPLIED_END.get(tag, (None, None))
+        if tag in P_CLOSERS:
+            closes, boundary = (closes or set()) | {"p"}, (boundary or set()) | _P_SCOPE
+        if not closes:
+            return
+        found = None
+        for index in range(len(self._stack) - 1, -1, -1):
+            open_tag = self._stack[index].tag
+            if open_tag in closes:
+                found = index
+            elif open_tag in boundary:
+                break
+        if found is not None:
+            while len(self._stack) > found:
+                self._close(self._stack.pop())
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        for frame in reversed(self._stack):
+            if frame.text is not None:
+                if sum(len(t) for t in frame.text) < MAX_TEXT_CHARS:
+                    frame.text.append(data)
+                return
+
+    # -----------------------------------------------------
+    # CLASSIFICATION / RENDERING
+    # -----------------------------------------------------
+    def _classify(self, tag, attrs):
+        if tag == "input" and (attrs.get("type") or "").lower() == "hidden":
+            return None
+        if tag in INTERACTIVE_TAGS:
+            return "interactive"
+        if (attrs.get("role") or "").lower() in INTERACTIVE_ROLES:
+            return "interactive"
+        if "onclick" in attrs or "contenteditable" in attrs:
+            return "interactive"
+        if tag in TEXT_TAGS:
+            return "text"
+        if tag in LANDMARK_TAGS or tag in ROW_TAGS:
+            return "landmark"
+        if "id" in attrs or "data-testid" in attrs:
+            return "landmark"
+        return None
+
+    @staticmethod
+    def _describe(tag, attrs):
+        parts = [tag]
+        for name in KEPT_ATTRS:
+            value = attrs.get(name)
+            if value is None:
+                continue
+            value = " ".join(value.split())
+            if name == "class":
+                value = " ".join(value.split()[:3])
+            if not value:
+                continue
+            parts.append(f'{name}="{value[:MAX_ATTR_CHARS]}"')
+        return "<" + " ".join(parts) + ">"
+
+    def _close(self, frame):
+        if frame.text is not None and not frame.emitted:
+            text = " ".join("".join(frame.text).split())[:MAX_TEXT_CHARS]
+            if text or frame.tag not in TEXT_TAGS:
+                self._emit(f"{frame.line} {text}".rstrip())
+
+        if frame.omitted_rows:
+            self._write(
+                f"{self._indent()}  … {frame.omitted_rows} similar rows omitted",
+                self._target(len(self._stack))
+            )
+
+        if frame.row_lines is not None and frame.row_lines:
+            self._flush_row(frame)
+
+    def _flush_row(self, row):
+        parent = self._stack[-1] if self._stack else None
+        # Table rows differ only by data, list items keep their text (menus)
+        lines = [l.strip() for l in row.row_lines]
+        if row.tag == "tr":
+            lines = [l.split(">", 1)[0] for l in lines]
+        signature = re.sub(r'"[^"]*"|\d+', "", "\n".join(lines))
+
+        if parent is not None:
+            if parent.seen_rows is None:
+                parent.seen_rows = {}
+            count = parent.seen_rows.get(signature, 0)
+            if count >= self.max_similar_rows:
+                parent.omitted_rows += 1
+                return
+            if len(parent.seen_rows) < 64 or signature in parent.seen_rows:
+                parent.seen_rows[signature] = count + 1
+
+        target = self._target(len(self._stack))
+        for line in row.row_lines:
+            self._write(line, target)
+
+    # -----------------------------------------------------
+    # OUTPUT
+    # -----------------------------------------------------
+    def _indent(self, depth=None):
+        depth = len(self._stack) if depth is None else depth
+        return "  " * sum(1 for f in self._stack[:depth] if f.emitted)
+
+    def _target(self, depth):
+        for frame in reversed(self._stack[:depth]):
+            if frame.row_lines is not None:
+                return frame.row_lines
+        return None
+
+    def _emit(self, line):
+        # Lazily emit the landmark path down to this element
+        for index, frame in enumerate(self._stack):
+            if frame.line is not None and not frame.emitted and \
+                    (frame.text is None or frame.tag in OPTION_CONTAINERS):
+                frame.emitted = True
+                self._write(self._indent(index) + frame.line, self._target(index + 1))
+        depth = len(self._stack)
+        self._write(self._indent(depth) + line, self._target(depth))
+
+    def _write(self, line, target):
+        if target is not None:
+            if len(target) < MAX_ROW_LINES:
+                target.append(line)
+            return
+        if self.truncated:
+            return
+        if self.size + len(line) + 1 > self.max_chars:
+            self.truncated = True
+            self.lines.append("… summary truncated")
+            return
+        self.lines.append(line)
+        self.size += len(line) + 1
+
+    def summary(self) -> str:
+        while self._stack:
+            self._close(self._stack.pop())
+        return "\n".join(self.lines)
+
+# ---------------------------------------------------------
+# PUBLIC HELPERS
+# ---------------------------------------------------------
+def reduce_html(html: str, max_chars: int = DEFAULT_MAX_CHARS) -> str:
+    reducer = HtmlReducer(max_chars=max_chars)
+    reducer.feed(html)
+    reducer.close()
+    return reducer.summary()
+
+
+def reduce_html_file(path: str, max_chars: int = DEFAULT_MAX_CHARS,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
+    """
+    Streams an HTML file through the reducer chunk by chunk.
+    """
+    reducer = HtmlReducer(max_chars=max_chars)
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            reducer.feed(chunk)
+    reducer.close()
+    return reducer.summary()
+
+
+def looks_like_html(path: str, sniff_chars: int = 4096) -> bool:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        head = f.read(sniff_chars)
+    return "<" in head and ">" in head
@@ -0,0 +1,442 @@
+# file: locator_quality.py
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from Common.html_dom import Node, UnsupportedSelector, parse_html, parse_selector, select
+from Common.typescript_pom import PomClass
+
+# ---------------------------------------------------------
+# PLAYWRIGHT LOCATOR EXPRESSIONS
+# ---------------------------------------------------------
+CALL = re.compile(r"\.(\w+)\(((?:[^()'\"`]|'[^']*'|\"[^\"]*\"|`[^`]*`|\([^()]*\))*)\)")
+STRING = re.compile(r"'((?:[^'\\]|\\.)*)'|\"((?:[^\"\\]|\\.)*)\"|`([^`]*)`")
+OPTION = re.compile(r"(\w+)\s*:\s*('(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|true|false|\d+)")
+
+# Implicit ARIA roles of the elements generated POMs usually target
+IMPLICIT_ROLES = {
+    "button": "button", "a": "link", "select": "combobox", "textarea": "textbox",
+    "h1": "heading", "h2": "heading", "h3": "heading", "h4": "heading", "h5": "heading", "h6": "heading",
+    "img": "img", "form": "form", "nav": "navigation", "ul": "list", "ol": "list", "li": "listitem",
+    "table": "table", "tr": "row", "td": "cell", "th": "columnheader", "dialog": "dialog",
+}
+INPUT_ROLES = {
+    "": "textbox", "text": "textbox", "email": "textbox", "tel": "textbox", "url": "textbox",
+    "search": "searchbox", "checkbox": "checkbox", "radio": "radio", "number": "spinbutton",
+    "submit": "button", "button": "button", "reset": "button", "image": "button",
+}
+
+# Attributes that identify test hooks, most stable first
+TEST_ID_ATTRIBUTES = ("data-testid", "data-test", "data-qa", "data-cy")
+
+MAX_TEXT_SUGGESTION = 40
+MAX_DESCENDANT_DEPTH = 3
+
+# Ids and classes that look generated by a build (hashes, counters)
+GENERATED_NAME = re.compile(r"\d{3,}|[0-9a-f]{6,}|^ember\d|^react-|:")
+
+# Text that changes between releases (versions, years, copyright lines)
+VOLATILE_TEXT = re.compile(r"\d+\.\d+|\b(?:19|20)\d{2}\b|©|\(c\)", re.IGNORECASE)
+
+# Ancestors a locator can be scoped to when the element alone is not unique
+LANDMARK_TAGS = ("header", "footer", "nav", "main", "aside", "form", "dialog", "section", "table")
+
+
+def _unquote(match) -> str:
+    return next(g for g in match.groups() if g is not None)
+
+
+def _options(raw: str) -> Dict[str, str]:
+    options = {}
+    for name, value in OPTION.findall(raw):
+        options[name] = value[1:-1] if value[0] in "'\"" else value
+    return options
+
+
+def parse_locator(expression: str) -> List[Tuple[str, List[str], Dict[str, str]]]:
+    """
+    page.locator('a').getByRole('button', { name: 'x' }).first()
+    → [('locator', ['a'], {}), ('getByRole', ['button'], {'name': 'x'}), ('first', [], {})]
+    """
+    calls = []
+    for match in CALL.finditer(expression):
+        raw = match.group(2)
+        strings = [_unquote(s) for s in STRING.finditer(raw.split("{", 1)[0])]
+        options = _options(raw.split("{", 1)[1]) if "{" in raw else {}
+        number = re.fullmatch(r"\s*(-?\d+)\s*", raw)
+        calls.append((match.group(1), [number.group(1)] if number else strings, options))
+    return calls
+
+# ---------------------------------------------------------
+# ACCESSIBILITY (approximation of Playwright's role engine)
+# ---------------------------------------------------------
+def element_role(node: Node) -> Optional[str]:
+    if node.attrs.get("role"):
+        return node.attrs["role"].split()[0]
+    if node.tag == "input":
+        input_type = node.attrs.get("type", "").lower()
+        if input_type == "hidden":
+            return None
+        return INPUT_ROLES.get(input_type)
+    if node.tag == "a" and "href" not in node.attrs:
+        return None
+    return IMPLICIT_ROLES.get(node.tag)
+
+
+def _labels(root: Node) -> Dict[str, str]:
+    return {n.attrs["for"]: n.text() for n in root.iter() if n.tag == "label" and n.attrs.get("for")}
+
+
+def accessible_name(node: Node, labels: Dict[str, str]) -> str:
+    if node.attrs.get("aria-label"):
+        return node.attrs["aria-label"].strip()
+    if node.tag in ("input", "select", "textarea"):
+        label = labels.get(node.attrs.get("id", ""))
+        if label:
+            return label
+        parent = node.parent
+        while parent is not None:
+            if parent.tag == "label":
+                return parent.text()
+            parent = parent.parent
+        if node.attrs.get("type", "").lower() in ("submit", "button", "reset"):
+            return node.attrs.get("value", "")
+        return node.attrs.get("title", "") or node.attrs.get("placeholder", "")
+    if node.tag == "img":
+        return node.attrs.get("alt", "")
+    name = node.text()
+    if not name:
+        # Icon-only links/buttons: fall back to a labelled image or title
+        images = [n.attrs.get("alt", "") for n in node.iter() if n.tag == "img" and n.attrs.get("alt")]
+        name = images[0] if images else node.attrs.get("title", "")
+    return name
+
+
+def _text_matches(actual: str, expected: str, exact: bool) -> bool:
+    actual = " ".join(actual.split())
+    if exact:
+        return actual == expected
+    return expected.lower() in actual.lower()
+
+# ---------------------------------------------------------
+# EVALUATION
+# ---------------------------------------------------------
+def _descendants(scopes: List[Node]) -> List[Node]:
+    seen = {}
+    for scope in scopes:
+        for node in scope.iter():
+            if node is not scope and not node.tag.startswith("#"):
+                seen.setdefault(id(node), node)
+    return list(seen.values())
+
+
+def evaluate_locator(root: Node, expression: str) -> List[Node]:
+    """
+    Elements a Playwright locator expression resolves to in the static
+    HTML. Raises UnsupportedSelector for engines that cannot be evaluated
+    offline (xpath, text=, >> chains, filters).
+    """
+    scopes = [root]
+    labels = _labels(root)
+    for method, args, options in parse_locator(expression):
+        exact = options.get("exact") == "true"
+        if method == "locator":
+            if not args:
+                raise UnsupportedSelector(expression)
+            matched = []
+            for scope in scopes:
+                matched.extend(n for n in select(scope, args[0]) if n not in matched)
+            scopes = matched
+        elif method == "getByRole":
+            name = options.get("name")
+            scopes = [
+                n for n in _descendants(scopes)
+                if element_role(n) == args[0]
+                and (name is None or _text_matches(accessible_name(n, labels), name, exact))
+            ]
+        elif method == "getByText":
+            candidates = [n for n in _descendants(scopes) if _text_matches(n.text(), args[0], exact)]
+            # The innermost element containing the text
+            scopes = [n for n in candidates if not any(c in candidates for c in n.children)]
+        elif method in ("getByPlaceholder", "getByAltText", "getByTitle"):
+            attribute = {"getByPlaceholder": "placeholder", "getByAltText": "alt", "getByTitle": "title"}[method]
+            scopes = [n for n in _descendants(scopes) if _text_matches(n.attrs.get(attribute, ""), args[0], exact)]
+        elif method == "getByTestId":
+            scopes = [n for n in _descendants(scopes) if n.attrs.get("data-testid") == args[0]]
+        elif method == "getByLabel":
+            scopes = [
+                n for n in _descendants(scopes)
+                if n.tag in ("input", "select", "textarea") and _text_matches(accessible_name(n, labels), args[0], exact)
+            ]
+        elif method == "first":
+            scopes = scopes[:1]
+        elif method == "last":
+            scopes = scopes[-1:]
+        elif method == "nth":
+            index = int(args[0]) if args else 0
+            scopes = scopes[index:index + 1] if index >= 0 else scopes[index:][:1]
+        else:
+            raise UnsupportedSelector(f".{method}()")
+    return scopes
+
+# ---------------------------------------------------------
+# QUALITY RULES
+# ---------------------------------------------------------
+def _text_issue(text: str) -> Optional[str]:
+    if VOLATILE_TEXT.search(text):
+        return "text contains a version, year or copyright that changes between releases"
+    return None
+
+
+def selector_issues(expression: str) -> List[str]:
+    """
+    Static issues of a locator expression, independent of the page.
+    getByText() and the text= engine are judged alike.
+    """
+    issues = []
+    calls = parse_locator(expression)
+    for method, args, options in calls:
+        if method in ("first", "last", "nth"):
+            issues.append(f"positional .{method}() hides a non-unique locator")
+        if method in ("getByText", "getByRole") and args:
+            issue = _text_issue(args[0] if method == "getByText" else options.get("name", ""))
+            if issue:
+                issues.append(issue)
+        if method != "locator" or not args:
+            continue
+        selector = args[0]
+        if selector.startswith("text="):
+            issue = _text_issue(selector[len("text="):])
+            if issue:
+                issues.append(issue)
+            continue
+        if selector.startswith(("xpath=", "//")) or ">>" in selector or ":has" in selector:
+            issues.append("expensive engine (xpath / has / chained)")
+            continue
+        try:
+            chains = parse_selector(selector)
+        except UnsupportedSelector:
+            issues.append("selector cannot be checked offline")
+            continue
+        for chain in chains:
+            compounds = [c for _, c in chain]
+            if len(compounds) > MAX_DESCENDANT_DEPTH:
+                issues.append(f"long descendant chain ({len(compounds)} levels)")
+            if not any(c.ids or c.classes or c.attributes or c.tag in LANDMARK_TAGS for c in compounds):
+                issues.append("overly broad (tag names only)")
+            if any(n in ("first-child", "last-child", "nth-child", "nth-of-type", "nth-last-child",
+                         "first-of-type", "last-of-type") for c in compounds for n, _ in c.pseudos):
+                issues.append("positional pseudo-class depends on DOM order")
+            # Substring matches are fine once a tag name narrows the elements scanned
+            if any(op and op != "=" and not c.tag for c in compounds for _, op, _, _ in c.attributes):
+                issues.append("substring attribute match scans every element's attribute value")
+            if any(a == "href" and op == "=" and "?" in value for c in compounds for a, op, value, _ in c.attributes):
+                issues.append("exact URL with a query string")
+            if any(a.startswith("data-v-") for c in compounds for a, _, _, _ in c.attributes) or \
+                    any(GENERATED_NAME.search(x) for c in compounds for x in c.ids + c.classes):
+                issues.append("relies on generated ids/classes/attributes")
+    return list(dict.fromkeys(issues))
+
+
+def _quote(text: str) -> str:
+    return "'" + text.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def _css(selector: str) -> str:
+    return f"page.locator({_quote(selector)})"
+
+
+def _attribute_selector(tag: str, name: str, value: str, operator: str = "=") -> str:
+    return f'{tag}[{name}{operator}"{value}"]'
+
+
+def _href_selector(tag: str, href: str) -> Optional[str]:
+    """
+    Links by the stable part of their target: host and path of absolute
+    URLs, the path of relative ones with a query; never the full URL.
+    """
+    if '"' in href or href.startswith(("javascript:", "#")):
+        return None
+    parts = urlsplit(href)
+    if parts.netloc:
+        value = parts.netloc.removeprefix("www.") + parts.path.rstrip("/")
+        return _attribute_selector(tag, "href", value, "*=")
+    if parts.query or parts.fragment:
+        return _attribute_selector(tag, "href", parts.path, "^=") if parts.path not in ("", "/") else None
+    return _attribute_selector(tag, "href", href)
+
+
+def _resolves(root: Node, expression: str) -> Optional[List[Node]]:
+    try:
+        return evaluate_locator(root, expression)
+    except UnsupportedSelector:
+        return None
+
+
+def _stable_text(text: str) -> bool:
+    return bool(text) and len(text) <= MAX_TEXT_SUGGESTION and not VOLATILE_TEXT.search(text)
+
+
+def _containers(root: Node, node: Node) -> List[str]:
+    """
+    CSS selectors of ancestors that are unique on the page (stable id,
+    test id, landmark or class), nearest first.
+    """
+    selectors = []
+    parent = node.parent
+    while parent is not None and parent is not root:
+        candidates = []
+        if parent.attrs.get("id") and not GENERATED_NAME.search(parent.attrs["id"]) \
+                and re.fullmatch(r"[A-Za-z][\w-]*", parent.attrs["id"]):
+            candidates.append(f"#{parent.attrs['id']}")
+        candidates.extend(_attribute_selector(parent.tag, a, parent.attrs[a])
+                          for a in TEST_ID_ATTRIBUTES if parent.attrs.get(a) and '"' not in parent.attrs[a])
+        if parent.tag in LANDMARK_TAGS:
+            candidates.append(parent.tag)
+        candidates.extend(f".{c}" for c in sorted(parent.classes, key=len, reverse=True)
+                          if not GENERATED_NAME.search(c) and re.fullmatch(r"[\w-]+", c))
+        for selector in candidates:
+            try:
+                if select(root, selector) == [parent]:
+                    selectors.append(selector)
+                    break
+            except UnsupportedSelector:
+                continue
+        parent = parent.parent
+    return selectors
+
+
+def suggest_locators(root: Node, node: Node) -> List[str]:
+    """
+    Unique alternatives for an element, preferring ids, test ids and
+    form names (single attribute lookups), then role + accessible name,
+    placeholder, unique classes and stable attributes, then the same
+    scoped to a unique container, then exact text. Names and text with
+    versions or years are not used, and links match by host and path.
+    """
+    labels = _labels(root)
+    candidates = []
+
+    element_id = node.attrs.get("id", "")
+    if element_id and not GENERATED_NAME.search(element_id) and re.fullmatch(r"[A-Za-z][\w-]*", element_id):
+        candidates.append(_css(f"#{element_id}"))
+
+    for attribute in TEST_ID_ATTRIBUTES:
+        if node.attrs.get(attribute):
+            value = node.attrs[attribute]
+            candidates.append(f"page.getByTestId({_quote(value)})" if attribute == "data-testid"
+                              else _css(_attribute_selector(node.tag, attribute, value)))
+
+    if node.attrs.get("name") and node.tag in ("input", "select", "textarea", "button"):
+        candidates.append(_css(_attribute_selector(node.tag, "name", node.attrs["name"])))
+
+    # Role, class and attribute lookups, also used below inside a container
+    scopable = []
+    role = element_role(node)
+    name = accessible_name(node, labels) if role else ""
+    if role and _stable_text(name):
+        scopable.append(f".getByRole({_quote(role)}, {{ name: {_quote(name)}, exact: true }})")
+
+    if node.attrs.get("placeholder"):
+        scopable.append(f".getByPlaceholder({_quote(node.attrs['placeholder'])}, {{ exact: true }})")
+
+    for css_class in sorted(node.classes, key=len, reverse=True):
+        if not GENERATED_NAME.search(css_class):
+            scopable.append(f".locator({_quote('.' + css_class)})")
+
+    if node.attrs.get("href"):
+        selector = _href_selector(node.tag, node.attrs["href"])
+        if selector:
+            scopable.append(f".locator({_quote(selector)})")
+    for attribute in ("alt", "title", "type", "action"):
+        value = node.attrs.get(attribute)
+        if value and '"' not in value:
+            scopable.append(f".locator({_quote(_attribute_selector(node.tag, attribute, value))})")
+
+    candidates.extend("page" + lookup for lookup in scopable)
+    ambiguous = [lookup for lookup in scopable if _resolves(root, "page" + lookup) != [node]]
+    for container in _containers(root, node) if ambiguous else []:
+        candidates.extend(f"page.locator({_quote(container)})" + lookup for lookup in ambiguous)
+
+    text = node.text()
+    if _stable_text(text):
+        candidates.append(f"page.getByText({_quote(text)}, {{ exact: true }})")
+
+    return [expression for expression in dict.fromkeys(candidates)
+            if _resolves(root, expression) == [node] and not selector_issues(expression)]
+
+# ---------------------------------------------------------
+# REPORT
+# ---------------------------------------------------------
+@dataclass
+class LocatorFinding:
+    pom: str
+    name: str
+    expression: str
+    matches: Optional[int]
+    issues: List[str] = field(default_factory=list)
+    suggestions: List[str] = field(default_factory=list)
+
+    @property
+    def flagged(self) -> bool:
+        return bool(self.issues)
+
+    @property
+    def replacement(self) -> Optional[str]:
+        return self.suggestions[0] if self.flagged and self.suggestions else None
+
+
+def analyze_pom_locators(poms: List[PomClass], html: str) -> List[LocatorFinding]:
+    root = parse_html(html)
+    findings = []
+    for pom in poms:
+        for name, expression in pom.locators.items():
+            finding = LocatorFinding(pom=pom.name, name=name, expression=expression, matches=None)
+            finding.issues = selector_issues(expression)
+            try:
+                nodes = evaluate_locator(root, expression)
+            except UnsupportedSelector:
+                findings.append(finding)
+                continue
+
+            finding.matches = len(nodes)
+            if not nodes:
+                finding.issues.insert(0, "no match in the source HTML (dynamic element or wrong selector)")
+            elif len(nodes) > 1:
+                finding.issues.insert(0, f"not unique: {len(nodes)} elements match (strict mode violation)")
+
+            # Non-unique: propose for the first match, which is what .first() would pick
+            if nodes and finding.issues:
+                finding.suggestions = suggest_locators(root, nodes[0])
+            findings.append(finding)
+    return findings
+
+
+def format_report(findings: List[LocatorFinding]) -> str:
+    flagged = [f for f in findings if f.flagged]
+    lines = [f"Locators checked: {len(findings)}, flagged: {len(flagged)}, "
+             f"rewritable: {sum(1 for f in flagged if f.replacement)}"]
+    for finding in findings:
+        matches = "?" if finding.matches is None else finding.matches
+        status = "FLAG" if finding.flagged else "OK  "
+        lines.append(f"  {status} {finding.pom}.{finding.name} [{matches} match] {finding.expression}")
+        for issue in finding.issues:
+            lines.append(f"         - {issue}")
+        for suggestion in finding.suggestions[:3]:
+            lines.append(f"         → {suggestion}")
+    return "\n".join(lines)
+
+
+def rewrite_pom(code: str, findings: List[LocatorFinding]) -> str:
+    """
+    Replaces flagged locator assignments with their best unique alternative.
+    """
+    for finding in findings:
+        if finding.replacement:
+            code = code.replace(
+                f"this.{finding.name} = {finding.expression};",
+                f"this.{finding.name} = {finding.replacement};"
+            )
+    return code
@@ -0,0 +1,183 @@
+# file: model_benchmark.py
+
+import hashlib
+import json
+import os
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+from Common.model_router import valid_json
+from Common.token_budget import count_tokens
+from Common.typescript_pom import parse_pom_classes
+
+# ---------------------------------------------------------
+# FIXTURES (recorded model answers, keyed by model + prompt)
+# ---------------------------------------------------------
+@dataclass
+class Recording:
+    model: str
+    response: str
+    seconds: float
+    output_tokens: int
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", text.strip()).strip("_")
+
+
+class FixtureStore:
+    """
+    One JSON file per (model, prompt) under <dir>/<model>/<hash>.json, so a
+    recorded run replays exactly while prompts stay unchanged.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def path(self, model: str, prompt: str) -> str:
+        key = hashlib.sha256(f"{model.strip()}\n{prompt}".encode("utf-8")).hexdigest()[:24]
+        return os.path.join(self.directory, _slug(model), f"{key}.json")
+
+    def load(self, model: str, prompt: str) -> Optional[Recording]:
+        path = self.path(model, prompt)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return Recording(**json.load(f))
+
+    def save(self, recording: Recording, prompt: str):
+        path = self.path(recording.model, prompt)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(asdict(recording), f, indent=2)
+
+
+class MissingFixture(LookupError):
+    pass
+
+
+def timed_call(llm, prompt: str, store: FixtureStore, live: bool, record: bool) -> Recording:
+    """
+    Live: calls the model and measures it (recording when asked).
+    Offline: replays the recorded answer with its recorded timing.
+    """
+    model = str(llm.model).strip()
+    if not live:
+        recording = store.load(model, prompt)
+        if recording is None:
+            raise MissingFixture(f"no recording for {model}")
+        return recording
+
+    start = time.perf_counter()
+    response = llm.invoke(prompt)
+    seconds = time.perf_counter() - start
+    content = response.content if hasattr(response, "content") else str(response)
+
+    # Ollama reports generated tokens; estimate when it does not
+    metadata = getattr(response, "response_metadata", None) or {}
+    output_tokens = metadata.get("eval_count") or count_tokens(content)
+
+    recording = Recording(model, content, seconds, int(output_tokens))
+    if record:
+        store.save(recording, prompt)
+    return recording
+
+# ---------------------------------------------------------
+# VALIDATION (local, no model involved)
+# ---------------------------------------------------------
+def pom_failures(code: str, class_name: str) -> List[str]:
+    classes = parse_pom_classes(code)
+    if len(classes) != 1:
+        return [f"{len(classes)} classes"]
+    pom = classes[0]
+    failures = []
+    if pom.name != class_name:
+        failures.append(f"class {pom.name}, expected {class_name}")
+    if not pom.locators:
+        failures.append("no locators")
+    if not pom.methods:
+        failures.append("no methods")
+    if code.count("{") != code.count("}"):
+        failures.append("unbalanced braces")
+    undefined = sorted({name for name in re.findall(r"\bthis\.(\w+)\b", code)
+                        if name not in pom.fields and name not in pom.locators
+                        and pom.method(name) is None and name != "page"})
+    if undefined:
+        failures.append(f"undefined members: {', '.join(undefined)}")
+    return failures
+
+
+def analysis_failures(responses: List[str]) -> List[str]:
+    return [] if all(valid_json(r) for r in responses) else ["analysis is not valid JSON"]
+
+# ---------------------------------------------------------
+# RESULTS
+# ---------------------------------------------------------
+@dataclass
+class PageRun:
+    page: str
+    seconds: float = 0.0                # analyze + generate wall time
+    output_tokens: int = 0
+    generate_seconds: float = 0.0       # the generate call alone, for tokens/s
+    generate_tokens: int = 0
+    output_chars: int = 0
+    failures: List[str] = field(default_factory=list)
+    missing: bool = False
+
+    @property
+    def passed(self) -> bool:
+        return not self.failures and not self.missing
+
+
+@dataclass
+class PairResult:
+    name: str
+    analyze_model: str
+    generate_model: str
+    pages: List[PageRun] = field(default_factory=list)
+
+    @property
+    def measured(self) -> List[PageRun]:
+        return [p for p in self.pages if not p.missing]
+
+    @property
+    def seconds(self) -> float:
+        return sum(p.seconds for p in self.measured)
+
+    @property
+    def tokens_per_second(self) -> float:
+        # Generation speed of the generate model; analysis time is not counted
+        seconds = sum(p.generate_seconds for p in self.measured)
+        return sum(p.generate_tokens for p in self.measured) / seconds if seconds else 0.0
+
+    @property
+    def average_chars(self) -> float:
+        return sum(p.output_chars for p in self.measured) / len(self.measured) if self.measured else 0.0
+
+    @property
+    def pass_rate(self) -> Optional[float]:
+        return sum(p.passed for p in self.measured) / len(self.measured) if self.measured else None
+
+    def as_dict(self) -> dict:
+        return dict(asdict(self), seconds=self.seconds, tokens_per_second=self.tokens_per_second,
+                    average_chars=self.average_chars, pass_rate=self.pass_rate)
+
+
+def format_matrix(results: List[PairResult]) -> str:
+    header = (f"{'Pair':<16} {'Analyze':<26} {'Generate':<26} {'Pages':>5} "
+              f"{'Wall s':>8} {'Gen t/s':>7} {'Chars':>7} {'Pass':>5}")
+    lines = [header, "-" * len(header)]
+    for r in results:
+        pages = f"{len(r.measured)}/{len(r.pages)}"
+        pass_rate = "-" if r.pass_rate is None else f"{r.pass_rate:.0%}"
+        lines.append(f"{r.name:<16} {r.analyze_model:<26} {r.generate_model:<26} {pages:>5} "
+                     f"{r.seconds:>8.1f} {r.tokens_per_second:>7.1f} {r.average_chars:>7.0f} {pass_rate:>5}")
+    for r in results:
+        for p in r.pages:
+            if p.missing:
+                lines.append(f"  MISSING {r.name} / {p.page}: no recorded fixture")
+            elif p.failures:
+                lines.append(f"  FAIL {r.name} / {p.page}: {'; '.join(p.failures)}")
+    return "\n".join(lines)
@@ -0,0 +1,216 @@
+# file: model_router.py
+
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from Common.gherkin import parse_features
+from Common.structured_output import parse_json_output
+from Common.token_budget import DEFAULT_OUTPUT_RESERVE, context_window, count_tokens
+from Common.typescript_pom import parse_pom_classes
+
+# ---------------------------------------------------------
+# CONFIGURATION
+# ---------------------------------------------------------
+
+# Candidate lists go from small/local to large/cloud: (model, max input tokens).
+# None = limited only by the model's context window.
+Route = Sequence[Tuple[str, Optional[int]]]
+
+# Below this Laplace-smoothed validation pass rate a model is only used
+# as a last resort (after MIN_CALLS_FOR_RATE calls)
+MIN_PASS_RATE = 0.7
+MIN_CALLS_FOR_RATE = 3
+
+# Weight of the latest measurement in the latency average
+LATENCY_SMOOTHING = 0.3
+
+# ---------------------------------------------------------
+# VALIDATORS (output accepted without escalating)
+# ---------------------------------------------------------
+def valid_json(text: str) -> bool:
+    return parse_json_output(text) is not None
+
+
+def valid_feature(text: str) -> bool:
+    return any(feature.scenarios for feature in parse_features(text))
+
+
+def valid_pom(text: str) -> bool:
+    return any(pom.locators or pom.methods for pom in parse_pom_classes(text))
+
+# ---------------------------------------------------------
+# HISTORY
+# ---------------------------------------------------------
+@dataclass
+class ModelStats:
+    calls: int = 0
+    passes: int = 0
+    errors: int = 0
+    seconds_per_1k: float = 0.0    # smoothed wall time per 1000 input tokens
+
+    @property
+    def pass_rate(self) -> float:
+        return (self.passes + 1) / (self.calls + 2)
+
+    def predicted_seconds(self, input_tokens: int) -> Optional[float]:
+        if not self.calls - self.errors:
+            return None
+        return self.seconds_per_1k * max(input_tokens, 500) / 1000
+
+    def record(self, seconds: float, input_tokens: int, passed: bool, error: bool = False):
+        self.calls += 1
+        self.passes += int(passed)
+        self.errors += int(error)
+        if error:
+            return
+        rate = seconds * 1000 / max(input_tokens, 500)
+        measured = self.calls - self.errors
+        self.seconds_per_1k = rate if measured == 1 else \
+            LATENCY_SMOOTHING * rate + (1 - LATENCY_SMOOTHING) * self.seconds_per_1k
+
+@dataclass
+class RoutedAnswer:
+    content: str
+    model: str
+
+# ---------------------------------------------------------
+# ROUTER
+# ---------------------------------------------------------
+class ModelRouter:
+    """
+    Picks the model for each stage call from input size, measured latency
+    and validation pass rate, and escalates to the next candidate when a
+    call fails or its output does not validate.
+
+    factory(model, stage) creates the chat model (cached per pair).
+    With enabled=False only the last (largest) candidate is used.
+    """
+
+    def __init__(self, stats_file: str, routes: Dict[str, Route],
+                 factory: Callable[[str, str], object], enabled: bool = True):
+        self.stats_file = stats_file
+        self.routes = routes
+        self.factory = factory
+        self.enabled = enabled
+        self._models: Dict[Tuple[str, str], object] = {}
+        self.stats: Dict[str, Dict[str, ModelStats]] = {}
+        if stats_file and os.path.exists(stats_file):
+            with open(stats_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.stats = {stage: {model: ModelStats(**values) for model, values in models.items()}
+                          for stage, models in data.items()}
+
+    def _stats(self, stage: str, model: str) -> ModelStats:
+        return self.stats.setdefault(stage, {}).setdefault(model, ModelStats())
+
+    def save(self):
+        if not self.stats_file:
+            return
+        os.makedirs(os.path.dirname(self.stats_file) or ".", exist_ok=True)
+        with open(self.stats_file, "w", encoding="utf-8") as f:
+            json.dump({stage: {model: asdict(s) for model, s in models.items()}
+                       for stage, models in self.stats.items()}, f, indent=2, sort_keys=True)
+
+    def llm(self, model: str, stage: str):
+        key = (model, stage)
+        if key not in self._models:
+            self._models[key] = self.factory(model, stage)
+        return self._models[key]
+
+    def candidates(self, stage: str, input_tokens: int) -> List[str]:
+        """
+        Models to try in order. Fitting, reliable models are ranked by
+        expected time to a valid answer (predicted latency / pass rate);
+        small models without history go first so they get measured, the
+        largest model never does. Unreliable models follow, the largest
+        model is always the last resort.
+        """
+        route = list(self.routes[stage])
+        largest = route[-1][0]
+        if not self.enabled:
+            return [largest]
+
+        fitting = [
+            (index, model) for index, (model, limit) in enumerate(route)
+            if input_tokens <= (limit if limit is not None else context_window(model) - DEFAULT_OUTPUT_RESERVE)
+        ]
+        reliable, unreliable = [], []
+        for index, model in fitting:
+            stats = self._stats(stage, model)
+            if stats.calls >= MIN_CALLS_FOR_RATE and stats.pass_rate < MIN_PASS_RATE:
+                unreliable.append(model)
+                continue
+            predicted = stats.predicted_seconds(input_tokens)
+            if predicted is None:
+                rank = (2 if model == largest else 0, 0.0)
+            else:
+                rank = (1, predicted / stats.pass_rate)
+            reliable.append((rank, index, model))
+
+        ordered = [model for *_, model in sorted(reliable)] + unreliable
+        if largest not in ordered:
+            ordered.append(largest)
+        return ordered
+
+    def bind(self, stage: str, input_text: str, validate: Callable[[str], bool] = None) -> "RoutedModel":
+        """
+        Drop-in for a chat model in code that only uses .model and .invoke().
+        .model is the first candidate for input_text, so ContextBudget
+        chunks for it.
+        """
+        return RoutedModel(self, stage, self.candidates(stage, count_tokens(input_text))[0], validate)
+
+    def invoke(self, stage: str, prompt: str, validate: Callable[[str], bool] = None) -> RoutedAnswer:
+        """
+        Tries candidates until one answers with output that passes validate;
+        the last answer is returned if none does.
+        """
+        input_tokens = count_tokens(prompt)
+        answer, used, last_error = None, None, None
+        for model in self.candidates(stage, input_tokens):
+            start = time.perf_counter()
+            try:
+                response = self.llm(model, stage).invoke(prompt)
+            except Exception as e:   # model not pulled, server down, context overflow...
+                self._stats(stage, model).record(time.perf_counter() - start, input_tokens, False, error=True)
+                last_error = e
+                print(f"⚠️ {stage}: {model} failed ({e}), escalating")
+                continue
+            seconds = time.perf_counter() - start
+            answer = response.content if hasattr(response, "content") else str(response)
+            used = model
+            passed = validate(answer) if validate else True
+            self._stats(stage, model).record(seconds, input_tokens, passed)
+            if passed:
+                break
+            print(f"⚠️ {stage}: {model} output failed validation, escalating")
+        self.save()
+
+        if answer is None:
+            raise last_error
+        print(f"🧭 {stage}: {used} ({input_tokens} input tokens)")
+        return RoutedAnswer(answer, used)
+
+    def summary(self) -> str:
+        lines = []
+        for stage, models in self.stats.items():
+            for model, s in models.items():
+                lines.append(f"  {stage:<10} {model:<26} {s.calls:>4} calls  "
+                             f"{s.pass_rate:>4.0%} pass  {s.seconds_per_1k:>6.2f}s/1k tokens")
+        return "\n".join(["📈 Model history:"] + lines) if lines else "📈 Model history: empty"
+
+
+class RoutedModel:
+    def __init__(self, router: ModelRouter, stage: str, model: str, validate: Callable[[str], bool] = None):
+        self.router = router
+        self.stage = stage
+        self.model = model
+        self.validate = validate
+
+    def invoke(self, prompt: str) -> RoutedAnswer:
+        answer = self.router.invoke(self.stage, prompt, self.validate)
+        self.model = answer.model
+        return answer
@@ -0,0 +1,186 @@
+# file: model_scheduler.py
+
+import re
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Sequence, Tuple
+
+# ---------------------------------------------------------
+# MODEL MEMORY
+# ---------------------------------------------------------
+
+# Approximate resident size (GB) of the default Ollama quantizations
+MODEL_SIZES_GB = {
+    "qwen2.5:14b": 9.0,
+    "qwen2.5:32b": 20.0,
+    "qwen2.5-coder:14b": 9.0,
+    "qwen2.5-coder:32b": 20.0,
+    "llama3.1:8b": 4.9,
+    "llama3:8b": 4.7,
+    "mistral:7b": 4.1,
+}
+
+# Fallback for unknown local models: q4 weights + KV cache per billion parameters
+GB_PER_BILLION_PARAMS = 0.65
+UNKNOWN_MODEL_GB = 5.0
+
+# Memory Ollama may use for resident models (override with --memory-gb)
+DEFAULT_MEMORY_GB = 24.0
+
+
+def model_name(llm) -> Optional[str]:
+    if llm is None:
+        return None
+    return str(getattr(llm, "model", llm)).strip()
+
+
+def model_size_gb(model: str) -> float:
+    """
+    Resident memory of a model; cloud models are not loaded locally.
+    """
+    model = model.strip()
+    if model.endswith("-cloud") or ":cloud" in model:
+        return 0.0
+    if model in MODEL_SIZES_GB:
+        return MODEL_SIZES_GB[model]
+    params = re.search(r"(\d+(?:\.\d+)?)b\b", model.split(":")[-1])
+    return float(params.group(1)) * GB_PER_BILLION_PARAMS if params else UNKNOWN_MODEL_GB
+
+
+class Residency:
+    """
+    Least-recently-used model residency under a memory budget, the way the
+    Ollama server evicts models when a new one does not fit.
+    """
+
+    def __init__(self, memory_gb: float):
+        self.memory_gb = memory_gb
+        self.loaded: List[str] = []
+
+    def use(self, model: Optional[str]) -> bool:
+        """
+        Marks model as used; returns True if it had to be loaded.
+        """
+        if model is None or model_size_gb(model) == 0:
+            return False
+        if model in self.loaded:
+            self.loaded.remove(model)
+            self.loaded.append(model)
+            return False
+        size = model_size_gb(model)
+        while self.loaded and sum(model_size_gb(m) for m in self.loaded) + size > self.memory_gb:
+            self.loaded.pop(0)
+        self.loaded.append(model)
+        return True
+
+
+def count_loads(models: Sequence[Optional[str]], memory_gb: float) -> int:
+    residency = Residency(memory_gb)
+    return sum(1 for model in models if residency.use(model))
+
+# ---------------------------------------------------------
+# BATCH SCHEDULER
+# ---------------------------------------------------------
+@dataclass
+class Stage:
+    name: str
+    llm: object                                 # model used by this stage (None = local work)
+    run: Callable[[object, object], object]     # (item, previous stage result) → result
+
+
+@dataclass
+class ScheduleReport:
+    items: int = 0
+    order: str = "item-major"
+    memory_gb: float = DEFAULT_MEMORY_GB
+    loads_interleaved: int = 0
+    loads_scheduled: int = 0
+    resident: List[str] = field(default_factory=list)
+    unloaded: List[str] = field(default_factory=list)   # freed with keep_alive=0 after their stage
+
+    @property
+    def swaps_avoided(self) -> int:
+        return self.loads_interleaved - self.loads_scheduled
+
+    def summary(self) -> str:
+        # Loads are simulated from MODEL_SIZES_GB and --memory-gb, not read from Ollama
+        lines = [f"🔁 {self.items} item(s), {self.order} order: ~{self.loads_scheduled} model load(s) "
+                 f"instead of ~{self.loads_interleaved} (estimated {self.swaps_avoided} swap(s) avoided, "
+                 f"budget {self.memory_gb:g} GB)"]
+        if self.unloaded:
+            lines.append(f"   Unloaded after their stage: {', '.join(self.unloaded)}")
+        if self.order == "stage-major":
+            lines.append("   Ollama also evicts when OLLAMA_MAX_LOADED_MODELS is reached; "
+                         "keep it and --memory-gb in line with the server")
+        return "\n".join(lines)
+
+
+class ModelScheduler:
+    """
+    Runs a multi-stage pipeline over a batch of items so local models are
+    swapped as rarely as possible.
+
+    If every local model of the pipeline fits in the memory budget at once,
+    items run one after another (item-major) and finish progressively.
+    Otherwise all calls of a stage run before the next stage starts
+    (stage-major), so each model is loaded once per batch instead of once
+    per item; with unload given, a local model no later stage uses is
+    freed (keep_alive=0) right after its stage instead of waiting for
+    Ollama to evict it.
+    """
+
+    def __init__(self, memory_gb: float = DEFAULT_MEMORY_GB,
+                 unload: Optional[Callable[[str], object]] = None):
+        self.memory_gb = memory_gb
+        self.unload = unload
+
+    def fits_together(self, stages: Sequence[Stage]) -> bool:
+        models = {model_name(s.llm) for s in stages if s.llm is not None}
+        return sum(model_size_gb(m) for m in models) <= self.memory_gb
+
+    def plan(self, item_count: int, stages: Sequence[Stage]) -> Tuple[str, List[Tuple[int, int]]]:
+        """
+        (order name, [(stage index, item index), ...]) respecting stage order per item.
+        """
+        if self.fits_together(stages):
+            return "item-major", [(s, i) for i in range(item_count) for s in range(len(stages))]
+        return "stage-major", [(s, i) for s in range(len(stages)) for i in range(item_count)]
+
+    def _finish_stage(self, stages: Sequence[Stage], stage_index: int, residency: Residency) -> Optional[str]:
+        model = model_name(stages[stage_index].llm)
+        if self.unload is None or model is None or model_size_gb(model) == 0:
+            return None
+        if any(model_name(s.llm) == model for s in stages[stage_index + 1:]):
+            return None
+        self.unload(model)
+        if model in residency.loaded:
+            residency.loaded.remove(model)
+        return model
+
+    def run(self, items: Sequence, stages: Sequence[Stage]) -> Tuple[list, ScheduleReport]:
+        order, calls = self.plan(len(items), stages)
+        interleaved = [model_name(stages[s].llm) for i in range(len(items)) for s in range(len(stages))]
+
+        residency = Residency(self.memory_gb)
+        results = [None] * len(items)
+        unloaded = []
+        for position, (stage_index, item_index) in enumerate(calls):
+            stage = stages[stage_index]
+            residency.use(model_name(stage.llm))
+            results[item_index] = stage.run(items[item_index], results[item_index])
+
+            last_of_stage = position + 1 == len(calls) or calls[position + 1][0] != stage_index
+            if order == "stage-major" and last_of_stage:
+                model = self._finish_stage(stages, stage_index, residency)
+                if model:
+                    unloaded.append(model)
+
+        report = ScheduleReport(
+            items=len(items),
+            order=order,
+            memory_gb=self.memory_gb,
+            loads_interleaved=count_loads(interleaved, self.memory_gb),
+            loads_scheduled=count_loads([model_name(stages[s].llm) for s, _ in calls], self.memory_gb),
+            resident=list(residency.loaded),
+            unloaded=unloaded
+        )
+        return results, report
@@ -0,0 +1,333 @@
+# file: ollama_hosts.py
+
+import copy
+import json
+import os
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from langchain_core.runnables import Runnable
+from langchain_ollama import ChatOllama
+
+from Common.profiling import PROFILER
+from Common.token_budget import context_window
+
+# ---------------------------------------------------------
+# CONFIGURATION
+# ---------------------------------------------------------
+
+# Comma separated Ollama servers, e.g.
+#   OLLAMA_HOSTS=http://gpu1:11434,http://gpu2:11434
+# Unset → a single server (OLLAMA_HOST or http://localhost:11434), as before
+HOSTS_ENV = "OLLAMA_HOSTS"
+DEFAULT_HOST = "http://localhost:11434"
+
+HEALTH_TIMEOUT = 2.0           # seconds for GET /api/tags
+HEALTH_INTERVAL = 60.0         # healthy hosts are checked again after this
+RECHECK_SECONDS = 15.0         # unhealthy hosts are probed again after this
+
+# Errors that mean the host is unreachable or broken, not that the request was bad
+FAILOVER_ERRORS = {"ConnectError", "ConnectTimeout", "ReadTimeout", "RemoteProtocolError",
+                   "ConnectionError", "ConnectionRefusedError", "ConnectionResetError"}
+FAILOVER_STATUS = {502, 503, 504}
+
+
+def normalize_url(url: str) -> str:
+    url = url.strip().rstrip("/")
+    if not url.startswith(("http://", "https://")):
+        url = "http://" + url
+    if url.count(":") < 2:
+        url += ":11434"
+    return url
+
+
+def configured_hosts() -> List[str]:
+    value = os.environ.get(HOSTS_ENV, "")
+    hosts = [normalize_url(h) for h in value.split(",") if h.strip()]
+    return list(dict.fromkeys(hosts)) or [normalize_url(os.environ.get("OLLAMA_HOST") or DEFAULT_HOST)]
+
+
+def is_host_failure(error: Exception) -> bool:
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    if any(type(e).__name__ in FAILOVER_ERRORS for e in (error, error.__cause__, error.__context__) if e):
+        return True
+    return getattr(error, "status_code", None) in FAILOVER_STATUS
+
+# ---------------------------------------------------------
+# HOST STATE
+# ---------------------------------------------------------
+class Host:
+    def __init__(self, url: str):
+        self.url = url
+        self.healthy = True
+        self.models: Optional[set] = None      # from /api/tags, None until checked
+        self.checked = 0.0
+        self.outstanding = 0
+        self.stats = {"requests": 0, "failures": 0, "failovers": 0, "seconds": 0.0, "peak_outstanding": 0}
+
+    def serves(self, model: str) -> bool:
+        return self.models is None or model in self.models
+
+    def snapshot(self) -> dict:
+        requests = self.stats["requests"]
+        return dict(self.stats, url=self.url, healthy=self.healthy, outstanding=self.outstanding,
+                    seconds=round(self.stats["seconds"], 2),
+                    average_seconds=round(self.stats["seconds"] / requests, 2) if requests else None)
+
+
+def probe(url: str, timeout: float = HEALTH_TIMEOUT) -> Optional[set]:
+    """
+    Models a server has (GET /api/tags), or None if it does not answer.
+    """
+    try:
+        with urllib.request.urlopen(f"{url}/api/tags", timeout=timeout) as response:
+            data = json.loads(response.read().decode("utf-8"))
+    except Exception:
+        return None
+    names = set()
+    for model in data.get("models", []):
+        for key in ("name", "model"):
+            if model.get(key):
+                names.add(model[key])
+                names.add(model[key].removesuffix(":latest"))
+    return names
+
+# ---------------------------------------------------------
+# POOL (least outstanding requests, health checks, failover)
+# ---------------------------------------------------------
+class HostPool:
+    """
+    Spreads requests over several Ollama servers. Each request goes to the
+    healthy host with the fewest requests in flight (ties → fewest served)
+    that has the model; a host that refuses connections or answers 502-504
+    is marked down and the request moves to the next one. Down hosts are
+    probed again after RECHECK_SECONDS.
+    """
+
+    def __init__(self, urls: List[str]):
+        self.hosts = [Host(normalize_url(u)) for u in dict.fromkeys(urls)]
+        self._lock = threading.Lock()
+        self._check_lock = threading.Lock()
+        self._checked = False
+
+    def __len__(self) -> int:
+        return len(self.hosts)
+
+    def check(self, hosts: Optional[List[Host]] = None):
+        hosts = hosts if hosts is not None else self.hosts
+        with ThreadPoolExecutor(max_workers=max(1, len(hosts))) as executor:
+            results = list(executor.map(lambda h: probe(h.url), hosts))
+        now = time.monotonic()
+        with self._lock:
+            for host, models in zip(hosts, results):
+                host.checked = now
+                host.healthy = models is not None
+                if models is not None:
+                    host.models = models
+            self._checked = True
+
+    def _due(self) -> List[Host]:
+        now = time.monotonic()
+        return [h for h in self.hosts
+                if now - h.checked > (HEALTH_INTERVAL if h.healthy else RECHECK_SECONDS)]
+
+    def _pick(self, model: str, exclude: set) -> Optional[Host]:
+        usable = [h for h in self.hosts if h.healthy and h.url not in exclude]
+        # Only hosts that have the model, unless none of them lists it
+        serving = [h for h in usable if h.serves(model)] or usable
+        if not serving:
+            return None
+        return min(serving, key=lambda h: (h.outstanding, h.stats["requests"]))
+
+    def _refresh(self):
+        # First check blocks, later ones run in the background
+        if not self._checked:
+            with self._check_lock:
+                if not self._checked:
+                    self.check()
+            return
+        due = self._due()
+        if due and self._check_lock.acquire(blocking=False):
+            for host in due:
+                host.checked = time.monotonic()
+
+            def run():
+                try:
+                    self.check(due)
+                finally:
+                    self._check_lock.release()
+            threading.Thread(target=run, daemon=True).start()
+
+    def _claim(self, model: str, exclude: set) -> Optional[Host]:
+        with self._lock:
+            host = self._pick(model, exclude)
+            if host is not None:
+                host.outstanding += 1
+                host.stats["peak_outstanding"] = max(host.stats["peak_outstanding"], host.outstanding)
+            return host
+
+    @contextmanager
+    def acquire(self, model: str, exclude: set):
+        self._refresh()
+        host = self._claim(model, exclude)
+        if host is None:
+            # Everything left is marked down: probe it now before giving up
+            self.check([h for h in self.hosts if h.url not in exclude])
+            host = self._claim(model, exclude)
+        if host is None:
+            tried = ", ".join(sorted(exclude)) or "none reachable"
+            raise ConnectionError(f"No healthy Ollama host for {model} (tried: {tried})")
+        start = time.perf_counter()
+        try:
+            yield host
+        finally:
+            with self._lock:
+                host.outstanding -= 1
+                host.stats["requests"] += 1
+                host.stats["seconds"] += time.perf_counter() - start
+
+    def mark_down(self, host: Host, failover: bool = False):
+        with self._lock:
+            host.healthy = False
+            host.checked = time.monotonic()
+            host.stats["failures"] += 1
+            if failover:
+                host.stats["failovers"] += 1
+
+    def summary(self) -> List[dict]:
+        return [h.snapshot() for h in self.hosts]
+
+
+_pool: Optional[HostPool] = None
+_pool_lock = threading.Lock()
+
+
+def host_pool() -> HostPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HostPool(configured_hosts())
+        return _pool
+
+# ---------------------------------------------------------
+# MODEL WRAPPER
+# ---------------------------------------------------------
+class PooledModel(Runnable):
+    """
+    Chat model over the host pool: one ChatOllama per host, invoke() picks
+    a host per request and fails over to the others. A Runnable, so it also
+    works in prompt | llm chains; other attributes pass through to the
+    first host's instance.
+    """
+
+    def __init__(self, pool: HostPool, **kwargs):
+        self.pool = pool
+        self.kwargs = kwargs
+        self.model = kwargs["model"]
+        self._llms: Dict[str, ChatOllama] = {}
+
+    def _llm(self, host: Host) -> ChatOllama:
+        if host.url not in self._llms:
+            self._llms[host.url] = ChatOllama(base_url=host.url, **self.kwargs)
+        return self._llms[host.url]
+
+    def __getattr__(self, name):
+        # Only called for missing attributes; copy/pickle probe before
+        # __init__ ran, when pool itself is missing and would recurse
+        if name.startswith("_") or name in ("pool", "kwargs", "model"):
+            raise AttributeError(name)
+        return getattr(self._llm(self.pool.hosts[0]), name)
+
+    def __deepcopy__(self, memo):
+        # The host pool (and its lock) is shared process-wide, not copied
+        return PooledModel(self.pool, **copy.deepcopy(self.kwargs, memo))
+
+    def invoke(self, input, config=None, **kwargs):
+        tried = set()
+        while True:
+            with self.pool.acquire(str(self.model).strip(), tried) as host:
+                try:
+                    return self._llm(host).invoke(input, config, **kwargs)
+                except Exception as e:
+                    if not is_host_failure(e):
+                        raise
+                    self.pool.mark_down(host, failover=True)
+                    tried.add(host.url)
+                    print(f"🔀 {host.url} failed for {self.model} ({type(e).__name__}), trying another host")
+
+
+def is_cloud_model(model: str) -> bool:
+    model = model.strip()
+    return model.endswith("-cloud") or ":cloud" in model
+
+
+def chat_model(**kwargs):
+    """
+    ChatOllama for a single server (an explicit base_url or no OLLAMA_HOSTS),
+    otherwise a PooledModel over every configured server. Local models get
+    num_ctx from MODEL_CONTEXT_WINDOWS, the window ContextBudget plans for;
+    Ollama's smaller default would silently cut planned prompts.
+    """
+    if not is_cloud_model(str(kwargs["model"])) and kwargs.get("num_ctx") is None:
+        kwargs["num_ctx"] = context_window(str(kwargs["model"]))
+    if kwargs.get("base_url"):
+        return ChatOllama(**kwargs)
+    pool = host_pool()
+    if len(pool) == 1:
+        return ChatOllama(**kwargs) if not os.environ.get(HOSTS_ENV) else ChatOllama(base_url=pool.hosts[0].url, **kwargs)
+    return PooledModel(pool, **kwargs)
+
+
+def host_count() -> int:
+    return len(host_pool())
+
+
+def unload_model(model: str, timeout: float = 30.0) -> int:
+    """
+    Frees a local model on every configured host now (keep_alive=0)
+    instead of after Ollama's idle timeout; returns the hosts that answered.
+    """
+    body = json.dumps({"model": model.strip(), "keep_alive": 0}).encode("utf-8")
+    unloaded = 0
+    for host in host_pool().hosts:
+        request = urllib.request.Request(f"{host.url}/api/generate", data=body,
+                                         headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout):
+                unloaded += 1
+        except Exception:
+            continue
+    return unloaded
+
+# ---------------------------------------------------------
+# METRICS
+# ---------------------------------------------------------
+def format_hosts() -> str:
+    """
+    Console summary of the pool; also stored in the --profile report.
+    """
+    pool = host_pool()
+    summary = pool.summary()
+    PROFILER.metrics["hosts"] = summary
+    lines = [f"🖧 Ollama hosts ({len(pool)}):"]
+    for s in summary:
+        state = "up" if s["healthy"] else "DOWN"
+        lines.append(f"  {s['url']:<28} {state:<4} {s['requests']} requests, peak {s['peak_outstanding']} in flight, "
+                     f"{s['failovers']} failovers, avg {s['average_seconds'] or 0:.1f}s")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # python -m Common.ollama_hosts → health of every configured host
+    pool = host_pool()
+    pool.check()
+    for host in pool.hosts:
+        if host.healthy:
+            print(f"✅ {host.url}: {len(host.models or [])} model(s) {', '.join(sorted(host.models or []))}")
+        else:
+            print(f"❌ {host.url}: not reachable")
@@ -0,0 +1,111 @@
+# file: ollama_stand_in.py
+
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ---------------------------------------------------------
+# STAND-IN OLLAMA SERVER (local testing of the host pool)
+# ---------------------------------------------------------
+# Answers /api/tags, /api/version and /api/chat like Ollama, with a fixed
+# delay and a limited number of parallel requests, so several of them on
+# different ports behave like a pool of slow GPU machines:
+#
+#   python -m Common.ollama_stand_in --ports 11435 11436 11437 --delay 2
+#   OLLAMA_HOSTS=localhost:11435,localhost:11436,localhost:11437 python CreateSteps/...
+
+DEFAULT_MODELS = ["gpt-oss:120b-cloud", "deepseek-v3.1:671b-cloud", "qwen2.5", "gemma3:12b", "llama3.2"]
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def make_handler(port: int, models, delay: float, parallel: int):
+    slots = threading.Semaphore(parallel)
+    served = {"requests": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def _json(self, data: dict, status: int = 200):
+            body = json.dumps(data).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/api/tags":
+                self._json({"models": [{"name": m, "model": m} for m in models]})
+            elif self.path == "/api/version":
+                self._json({"version": "stand-in"})
+            else:
+                self._json({"error": "not found"}, 404)
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.end_headers()
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if self.path != "/api/chat":
+                return self._json({"error": "not found"}, 404)
+
+            with slots:   # like OLLAMA_NUM_PARALLEL: further requests queue
+                time.sleep(delay)
+                served["requests"] += 1
+            content = "{}" if request.get("format") else f"Stand-in answer {served['requests']} from port {port}"
+            message = {"model": request.get("model"), "created_at": _now(),
+                       "message": {"role": "assistant", "content": content}}
+            final = {"done": True, "done_reason": "stop", "total_duration": int(delay * 1e9),
+                     "prompt_eval_count": len(json.dumps(request.get("messages", []))) // 4,
+                     "eval_count": len(content) // 4}
+
+            if request.get("stream", True) is False:
+                return self._json(dict(message, **final))
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            for chunk in (dict(message, done=False),
+                          dict(message, message={"role": "assistant", "content": ""}, **final)):
+                self.wfile.write((json.dumps(chunk) + "\n").encode("utf-8"))
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(ports, models, delay: float, parallel: int):
+    servers = []
+    for port in ports:
+        server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(port, models, delay, parallel))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        print(f"🧪 Stand-in Ollama on http://localhost:{port} ({parallel} parallel, {delay}s per request)")
+    return servers
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Stand-in Ollama servers for testing the OLLAMA_HOSTS pool.")
+    parser.add_argument("--ports", nargs="+", type=int, default=[11435, 11436], help="One server per port")
+    parser.add_argument("--delay", type=float, default=1.0, help="Seconds per chat request")
+    parser.add_argument("--parallel", type=int, default=2, help="Requests answered at once per server")
+    parser.add_argument("--models", nargs="+", default=DEFAULT_MODELS, help="Models listed by /api/tags")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    servers = serve(args.ports, args.models, args.delay, args.parallel)
+    print("Stop a port's process (or Ctrl+C) to test failover.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for server in servers:
+            server.shutdown()
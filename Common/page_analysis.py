@@ -0,0 +1,134 @@
+# file: page_analysis.py
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Optional
+
+from Common.structured_output import (
+    JSON_OUTPUT_RULES, PAGE_ANALYSIS_SCHEMA, merge_structured, parse_json_output, render_page_analysis
+)
+from Common.token_budget import ContextBudget
+
+# ---------------------------------------------------------
+# PATHS
+# ---------------------------------------------------------
+POM_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "CreatePomPattern")
+
+# One <sha256>.json per analyzed page and model, shared by the BDD and POM generators
+ANALYSIS_DIR = os.path.join(POM_DIR, "Output", "PageAnalysis")
+
+# Bump when the prompt or schema changes so cached analyses are rebuilt
+ANALYSIS_VERSION = "1"
+
+# ---------------------------------------------------------
+# PROMPT (covers what both generators need from a page)
+# ---------------------------------------------------------
+PAGE_ANALYSIS_PROMPT = """
+You are a Senior QA Automation Architect.
+
+Analyze the following page input once for two consumers:
+a Page Object generator and a BDD scenario generator.
+
+RULES:
+- DO NOT generate code, locators or Gherkin
+- DO NOT explain
+- DO NOT invent functionality
+
+OUTPUT ONLY:
+- page / purpose: page name and business intent
+- elements: semantic elements users see and interact with (inputs, buttons, links, messages)
+- actions: allowed navigation, action and composite methods
+- verifications: allowed verification methods
+- flows: valid interaction flows, invalid and edge-case behaviors
+""" + JSON_OUTPUT_RULES + """
+MODE:
+{mode}
+
+PAGE CONTENT:
+{page}
+"""
+
+# ---------------------------------------------------------
+# CACHE
+# ---------------------------------------------------------
+def page_hash(page_text: str, model: str) -> str:
+    # The model is part of the key: an analysis from a small routed model
+    # must not stand in for the full-size one another generator asks for
+    normalized = "\n".join(line.rstrip() for line in page_text.strip().splitlines())
+    return hashlib.sha256(f"{ANALYSIS_VERSION}\n{str(model).strip()}\n{normalized}".encode("utf-8")).hexdigest()
+
+
+def cached_analysis_path(page_text: str, model: str) -> str:
+    return os.path.join(ANALYSIS_DIR, f"{page_hash(page_text, model)}.json")
+
+
+def load_cached_analysis(page_text: str, model: str) -> Optional[dict]:
+    path = cached_analysis_path(page_text, model)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("analysis")
+
+
+def save_analysis(page_text: str, analysis: dict, model: str) -> str:
+    os.makedirs(ANALYSIS_DIR, exist_ok=True)
+    path = cached_analysis_path(page_text, model)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "version": ANALYSIS_VERSION,
+            "model": str(model).strip(),
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "analysis": analysis,
+        }, f, indent=2)
+    return path
+
+# ---------------------------------------------------------
+# ANALYSIS
+# ---------------------------------------------------------
+def analyze_page(page_text: str, llm, mode: str = "HTML mode", refresh: bool = False,
+                 shared_model: Optional[str] = None) -> str:
+    """
+    Rendered page analysis for the second stage of a generator.
+
+    The structured analysis is computed once per page content and model and
+    stored in ANALYSIS_DIR, so the BDD and POM generators (and reruns) share
+    a single model call per page. An analysis by shared_model (the full-size
+    analyzer both generators use) is preferred over one by llm's own model.
+    llm should be created with format=PAGE_ANALYSIS_SCHEMA. Answers that
+    are not valid JSON are returned as text and not cached.
+    """
+    if not refresh:
+        for model in dict.fromkeys(m for m in (shared_model, llm.model) if m):
+            cached = load_cached_analysis(page_text, model)
+            if cached is not None:
+                print(f"♻️ Reusing page analysis {page_hash(page_text, model)[:12]} ({str(model).strip()})")
+                return render_page_analysis(merge_structured([cached], PAGE_ANALYSIS_SCHEMA))
+
+    # Chunked by the model's context window; chunk answers are merged
+    budget = ContextBudget(llm.model, PAGE_ANALYSIS_PROMPT)
+    parsed, raw, models = [], [], set()
+    for inputs in budget.plan({"page": page_text}, "page"):
+        response = llm.invoke(PAGE_ANALYSIS_PROMPT.format(mode=mode, **inputs))
+        # Routed models report which model actually answered
+        models.add(str(getattr(response, "model", None) or llm.model).strip())
+        output = response.content
+        data = parse_json_output(output)
+        if data is None:
+            raw.append(output.strip())
+        else:
+            parsed.append(data)
+
+    if raw:
+        # Not machine-readable: use as is, but do not cache
+        parts = [render_page_analysis(merge_structured(parsed, PAGE_ANALYSIS_SCHEMA))] if parsed else []
+        return "\n\n".join(parts + raw)
+
+    analysis = merge_structured(parsed, PAGE_ANALYSIS_SCHEMA)
+    if len(models) != 1:
+        # Chunks answered by different routed models: not one model's analysis
+        return render_page_analysis(analysis)
+    path = save_analysis(page_text, analysis, models.pop())
+    print(f"💾 Page analysis saved to: {path}")
+    return render_page_analysis(analysis)
@@ -0,0 +1,77 @@
+# file: page_manager.py
+
+import os
+import re
+from typing import List, Optional
+
+# ---------------------------------------------------------
+# CONFIGURATION
+# ---------------------------------------------------------
+PAGE_MANAGER_FILE = "PageManager.ts"
+
+# Page objects are classes constructed from a Playwright page
+PAGE_CLASS = re.compile(r"export\s+class\s+(\w+)[^{]*\{.*?constructor\s*\(\s*page\s*:\s*Page\s*\)", re.DOTALL)
+
+# ---------------------------------------------------------
+# DISCOVERY
+# ---------------------------------------------------------
+def find_page_classes(output_dir: str) -> List[tuple]:
+    """
+    (class name, module file name) of every page object in output_dir.
+    """
+    pages = []
+    for file_name in sorted(os.listdir(output_dir)):
+        if not file_name.endswith(".ts") or file_name == PAGE_MANAGER_FILE:
+            continue
+        with open(os.path.join(output_dir, file_name), "r", encoding="utf-8") as f:
+            code = f.read()
+        for match in PAGE_CLASS.finditer(code):
+            if match.group(1) != "PageManager":
+                pages.append((match.group(1), os.path.splitext(file_name)[0]))
+    return pages
+
+# ---------------------------------------------------------
+# RENDERING
+# ---------------------------------------------------------
+def _field_name(class_name: str) -> str:
+    return class_name[0].lower() + class_name[1:]
+
+
+def render_page_manager(pages: List[tuple]) -> str:
+    """
+    PageManager that creates each page object on first access and returns
+    the cached instance afterwards, so steps calling getPageX() repeatedly
+    do not rebuild page objects and their locators.
+    """
+    lines = ["import { Page } from '@playwright/test';"]
+    lines.extend(f"import {{ {name} }} from './{module}';" for name, module in pages)
+    lines.append("")
+    lines.append("export class PageManager {")
+    lines.append("    private readonly page: Page;")
+    lines.extend(f"    private {_field_name(name)}?: {name};" for name, _ in pages)
+    lines.append("")
+    lines.append("    constructor(page: Page) {")
+    lines.append("        this.page = page;")
+    lines.append("    }")
+    for name, _ in pages:
+        lines.append("")
+        lines.append(f"    get{name}(): {name} {{")
+        lines.append(f"        return this.{_field_name(name)} ??= new {name}(this.page);")
+        lines.append("    }")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def write_page_manager(output_dir: str, class_names: Optional[List[str]] = None) -> str:
+    """
+    Regenerates PageManager.ts in output_dir, registering every page object
+    found there plus class_names (module assumed to be ./<ClassName>).
+    """
+    pages = find_page_classes(output_dir)
+    known = {name for name, _ in pages}
+    pages.extend((name, name) for name in class_names or [] if name not in known)
+
+    path = os.path.join(output_dir, PAGE_MANAGER_FILE)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(render_page_manager(pages))
+    return path
@@ -0,0 +1,137 @@
+# file: pdf_extractor.py
+
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:  # pypdf is optional, Unstructured remains the fallback
+    PdfReader = None
+    PdfWriter = None
+
+# ---------------------------------------------------------
+# CONFIGURATION
+# ---------------------------------------------------------
+
+# Pages with less extracted text than this are treated as image-only
+MIN_TEXT_CHARS = 20
+
+# Below this page count a process pool costs more than it saves
+MIN_PAGES_FOR_POOL = 4
+
+DEFAULT_LANGUAGES = ("eng",)
+
+# ---------------------------------------------------------
+# UNSTRUCTURED / OCR FALLBACK
+# ---------------------------------------------------------
+def _load_with_unstructured(path: str, languages) -> list:
+    from langchain_community.document_loaders import UnstructuredPDFLoader
+
+    loader = UnstructuredPDFLoader(
+        file_path=path,
+        mode="paged",
+        languages=list(languages)
+    )
+    return [doc.page_content.strip() for doc in loader.load()]
+
+
+def _ocr_single_page(reader, index: int, languages) -> str:
+    # Unstructured works on whole files, so isolate the page first
+    writer = PdfWriter()
+    writer.add_page(reader.pages[index])
+
+    fd, tmp_path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            writer.write(f)
+        return "\n\n".join(_load_with_unstructured(tmp_path, languages))
+    finally:
+        os.remove(tmp_path)
+
+# ---------------------------------------------------------
+# PER-PAGE WORKER
+# ---------------------------------------------------------
+_worker_reader = None
+_worker_languages = DEFAULT_LANGUAGES
+
+
+def _init_worker(path: str, languages) -> None:
+    global _worker_reader, _worker_languages
+    _worker_reader = PdfReader(path)
+    _worker_languages = languages
+
+
+def _extract_page(index: int) -> str:
+    return _extract_from_reader(_worker_reader, index, _worker_languages)
+
+
+def _extract_from_reader(reader, index: int, languages) -> str:
+    text = (reader.pages[index].extract_text() or "").strip()
+    if len(text) >= MIN_TEXT_CHARS:
+        return text
+    # Image-only (scanned) page → OCR through Unstructured
+    return _ocr_single_page(reader, index, languages)
+
+# ---------------------------------------------------------
+# PUBLIC API
+# ---------------------------------------------------------
+def iter_pdf_pages(path: str, workers: Optional[int] = None,
+                   languages=DEFAULT_LANGUAGES) -> Iterator[str]:
+    """
+    Lazily yields the text of each PDF page, in page order.
+
+    The embedded text layer is read directly; only pages without one are
+    sent through Unstructured OCR. Larger documents are split across a
+    process pool, and pages are yielded as soon as they are ready so the
+    caller can start chunking before the whole document is parsed.
+    Stopping iteration early cancels the remaining pages.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Missing PDF file: {path}")
+
+    if PdfReader is None:
+        yield from _load_with_unstructured(path, languages)
+        return
+
+    reader = PdfReader(path)
+    page_count = len(reader.pages)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or page_count < MIN_PAGES_FOR_POOL:
+        for index in range(page_count):
+            yield _extract_from_reader(reader, index, languages)
+        return
+
+    executor = ProcessPoolExecutor(
+        max_workers=min(workers, page_count),
+        initializer=_init_worker,
+        initargs=(path, tuple(languages))
+    )
+    try:
+        yield from executor.map(_extract_page, range(page_count))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def read_pdf_text(path: str, max_chars: Optional[int] = None, **kwargs) -> str:
+    """
+    Joins page texts, stopping page extraction once max_chars is reached.
+    """
+    parts = []
+    size = 0
+    pages = iter_pdf_pages(path, **kwargs)
+    try:
+        for text in pages:
+            if not text:
+                continue
+            parts.append(text)
+            size += len(text) + 2
+            if max_chars is not None and size >= max_chars:
+                break
+    finally:
+        pages.close()
+
+    raw_text = "\n\n".join(parts)
+    return raw_text[:max_chars] if max_chars is not None else raw_text
@@ -0,0 +1,242 @@
+# file: pom_patch.py
+
+import re
+import textwrap
+from typing import List, Tuple
+
+from Common.structured_output import conform, parse_json_output
+from Common.typescript_pom import FIELD_DECL, LOCATOR_ASSIGN, PomClass, parse_pom_classes
+
+# ---------------------------------------------------------
+# EDIT LIST SCHEMA (refine model output)
+# ---------------------------------------------------------
+EDIT_OPERATIONS = [
+    "replace_method",   # target = method name, code = complete new method
+    "add_method",       # code = complete new method
+    "remove_method",    # target = method name
+    "rename_method",    # target → new_name, call sites included
+    "replace_locator",  # target = locator name, code = new page.* expression
+    "add_locator",      # target = locator name, code = page.* expression
+    "remove_locator",   # target = locator name
+    "rename_locator",   # target → new_name, usages included
+]
+
+POM_EDIT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "edits": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "op": {"type": "string", "enum": EDIT_OPERATIONS},
+                    "target": {"type": "string"},
+                    "new_name": {"type": "string"},
+                    "code": {"type": "string"},
+                },
+                "required": ["op", "target"],
+            },
+        },
+    },
+    "required": ["edits"],
+}
+
+EDIT_RULES = """
+Return ONLY JSON: an "edits" list applied in order to the draft class.
+Operations:
+- replace_method: target = method name, code = the complete corrected method
+- add_method: target = method name, code = the complete new method
+- remove_method / remove_locator: target = name
+- rename_method / rename_locator: target = old name, new_name = new name (usages are renamed too)
+- replace_locator / add_locator: target = locator name, code = the page.* expression only
+Only list changes that are needed. Return an empty edits list if the draft already complies.
+"""
+
+
+class PatchError(ValueError):
+    pass
+
+# ---------------------------------------------------------
+# HELPERS
+# ---------------------------------------------------------
+def extract_code(text: str) -> str:
+    """
+    Code inside the first markdown fence, or the text itself.
+    """
+    fenced = re.search(r"```[\w-]*\n(.*?)```", text, re.DOTALL)
+    return (fenced.group(1) if fenced else text).strip()
+
+
+def _single_class(code: str) -> PomClass:
+    classes = parse_pom_classes(code)
+    if len(classes) != 1:
+        raise PatchError(f"expected one class, found {len(classes)}")
+    return classes[0]
+
+
+def _indent_like(code: str, indent: str) -> str:
+    code = textwrap.dedent(extract_code(code).strip("\n"))
+    return "\n".join(indent + line if line.strip() else "" for line in code.splitlines())
+
+
+def _method_span(code: str, pom: PomClass, name: str) -> Tuple[int, int, str]:
+    method = pom.method(name)
+    if method is None:
+        raise PatchError(f"method {name} not found")
+    start = code.find(method.source)
+    if start < 0:
+        raise PatchError(f"method {name} not located")
+    indent = re.match(r"[ \t]*", method.source).group(0)
+    return start, start + len(method.source), indent
+
+
+def _member_indent(code: str, pom: PomClass) -> str:
+    if pom.methods:
+        return re.match(r"[ \t]*", pom.methods[-1].source).group(0)
+    return "    "
+
+
+def _class_end(code: str, pom: PomClass) -> int:
+    start = code.find(pom.source)
+    return start + len(pom.source) - 1   # index of the closing brace
+
+
+def _rename(code: str, old: str, new: str, member: str) -> str:
+    if not new or not re.fullmatch(r"[A-Za-z_$][\w$]*", new):
+        raise PatchError(f"invalid new name for {old}: {new!r}")
+    code = re.sub(rf"\bthis\.{re.escape(old)}\b", f"this.{new}", code)
+    modifiers = r"(?:(?:private|protected|public|readonly|static|async)\s+)*"
+    suffix = r"\s*\(" if member == "method" else r"\s*[:!?]"
+    return re.sub(rf"^([ \t]*{modifiers}){re.escape(old)}(?={suffix})", rf"\g<1>{new}", code, flags=re.MULTILINE)
+
+
+def _locator_assignment(code: str, name: str):
+    return next((m for m in LOCATOR_ASSIGN.finditer(code) if m.group(1) == name), None)
+
+
+def _field_declaration(code: str, name: str):
+    return re.search(
+        rf"^[ \t]*(?:(?:private|protected|public|readonly)\s+)*{re.escape(name)}\s*[!?]?\s*:[^;\n]+;[ \t]*\n?",
+        code, re.MULTILINE
+    )
+
+
+def _check_unreferenced(code: str, name: str):
+    if re.search(rf"\bthis\.{re.escape(name)}\b", code):
+        raise PatchError(f"{name} removed but still used")
+
+# ---------------------------------------------------------
+# APPLY
+# ---------------------------------------------------------
+def _apply_edit(code: str, edit: dict) -> str:
+    op, target, new_name, body = edit["op"], edit["target"], edit["new_name"], edit["code"]
+    pom = _single_class(code)
+
+    if op == "replace_method":
+        start, end, indent = _method_span(code, pom, target)
+        if not body:
+            raise PatchError(f"no code for {target}")
+        return code[:start] + _indent_like(body, indent) + code[end:]
+
+    if op == "add_method":
+        if not body:
+            raise PatchError(f"no code for {target}")
+        if target and pom.method(target):
+            return _apply_edit(code, dict(edit, op="replace_method"))
+        end = _class_end(code, pom)
+        before = code[:end].rstrip()
+        return before + "\n\n" + _indent_like(body, _member_indent(code, pom)) + "\n" + code[end:]
+
+    if op == "remove_method":
+        start, end, _ = _method_span(code, pom, target)
+        line_start = code.rfind("\n", 0, start) + 1
+        code = code[:line_start].rstrip(" \t").rstrip("\n") + "\n" + code[end:].lstrip("\n")
+        _check_unreferenced(code, target)
+        return code
+
+    if op == "rename_method":
+        if pom.method(target) is None:
+            raise PatchError(f"method {target} not found")
+        return _rename(code, target, new_name, "method")
+
+    if op == "rename_locator":
+        if target not in pom.locators and target not in pom.fields:
+            raise PatchError(f"locator {target} not found")
+        return _rename(code, target, new_name, "locator")
+
+    if op == "replace_locator":
+        assignment = _locator_assignment(code, target)
+        if assignment is None:
+            raise PatchError(f"locator {target} not found")
+        expression = extract_code(body).rstrip(";").strip()
+        if not expression.startswith("page."):
+            raise PatchError(f"not a page locator expression: {expression!r}")
+        return code[:assignment.start(2)] + expression + code[assignment.end(2):]
+
+    if op == "remove_locator":
+        assignment = _locator_assignment(code, target)
+        if assignment is None:
+            raise PatchError(f"locator {target} not found")
+        line_start = code.rfind("\n", 0, assignment.start()) + 1
+        line_end = code.find("\n", assignment.end())
+        code = code[:line_start] + code[line_end + 1 if line_end >= 0 else len(code):]
+        declaration = _field_declaration(code, target)
+        if declaration:
+            code = code[:declaration.start()] + code[declaration.end():]
+        _check_unreferenced(code, target)
+        return code
+
+    if op == "add_locator":
+        expression = extract_code(body).rstrip(";").strip()
+        if not expression.startswith("page.") or not re.fullmatch(r"[A-Za-z_$][\w$]*", target or ""):
+            raise PatchError(f"invalid locator {target!r}: {expression!r}")
+        if target in pom.locators:
+            return _apply_edit(code, dict(edit, op="replace_locator"))
+        assignments = list(LOCATOR_ASSIGN.finditer(code))
+        if not assignments:
+            raise PatchError("no constructor locator assignments to extend")
+        last = assignments[-1]
+        line_start = code.rfind("\n", 0, last.start()) + 1
+        indent = re.match(r"[ \t]*", code[line_start:]).group(0)
+        code = code[:last.end()] + f"\n{indent}this.{target} = {expression};" + code[last.end():]
+
+        # Declaration next to the last Locator field, same modifiers
+        fields = [m for m in FIELD_DECL.finditer(code) if m.group(3).strip() == "Locator"]
+        if fields:
+            field = fields[-1]
+            field_indent = re.match(r"[ \t]*", field.group(0)).group(0)
+            modifiers = field.group(1).strip()
+            declaration = f"\n{field_indent}{modifiers + ' ' if modifiers else ''}{target}: Locator;"
+            code = code[:field.end()] + declaration + code[field.end():]
+        return code
+
+    raise PatchError(f"unknown operation {op!r}")
+
+
+def apply_pom_edits(draft: str, edits: List[dict]) -> str:
+    """
+    Applies an edit list to a single-class page object. Raises PatchError
+    when an edit does not apply or the result no longer parses.
+    """
+    code = extract_code(draft)
+    class_name = _single_class(code).name
+    for edit in edits:
+        code = _apply_edit(code, edit)
+
+    patched = _single_class(code)
+    if patched.name != class_name:
+        raise PatchError("class name changed")
+    if code.count("{") != code.count("}") or code.count("(") != code.count(")"):
+        raise PatchError("unbalanced braces after patching")
+    return code
+
+
+def apply_edit_response(draft: str, response: str) -> Tuple[str, int]:
+    """
+    (patched code, number of edits) from the refine model's JSON answer.
+    """
+    data = parse_json_output(response)
+    if data is None:
+        raise PatchError("refine answer is not a JSON edit list")
+    edits = [e for e in conform(data, POM_EDIT_SCHEMA)["edits"] if e["op"]]
+    return apply_pom_edits(draft, edits), len(edits)
@@ -0,0 +1,119 @@
+# file: pom_prompt.py
+
+import os
+import re
+from typing import Callable, Tuple
+
+from langchain_core.prompts import PromptTemplate
+
+from Common.html_reducer import reduce_html_file, looks_like_html
+from Common.page_manager import write_page_manager
+from Common.pom_style_profile import render_style_profile
+from Common.profiling import PROFILER
+
+# ---------------------------------------------------------
+# UNIVERSAL BDD-DRIVEN POM PROMPT
+# ---------------------------------------------------------
+POM_PROMPT = PromptTemplate(
+    input_variables=["page_description", "mode", "style_profile"],
+    template="""
+You are a Senior QA Automation Engineer.
+
+Generate a Playwright Page Object Model (POM) in TypeScript
+that STRICTLY follows the project style profile.
+
+PROJECT STYLE PROFILE (MANDATORY):
+{style_profile}
+
+MODE:
+{mode}
+
+PAGE CONTENT:
+{page_description}
+
+OUTPUT:
+Generate ONE Playwright Page Object class.
+"""
+)
+
+# Stripped from model answers (safety net)
+BANNED_FRAGMENTS = ["```", "###", "**", "Explanation", "analysis", "markdown"]
+
+# ---------------------------------------------------------
+# CLASS NAME INFERENCE
+# ---------------------------------------------------------
+def infer_class_name(file_path: str) -> str:
+    raw = os.path.basename(file_path).replace(".txt", "")
+    raw = re.sub(r'[^a-zA-Z0-9]', ' ', raw)
+    words = raw.split()
+    if not words:
+        return "PageGenerated"
+    return "Page" + "".join(w.capitalize() for w in words)
+
+# ---------------------------------------------------------
+# PIPELINE
+# ---------------------------------------------------------
+def build_pom_prompt(input_file: str) -> Tuple[str, str]:
+    """
+    Returns (class_name, prompt) for one page: HTML is reduced, a plain
+    description is used as is, and the cached style profile is injected.
+    """
+    if not os.path.exists(input_file):
+        raise FileNotFoundError(f"{input_file} not found")
+
+    with PROFILER.stage("html read"):
+        if looks_like_html(input_file):
+            mode = "HTML mode"
+            page_description = reduce_html_file(input_file)
+        else:
+            mode = "Description mode"
+            with open(input_file, "r", encoding="utf-8") as f:
+                page_description = f.read()
+
+    class_name = infer_class_name(input_file)
+
+    # Compiled once from CreatePomPattern/Docs/ExistingPOM.txt and cached
+    with PROFILER.stage("template formatting"):
+        style_profile = render_style_profile(class_name)
+        prompt = POM_PROMPT.format(
+            page_description=page_description,
+            mode=mode,
+            style_profile=style_profile
+        )
+    return class_name, prompt
+
+
+def clean_generated_code(code: str) -> str:
+    for banned in BANNED_FRAGMENTS:
+        code = code.replace(banned, "")
+    return code.strip()
+
+
+def generate_pom(input_file: str, output_dir: str, generate: Callable[[str], str]) -> str:
+    """
+    Builds the prompt for input_file, asks generate(prompt) for the class,
+    writes <class_name>.ts to output_dir and registers it in PageManager.ts.
+    """
+    class_name, prompt = build_pom_prompt(input_file)
+    os.makedirs(output_dir, exist_ok=True)
+
+    with PROFILER.stage("generate (LLM)"):
+        generated_code = generate(prompt)
+
+    with PROFILER.stage("cleanup"):
+        generated_code = clean_generated_code(generated_code)
+
+    output_file = os.path.join(output_dir, f"{class_name}.ts")
+
+    with PROFILER.stage("file write"):
+        with open(output_file, "w", encoding="utf-8") as f:
+            f.write(generated_code)
+
+        # Register the page (and every other page in output_dir) in the lazy PageManager
+        manager_file = write_page_manager(output_dir, [class_name])
+
+    print("\n✅ Playwright POM generated successfully:\n")
+    print(generated_code)
+    print(f"\n💾 Saved to: {output_file}")
+    print(f"🧭 PageManager updated: {manager_file}\n")
+    return output_file
@@ -0,0 +1,134 @@
+# file: pom_style_profile.py
+
+import hashlib
+import os
+import re
+from collections import Counter
+
+from Common.typescript_pom import parse_pom_classes, split_camel_case, locator_role
+
+# ---------------------------------------------------------
+# PATHS
+# ---------------------------------------------------------
+POM_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "CreatePomPattern")
+
+CORPUS_FILE = os.path.join(POM_DIR, "Docs", "ExistingPOM.txt")
+PROFILE_FILE = os.path.join(POM_DIR, "Output", "PomStyleProfile.txt")
+
+# Bump when the compiler changes so cached profiles are rebuilt
+PROFILE_VERSION = "1"
+
+HASH_HEADER = "# source-sha256: "
+
+# ---------------------------------------------------------
+# FIXED POLICY (not derivable from the corpus)
+# ---------------------------------------------------------
+POLICY_RULES = """
+POLICY:
+- Page class name: {class_name}
+- All locators private readonly, assigned in the constructor; never exposed
+- Extract inputs, buttons, links, messages and errors as semantic camelCase locators
+- Method groups: navigation (goto, navigateTo...), actions, composites, verify..., assert..., is.../get...
+- No assertions inside action methods
+- verify... = soft checks, assert... = hard expectations
+- No navigation mixed with verification
+- Output ONLY TypeScript code: no markdown, no comments, no explanations
+"""
+
+# ---------------------------------------------------------
+# COMPILER
+# ---------------------------------------------------------
+def _top(counter: Counter, limit: int) -> str:
+    return ", ".join(f"{name} ({count})" for name, count in counter.most_common(limit))
+
+
+def compile_style_profile(corpus: str) -> str:
+    """
+    Derives the project's POM conventions from existing page objects.
+    """
+    classes = [c for c in parse_pom_classes(corpus) if c.locators or c.methods]
+    pages = [c for c in classes if c.locators]
+    managers = [c for c in classes if not c.locators and c.name.endswith("Manager")]
+
+    imports = Counter(i for c in pages for i in dict.fromkeys(c.imports) if "@playwright" in i or "playwright" in i)
+    locator_names = [name for c in pages for name in c.locators]
+    roles = {name: locator_role(name) for name in locator_names}
+    positions = Counter(position for position, _ in roles.values() if position)
+    apis = Counter(re.match(r"page\.(\w+)", expr).group(1) for c in pages for expr in c.locators.values())
+    selector_kinds = Counter(
+        "xpath" if re.search(r"\(\s*['\"`]\(?//", expr) else "css"
+        for c in pages for expr in c.locators.values()
+    )
+    methods = [m for c in pages for m in c.methods]
+    verbs = Counter(split_camel_case(m.name)[0] for m in methods if split_camel_case(m.name))
+    typed = sum(1 for m in methods if m.return_type)
+    composites = [
+        m.name for c in pages for m in c.methods
+        if len(set(re.findall(r"this\.(\w+)\(", m.body)) & {x.name for x in c.methods}) >= 2
+    ]
+
+    lines = ["CONVENTIONS (compiled from existing page objects):"]
+    lines.append(f"- Classes: {', '.join(c.name for c in pages)}")
+    if imports:
+        lines.append(f"- Import: {imports.most_common(1)[0][0]}")
+    lines.append("- Constructor: constructor(page: Page) stores this.page and assigns every locator")
+    if positions:
+        style = positions.most_common(1)[0][0]
+        role_words = Counter(word for position, word in roles.values() if position == style)
+        examples = {}
+        for name, (position, word) in roles.items():
+            if position == style:
+                examples.setdefault(word, name)
+        lines.append(f"- Locator names: role {style} camelCase (e.g. {', '.join(list(examples.values())[:5])})")
+        lines.append(f"- Locator roles: {_top(role_words, 8)}")
+    if apis:
+        lines.append(f"- Locator API: {_top(apis, 3)}; selectors {_top(selector_kinds, 2)}")
+    if verbs:
+        lines.append(f"- Method verbs: {_top(verbs, 10)}")
+    if methods:
+        lines.append(f"- Async methods; explicit return types on {typed}/{len(methods)} (use Promise<void|boolean|string>)")
+    if composites:
+        lines.append(f"- Composite examples: {', '.join(composites[:4])}")
+    for manager in managers:
+        accessors = [m.name for m in manager.methods if m.name.startswith("get")]
+        if accessors:
+            lines.append(f"- {manager.name} accessors: get<ClassName>() (e.g. {', '.join(accessors[:2])})")
+
+    return "\n".join(lines)
+
+# ---------------------------------------------------------
+# CACHE
+# ---------------------------------------------------------
+def _source_hash(corpus: str) -> str:
+    return hashlib.sha256((PROFILE_VERSION + "\n" + corpus).encode("utf-8")).hexdigest()
+
+
+def load_style_profile(corpus_file: str = CORPUS_FILE, profile_file: str = PROFILE_FILE) -> str:
+    """
+    Returns the style profile, recompiling it only when the corpus changed.
+    The returned text still contains the {class_name} placeholder.
+    """
+    if not os.path.exists(corpus_file):
+        raise FileNotFoundError(f"Missing POM corpus: {corpus_file}")
+
+    with open(corpus_file, "r", encoding="utf-8") as f:
+        corpus = f.read()
+    source_hash = _source_hash(corpus)
+
+    if os.path.exists(profile_file):
+        with open(profile_file, "r", encoding="utf-8") as f:
+            header, _, cached = f.read().partition("\n")
+        if header == HASH_HEADER + source_hash:
+            return cached
+
+    print("🧭 Compiling POM style profile from existing page objects...")
+    profile = compile_style_profile(corpus) + "\n" + POLICY_RULES.strip() + "\n"
+
+    os.makedirs(os.path.dirname(profile_file), exist_ok=True)
+    with open(profile_file, "w", encoding="utf-8") as f:
+        f.write(HASH_HEADER + source_hash + "\n" + profile)
+    return profile
+
+
+def render_style_profile(class_name: str) -> str:
+    return load_style_profile().replace("{class_name}", class_name)
@@ -0,0 +1,178 @@
+# file: profiling.py
+
+import atexit
+import cProfile
+import glob
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# ---------------------------------------------------------
+# CONFIGURATION
+# ---------------------------------------------------------
+PROFILE_FLAG = "--profile"
+PROFILE_DIR_NAME = os.path.join("Output", "Profiles")
+TOP_FUNCTIONS = 8
+
+# ---------------------------------------------------------
+# PROFILER
+# ---------------------------------------------------------
+class Profiler:
+    """
+    Per-stage wall/CPU time, cProfile hotspots and tracemalloc peak memory.
+
+    Disabled unless the script runs with --profile, in which case an
+    "imports" stage starts as soon as this module is imported (import it
+    before the heavy libraries) and ends when the first stage starts.
+    A JSON report is written on exit and compared with the previous run
+    of the same script. Only the main thread is profiled; nested stages
+    get timings and memory but no cProfile of their own.
+    """
+
+    def __init__(self, enabled: bool, script: Optional[str] = None):
+        self.enabled = enabled
+        self.script = script or os.path.abspath(sys.argv[0] or "interactive")
+        self.stages: List[Dict] = []
+        self.metrics: Dict[str, object] = {}   # extra sections for the report (e.g. concurrency limits)
+        self._active_profile: Optional[cProfile.Profile] = None
+        self._open: List[Dict] = []            # running stages, outermost first
+        self._imports = None
+        if not enabled:
+            return
+
+        tracemalloc.start()
+        self._imports = self._start("imports")
+        atexit.register(self.finish)
+
+    def _start(self, name: str) -> Dict:
+        record = {"name": name, "wall": time.perf_counter(), "cpu": time.process_time(), "profile": None}
+        # Resetting the peak for this stage would lose the enclosing
+        # stages' peak so far, so it is saved on them first
+        peak = tracemalloc.get_traced_memory()[1]
+        for parent in self._open:
+            parent["peak"] = max(parent["peak"], peak)
+        tracemalloc.reset_peak()
+        record["peak"] = 0
+        record["memory_before"] = tracemalloc.get_traced_memory()[0]
+        self._open.append(record)
+        if self._active_profile is None:
+            record["profile"] = cProfile.Profile()
+            self._active_profile = record["profile"]
+            record["profile"].enable()
+        return record
+
+    def _stop(self, record: Dict):
+        profile = record.pop("profile")
+        if profile is not None:
+            profile.disable()
+            self._active_profile = None
+        self._open.remove(record)
+        current, peak = tracemalloc.get_traced_memory()
+        peak = max(peak, record["peak"])
+        stage = {
+            "name": record["name"],
+            "wall_s": round(time.perf_counter() - record["wall"], 4),
+            "cpu_s": round(time.process_time() - record["cpu"], 4),
+            "peak_mb": round(peak / 1e6, 2),
+            "retained_mb": round((current - record["memory_before"]) / 1e6, 2),
+            "top": self._top_functions(profile) if profile is not None else [],
+        }
+        self.stages.append(stage)
+
+    @staticmethod
+    def _top_functions(profile: cProfile.Profile) -> List[Dict]:
+        stats = pstats.Stats(profile)
+        rows = []
+        for (file_name, line, function), (_, calls, own, cumulative, _) in stats.stats.items():
+            rows.append({
+                "function": f"{os.path.basename(file_name)}:{line}({function})",
+                "calls": calls,
+                "own_s": round(own, 4),
+                "cumulative_s": round(cumulative, 4),
+            })
+        rows.sort(key=lambda r: r["cumulative_s"], reverse=True)
+        return rows[:TOP_FUNCTIONS]
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        if self._imports is not None:
+            imports, self._imports = self._imports, None
+            self._stop(imports)
+        record = self._start(name)
+        try:
+            yield
+        finally:
+            self._stop(record)
+
+    # -----------------------------------------------------
+    # REPORT
+    # -----------------------------------------------------
+    def _report_dir(self) -> str:
+        path = os.path.join(os.path.dirname(self.script), PROFILE_DIR_NAME)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def _previous_report(self, directory: str, prefix: str) -> Optional[Dict]:
+        reports = sorted(glob.glob(os.path.join(directory, f"{prefix}-*.json")))
+        if not reports:
+            return None
+        with open(reports[-1], "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def finish(self):
+        if not self.enabled:
+            return
+        if self._imports is not None:
+            imports, self._imports = self._imports, None
+            self._stop(imports)
+        self.enabled = False
+
+        prefix = os.path.splitext(os.path.basename(self.script))[0]
+        directory = self._report_dir()
+        previous = self._previous_report(directory, prefix)
+        report = {
+            "script": os.path.basename(self.script),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "argv": sys.argv[1:],
+            "stages": self.stages,
+        }
+        if self.metrics:
+            report["metrics"] = self.metrics
+        path = os.path.join(directory, f"{prefix}-{datetime.now():%Y%m%d-%H%M%S}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        tracemalloc.stop()
+
+        print(format_profile(report, previous))
+        print(f"💾 Profile saved to: {path}")
+
+
+def format_profile(report: Dict, previous: Optional[Dict] = None) -> str:
+    before = {s["name"]: s for s in (previous or {}).get("stages", [])}
+    lines = [f"\n⏱️ PROFILE ({report['script']})",
+             f"  {'stage':<28}{'wall s':>9}{'cpu s':>9}{'peak MB':>10}{'Δ wall':>10}"]
+    for stage in report["stages"]:
+        delta = ""
+        if stage["name"] in before:
+            delta = f"{stage['wall_s'] - before[stage['name']]['wall_s']:+.2f}"
+        lines.append(f"  {stage['name']:<28}{stage['wall_s']:>9.2f}{stage['cpu_s']:>9.2f}"
+                     f"{stage['peak_mb']:>10.1f}{delta:>10}")
+    for stage in report["stages"]:
+        if stage["top"]:
+            lines.append(f"  {stage['name']} hotspots:")
+            lines.extend(f"    {row['cumulative_s']:>8.3f}s  {row['function']}" for row in stage["top"][:3])
+    return "\n".join(lines)
+
+
+# One profiler per process, switched on by --profile
+PROFILER = Profiler(enabled=PROFILE_FLAG in sys.argv)
@@ -0,0 +1,95 @@
+# file: scenario_coverage.py
+
+from dataclasses import dataclass, field
+from typing import List, Optional, Set, Tuple
+
+from Common.gherkin import LITERAL, Feature, Scenario, Step, normalize_text
+from Common.step_matcher import DEFAULT_THRESHOLD, StepMatcher
+from Common.typescript_pom import PomClass
+
+EXTENDED_TAG = "@extended"
+
+# ---------------------------------------------------------
+# COVERAGE
+# ---------------------------------------------------------
+@dataclass
+class CoverageReport:
+    scenarios: int = 0
+    core: List[str] = field(default_factory=list)
+    extended: List[str] = field(default_factory=list)
+    methods: Set[str] = field(default_factory=set)
+    elements: int = 0
+
+    def summary(self) -> str:
+        lines = [
+            f"Scenarios: {self.scenarios} → {len(self.core)} core, {len(self.extended)} tagged {EXTENDED_TAG}",
+            f"Covered: {len(self.methods)} POM method(s), {self.elements} coverage element(s) in total",
+        ]
+        lines.extend(f"  CORE      {name}" for name in self.core)
+        lines.extend(f"  EXTENDED  {name}" for name in self.extended)
+        return "\n".join(lines)
+
+
+def step_element(step: Step, matcher: Optional[StepMatcher]) -> Tuple[str, ...]:
+    """
+    The POM method a step exercises, or its literal-free wording when
+    no method matches with enough confidence.
+    """
+    if matcher is not None:
+        match = matcher.match(step.text, step.kind)
+        if match.confident:
+            return "method", f"{match.candidate.pom.name}.{match.candidate.method.name}"
+    return "step", step.kind, normalize_text(LITERAL.sub("…", step.text))
+
+
+def scenario_elements(scenario: Scenario, matcher: Optional[StepMatcher],
+                      methods_only: bool = False) -> Set[Tuple[str, ...]]:
+    elements = {step_element(step, matcher) for step in scenario.steps}
+    if methods_only:
+        elements = {e for e in elements if e[0] == "method"}
+    return elements
+
+# ---------------------------------------------------------
+# MINIMIZATION
+# ---------------------------------------------------------
+def minimize_features(features: List[Feature], poms: Optional[List[PomClass]] = None,
+                      threshold: float = DEFAULT_THRESHOLD, tag: str = EXTENDED_TAG,
+                      methods_only: bool = False):
+    """
+    Greedy set cover over all scenarios: repeatedly keeps the scenario that
+    covers the most not-yet-covered POM methods / step wordings (fewest
+    steps on ties). Scenarios adding nothing are tagged with tag.
+    With methods_only, step wordings that map to no POM method are not
+    coverage targets. Background steps run everywhere and are not counted.
+    """
+    matcher = StepMatcher(poms, threshold) if poms else None
+    scenarios = [s for f in features for s in f.scenarios]
+    elements = [scenario_elements(s, matcher, methods_only) for s in scenarios]
+
+    report = CoverageReport(scenarios=len(scenarios))
+    universe = set().union(*elements) if elements else set()
+    report.elements = len(universe)
+    report.methods = {e[1] for e in universe if e[0] == "method"}
+
+    uncovered = set(universe)
+    remaining = list(range(len(scenarios)))
+    selected = set()
+    while uncovered and remaining:
+        best = max(remaining, key=lambda i: (len(elements[i] & uncovered), -len(scenarios[i].steps), -i))
+        gain = elements[best] & uncovered
+        if not gain:
+            break
+        selected.add(best)
+        uncovered -= gain
+        remaining.remove(best)
+
+    for i, scenario in enumerate(scenarios):
+        if i in selected:
+            scenario.tags = [t for t in scenario.tags if t != tag]
+            report.core.append(scenario.name)
+            continue
+        if tag not in scenario.tags:
+            scenario.tags = scenario.tags + [tag]
+        report.extended.append(scenario.name)
+
+    return features, report
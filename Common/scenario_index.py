@@ -0,0 +1,239 @@
+# file: scenario_index.py
+
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from Common.gherkin import LITERAL, Feature, Scenario, Step, normalize_text, parse_features, render_features
+
+# ---------------------------------------------------------
+# FINGERPRINTS
+# ---------------------------------------------------------
+DUPLICATE_TAG = "@duplicate"   # same steps as an existing scenario
+SIMILAR_TAG = "@similar"       # same steps with different data values
+PARTIAL_TAG = "@partial-duplicate"   # outline with some Examples rows already covered
+
+# Bump when normalization changes so stored indexes are rebuilt
+INDEX_VERSION = "1"
+
+PARAMETER = re.compile(r"<[^<>]+>")
+
+
+def _digest(lines: Iterable[str]) -> str:
+    return hashlib.blake2b("\n".join(lines).encode("utf-8"), digest_size=12).hexdigest()
+
+
+def _step_lines(steps: List[Step]) -> List[str]:
+    # Keywords are ignored: generated suites mix Given/When for the same action
+    lines = []
+    for step in steps:
+        lines.append(normalize_text(step.text))
+        lines.extend("  " + normalize_text(extra) for extra in step.extra)
+    return lines
+
+
+def _template(line: str) -> str:
+    return PARAMETER.sub("<>", LITERAL.sub("<>", line))
+
+
+def _substitute(step: Step, values: Dict[str, str]) -> Step:
+    def fill(text: str) -> str:
+        return PARAMETER.sub(lambda m: values.get(m.group(0)[1:-1].strip(), m.group(0)), text)
+    return Step(step.keyword, fill(step.text), step.kind, [fill(e) for e in step.extra])
+
+
+def expanded_runs(background: List[Step], scenario: Scenario) -> List[List[Step]]:
+    """
+    Concrete step lists of a scenario: one per Examples row for outlines.
+    """
+    steps = list(background) + list(scenario.steps)
+    rows = [dict(zip(block.header, row)) for block in scenario.examples for row in block.rows]
+    if not rows:
+        return [steps]
+    return [[_substitute(step, values) for step in steps] for values in rows]
+
+
+def exact_fingerprint(steps: List[Step]) -> str:
+    return _digest(_step_lines(steps))
+
+
+def template_fingerprint(background: List[Step], scenario: Scenario) -> str:
+    return _digest(_template(line) for line in _step_lines(list(background) + list(scenario.steps)))
+
+# ---------------------------------------------------------
+# INDEX (incremental per file, stored as JSON)
+# ---------------------------------------------------------
+def feature_files(paths: Iterable[str]) -> List[str]:
+    """
+    Explicit files as given; directories are searched for *.feature.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, n) for n in sorted(names) if n.endswith(".feature"))
+        elif os.path.exists(path):
+            files.append(path)
+    return sorted(dict.fromkeys(os.path.abspath(f) for f in files))
+
+
+def index_entries(text: str) -> List[dict]:
+    entries = []
+    for feature in parse_features(text):
+        for scenario in feature.scenarios:
+            entries.append({
+                "name": f"{feature.name} / {scenario.name}",
+                "exact": [exact_fingerprint(run) for run in expanded_runs(feature.background, scenario)],
+                "template": template_fingerprint(feature.background, scenario),
+            })
+    return entries
+
+
+class ScenarioIndex:
+    """
+    Fingerprints of every scenario in a feature corpus, for constant-time
+    lookup of generated scenarios. Files whose content hash is unchanged
+    are not parsed again when the index is refreshed.
+    """
+
+    def __init__(self, files: Optional[Dict[str, dict]] = None):
+        self.files = files or {}   # path → {"sha": content hash, "scenarios": [entries]}
+        self._build()
+
+    def _build(self):
+        self.exact: Dict[str, str] = {}
+        self.templates: Dict[str, str] = {}
+        for path, data in self.files.items():
+            for entry in data["scenarios"]:
+                ref = f"{os.path.basename(path)}: {entry['name']}"
+                for fingerprint in entry["exact"]:
+                    self.exact.setdefault(fingerprint, ref)
+                self.templates.setdefault(entry["template"], ref)
+
+    def __len__(self) -> int:
+        return sum(len(data["scenarios"]) for data in self.files.values())
+
+    @staticmethod
+    def load(path: str) -> "ScenarioIndex":
+        if not path or not os.path.exists(path):
+            return ScenarioIndex()
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return ScenarioIndex(data.get("files", {}) if data.get("version") == INDEX_VERSION else {})
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "files": self.files}, f)
+
+    def refresh(self, paths: Iterable[str]) -> Tuple[int, int]:
+        """
+        Indexes the corpus at paths; returns (files parsed, files reused).
+        Files no longer in the corpus are dropped.
+        """
+        parsed = reused = 0
+        files = {}
+        for path in feature_files(paths):
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            sha = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            previous = self.files.get(path)
+            if previous and previous["sha"] == sha:
+                files[path] = previous
+                reused += 1
+            else:
+                files[path] = {"sha": sha, "scenarios": index_entries(text)}
+                parsed += 1
+        self.files = files
+        self._build()
+        return parsed, reused
+
+
+def load_corpus_index(paths: Iterable[str], index_file: str) -> ScenarioIndex:
+    index = ScenarioIndex.load(index_file)
+    parsed, reused = index.refresh(paths)
+    if parsed or not os.path.exists(index_file):
+        index.save(index_file)
+    print(f"📚 Scenario index: {len(index)} existing scenario(s) "
+          f"from {parsed + reused} file(s) ({parsed} parsed, {reused} unchanged)")
+    return index
+
+# ---------------------------------------------------------
+# NOVELTY FILTER
+# ---------------------------------------------------------
+@dataclass
+class NoveltyReport:
+    checked: int = 0
+    duplicates: Dict[str, str] = field(default_factory=dict)   # generated scenario → existing one
+    similar: Dict[str, str] = field(default_factory=dict)
+    partial: Dict[str, str] = field(default_factory=dict)      # outline → existing scenario of a covered row
+    rows_removed: int = 0
+    dropped: bool = True
+
+    def summary(self) -> str:
+        action = "dropped" if self.dropped else f"tagged {DUPLICATE_TAG}"
+        lines = [f"🆕 Novelty: {self.checked} scenario(s) checked, {len(self.duplicates)} duplicate(s) {action}, "
+                 + (f"{self.rows_removed} existing Examples row(s) removed, " if self.dropped else
+                    f"{len(self.partial)} partly covered outline(s) tagged {PARTIAL_TAG}, ")
+                 + f"{len(self.similar)} similar tagged {SIMILAR_TAG}"]
+        lines += [f"  DUPLICATE '{name}' = {ref}" for name, ref in self.duplicates.items()]
+        lines += [f"  PARTIAL '{name}': rows already in {ref}" for name, ref in self.partial.items()]
+        lines += [f"  SIMILAR '{name}' ~ {ref}" for name, ref in self.similar.items()]
+        return "\n".join(lines)
+
+
+def _tag(scenario: Scenario, tag: str):
+    if tag not in scenario.tags:
+        scenario.tags.append(tag)
+
+
+def filter_novel(features: List[Feature], index: ScenarioIndex, drop: bool = True):
+    """
+    Drops (or tags) generated scenarios whose steps already exist in the
+    corpus, removes (or tags the outline of) Examples rows that exist as
+    concrete scenarios, and tags scenarios that differ from an existing one
+    only in data values.
+    Returns (features, NoveltyReport).
+    """
+    report = NoveltyReport(dropped=drop)
+    for feature in features:
+        kept = []
+        for scenario in feature.scenarios:
+            report.checked += 1
+            runs = expanded_runs(feature.background, scenario)
+            existing = [index.exact.get(exact_fingerprint(run)) for run in runs]
+
+            if all(existing):
+                report.duplicates[scenario.name] = existing[0]
+                if drop:
+                    continue
+                _tag(scenario, DUPLICATE_TAG)
+            elif any(existing):
+                report.partial[scenario.name] = next(ref for ref in existing if ref)
+                if not drop:
+                    _tag(scenario, PARTIAL_TAG)
+                    kept.append(scenario)
+                    continue
+                # Outline with some rows already covered: keep the new rows only
+                flags = iter(existing)
+                for block in scenario.examples:
+                    before = len(block.rows)
+                    block.rows = [row for row in block.rows if not next(flags)]
+                    report.rows_removed += before - len(block.rows)
+                scenario.examples = [block for block in scenario.examples if block.rows]
+            else:
+                ref = index.templates.get(template_fingerprint(feature.background, scenario))
+                if ref:
+                    report.similar[scenario.name] = ref
+                    _tag(scenario, SIMILAR_TAG)
+            kept.append(scenario)
+        feature.scenarios = kept
+    return [f for f in features if f.scenarios], report
+
+
+def filter_novel_text(text: str, index: ScenarioIndex, drop: bool = True):
+    features, report = filter_novel(parse_features(text), index, drop)
+    return render_features(features), report
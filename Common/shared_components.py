@@ -0,0 +1,292 @@
+# file: shared_components.py
+
+import hashlib
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from Common.html_dom import Node, UnsupportedSelector, parse_html, select
+from Common.html_reducer import (
+    INTERACTIVE_ROLES, INTERACTIVE_TAGS, KEPT_ATTRS, SKIP_TAGS, TEXT_TAGS, VOID_TAGS, reduce_html
+)
+from Common.locator_quality import GENERATED_NAME
+from Common.typescript_pom import matching_brace, parse_pom_classes
+
+# ---------------------------------------------------------
+# CONFIGURATION
+# ---------------------------------------------------------
+
+# A subtree becomes a component when it is identical on this many pages
+MIN_PAGES = 2
+
+# ... and holds at least this many elements a POM would declare
+MIN_ELEMENTS = 3
+
+COMPONENT_PREFIX = "Component"
+COMPONENTS_DIR = "Components"          # below the POM output dir, so PageManager does not list them
+
+SEMANTIC_TAGS = {"header", "footer", "nav", "aside", "form", "dialog", "main", "section"}
+
+# ---------------------------------------------------------
+# STRUCTURAL SIGNATURES
+# ---------------------------------------------------------
+def _is_element(node: Node) -> bool:
+    """
+    Elements a POM would declare a locator for (same rules as the reducer).
+    """
+    if node.tag == "input" and node.attrs.get("type", "").lower() == "hidden":
+        return False
+    if node.tag in INTERACTIVE_TAGS or node.attrs.get("role", "").lower() in INTERACTIVE_ROLES:
+        return True
+    return node.tag in TEXT_TAGS and bool(node.texts)
+
+
+def _own_signature(node: Node) -> str:
+    # Only attributes locators use; framework noise (data-v-*, style) is ignored
+    attrs = [f"{name}={' '.join(node.attrs[name].split())}" for name in KEPT_ATTRS if name in node.attrs]
+    texts = " ".join(" ".join(node.texts).split())
+    return f"{node.tag}|{'|'.join(attrs)}|{texts}"
+
+
+def signatures(root: Node) -> Dict[int, Tuple[str, int]]:
+    """
+    id(node) → (hash of the subtree's structure, elements inside it).
+    """
+    result: Dict[int, Tuple[str, int]] = {}
+    order = [n for n in root.iter() if n.tag not in SKIP_TAGS]
+    for node in reversed(order):      # children before parents
+        children = [result[id(c)] for c in node.children if id(c) in result]
+        digest = hashlib.blake2b(digest_size=12)
+        digest.update(_own_signature(node).encode("utf-8"))
+        for sig, _ in children:
+            digest.update(sig.encode("ascii"))
+        result[id(node)] = (digest.hexdigest(), int(_is_element(node)) + sum(c for _, c in children))
+    return result
+
+# ---------------------------------------------------------
+# SERIALIZATION
+# ---------------------------------------------------------
+def outer_html(node: Node, replaced: Optional[Dict[int, str]] = None) -> str:
+    """
+    HTML of a subtree; nodes in replaced (id → text) are written as that
+    text instead. Text is written before child elements.
+    """
+    replaced = replaced or {}
+    if id(node) in replaced:
+        return replaced[id(node)]
+    inner = " ".join(node.texts) + "".join(outer_html(c, replaced) for c in node.children)
+    if node.tag == "#document":
+        return inner
+    attrs = "".join(f' {k}="{v}"' for k, v in node.attrs.items())
+    if node.tag in VOID_TAGS:
+        return f"<{node.tag}{attrs}>"
+    return f"<{node.tag}{attrs}>{inner}</{node.tag}>"
+
+# ---------------------------------------------------------
+# DETECTION
+# ---------------------------------------------------------
+@dataclass
+class SharedComponent:
+    name: str
+    signature: str
+    root_selector: str
+    elements: int
+    html: str
+    pages: List[str] = field(default_factory=list)
+    code: str = ""
+    methods: List[str] = field(default_factory=list)   # public method signatures of the generated class
+
+    @property
+    def field_name(self) -> str:
+        short = self.name[len(COMPONENT_PREFIX):] or self.name
+        return short[0].lower() + short[1:]
+
+    @property
+    def summary(self) -> str:
+        return reduce_html(self.html)
+
+
+def _words(text: str) -> List[str]:
+    return [w for w in re.split(r"[^a-zA-Z0-9]+", text) if w and not w.isdigit()]
+
+
+def component_name(node: Node) -> str:
+    if node.attrs.get("id") and not GENERATED_NAME.search(node.attrs["id"]):
+        words = _words(node.attrs["id"])
+    elif node.attrs.get("aria-label"):
+        words = _words(node.attrs["aria-label"])[:3]
+    else:
+        classes = [c for c in node.classes if not GENERATED_NAME.search(c)]
+        # "app-login-footer" → LoginFooter: the first word is usually the app / library prefix
+        best = max(classes, key=lambda c: len(_words(c)), default="")
+        words = _words(best)
+        words = words[1:] if len(words) > 2 else words
+        if node.tag in SEMANTIC_TAGS and node.tag not in (w.lower() for w in words):
+            words.append(node.tag)
+    return COMPONENT_PREFIX + ("".join(w[:1].upper() + w[1:] for w in words) or node.tag.capitalize())
+
+
+def _selector_candidates(node: Node) -> List[str]:
+    candidates = []
+    if node.attrs.get("id") and not GENERATED_NAME.search(node.attrs["id"]):
+        candidates.append(f"#{node.attrs['id']}")
+    for name in ("data-testid", "aria-label", "role"):
+        if node.attrs.get(name):
+            candidates.append(f'{node.tag}[{name}="{node.attrs[name]}"]')
+    if node.tag in SEMANTIC_TAGS:
+        candidates.append(node.tag)
+    classes = [c for c in node.classes if not GENERATED_NAME.search(c) and re.fullmatch(r"[\w-]+", c)]
+    # Most specific single class first (longest name), then all of them together
+    candidates.extend(f".{c}" for c in sorted(classes, key=len, reverse=True))
+    if len(classes) > 1:
+        candidates.append(node.tag + "".join(f".{c}" for c in classes))
+    return candidates
+
+
+def root_selector(occurrences: List[Tuple[Node, Node]]) -> Optional[str]:
+    """
+    A CSS selector matching exactly the component root on every page
+    ((page root, component node) pairs), or None.
+    """
+    for selector in _selector_candidates(occurrences[0][1]):
+        try:
+            if all(select(page, selector) == [node] for page, node in occurrences):
+                return selector
+        except UnsupportedSelector:
+            continue
+    return None
+
+
+def find_shared_components(pages: Dict[str, str], min_pages: int = MIN_PAGES,
+                           min_elements: int = MIN_ELEMENTS) -> Tuple[List[SharedComponent], Dict[str, str]]:
+    """
+    Largest DOM subtrees that are identical on at least min_pages of the
+    given pages (name → HTML). Returns the components and, per page, the
+    HTML with the component subtrees cut out.
+    """
+    roots = {name: parse_html(html) for name, html in pages.items()}
+    sigs = {name: signatures(root) for name, root in roots.items()}
+
+    pages_with: Dict[str, set] = {}
+    for name, page_sigs in sigs.items():
+        for sig, _ in page_sigs.values():
+            pages_with.setdefault(sig, set()).add(name)
+
+    # Top-down: the first shared subtree on a path is taken whole; a subtree
+    # holding every element of the page is the page itself, not a component
+    found: Dict[str, List[Tuple[str, Node]]] = {}
+    for name, root in roots.items():
+        total = sigs[name][id(root)][1]
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if id(node) not in sigs[name]:
+                continue
+            sig, elements = sigs[name][id(node)]
+            if len(pages_with[sig]) >= min_pages and min_elements <= elements < total:
+                found.setdefault(sig, []).append((name, node))
+                continue
+            stack.extend(reversed(node.children))
+
+    components: List[SharedComponent] = []
+    cut: Dict[str, Dict[int, str]] = {name: {} for name in pages}
+    names = set()
+    for sig, occurrences in found.items():
+        # Once per page: a block repeated inside one page is a list, not a component
+        per_page = {}
+        for page_name, node in occurrences:
+            per_page.setdefault(page_name, []).append(node)
+        if len(per_page) < min_pages or any(len(nodes) > 1 for nodes in per_page.values()):
+            continue
+
+        node = occurrences[0][1]
+        selector = root_selector([(roots[p], nodes[0]) for p, nodes in per_page.items()])
+        if selector is None:
+            continue
+
+        base = name = component_name(node)
+        while name in names:
+            name = f"{base}{len([n for n in names if n.startswith(base)]) + 1}"
+        names.add(name)
+
+        component = SharedComponent(name, sig, selector, sigs[occurrences[0][0]][id(node)][1],
+                                    outer_html(node), sorted(per_page))
+        components.append(component)
+        for page_name, nodes in per_page.items():
+            cut[page_name][id(nodes[0])] = ""
+
+    stripped = {name: outer_html(roots[name], cut[name]) for name in pages}
+    return components, stripped
+
+# ---------------------------------------------------------
+# COMPOSITION (page POMs use the generated components)
+# ---------------------------------------------------------
+def describe_component(component: SharedComponent) -> str:
+    methods = "\n".join(f"    - {m}" for m in component.methods) or "    (no public methods found)"
+    return (f"- {component.name} from './{COMPONENTS_DIR}/{component.name}' "
+            f"(root '{component.root_selector}'), field '{component.field_name}':\n{methods}")
+
+
+def render_component_usage(components: List[SharedComponent]) -> str:
+    """
+    Contract section telling the page generator to compose, not redeclare,
+    the components present on the page.
+    """
+    if not components:
+        return ""
+    lines = [
+        "SHARED COMPONENTS (already generated — do NOT declare their locators or methods in the page):",
+        *[describe_component(c) for c in components],
+        "Compose each one as a public readonly field created in the constructor, e.g.",
+        f"    readonly {components[0].field_name}: {components[0].name};",
+        f"    this.{components[0].field_name} = new {components[0].name}(page);",
+        "Page methods that need a component element call the component method.",
+    ]
+    return "\n".join(lines)
+
+
+def set_component_code(component: SharedComponent, code: str):
+    component.code = code
+    classes = parse_pom_classes(code)
+    if classes:
+        component.methods = [m.signature for m in classes[0].methods
+                             if "private" not in m.modifiers and m.name != "constructor"]
+
+
+def ensure_composition(code: str, components: List[SharedComponent]) -> str:
+    """
+    Adds the import, field and constructor assignment of every component
+    the generated page does not compose yet.
+    """
+    for component in components:
+        if f"new {component.name}(" in code:
+            continue
+        statement = f"import {{ {component.name} }} from './{COMPONENTS_DIR}/{component.name}';"
+        if statement not in code:
+            imports = list(re.finditer(r"^import .*?;[ \t]*$", code, re.MULTILINE))
+            at = imports[-1].end() if imports else 0
+            code = code[:at] + ("\n" if at else "") + statement + ("" if at else "\n") + code[at:]
+
+        class_open = re.search(r"export\s+class\s+\w+[^{]*\{\n?", code)
+        constructor = re.search(r"constructor\s*\(\s*page\s*:\s*Page\s*\)\s*\{\n?", code)
+        if not class_open or not constructor:
+            continue
+        assignment = f"        this.{component.field_name} = new {component.name}(page);\n"
+        # After super(...) / this.page = page at the start of the body (this is
+        # not usable before super), else at the end of the constructor
+        body = code[constructor.end():]
+        leading = re.match(r"(?:[ \t]*(?:super\s*\([^;]*\)|this\.page\s*=\s*page)\s*;[ \t]*\n)+", body)
+        if leading:
+            at = constructor.end() + leading.end()
+        else:
+            close = matching_brace(code, code.rfind("{", constructor.start(), constructor.end()))
+            at = max(constructor.end(), code.rfind("\n", 0, close) + 1)
+        code = code[:at] + assignment + code[at:]
+        declaration = f"    readonly {component.field_name}: {component.name};\n"
+        code = code[:class_open.end()] + declaration + code[class_open.end():]
+    return code
+
+
+def component_file(output_dir: str, component: SharedComponent) -> str:
+    return os.path.join(output_dir, COMPONENTS_DIR, f"{component.name}.ts")
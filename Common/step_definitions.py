@@ -0,0 +1,329 @@
+# file: step_definitions.py
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# ---------------------------------------------------------
+# MODEL
+# ---------------------------------------------------------
+STEP_CALL = re.compile(r"\b(Given|When|Then)\s*\(\s*(['\"`])")
+IMPORT_LINE = re.compile(r"^import\s+.*?;?\s*$", re.MULTILINE)
+NAMED_IMPORT = re.compile(r"^import\s*\{([^}]*)\}\s*from\s*(['\"])(.+?)\2\s*;?\s*$")
+ACCESSOR = re.compile(r"^const\s+(\w+)\s*=\s*\([^)]*\)[^=\n]*=>", re.MULTILINE)   # body: _find_statement_end
+TYPE_BLOCK = re.compile(r"^type\s+\w+\s*=\s*\{.*?^\};?", re.MULTILINE | re.DOTALL)
+
+# Cucumber expression parameter types → regex
+PARAMETER_TYPES = {
+    "string": r"(?:\"[^\"]*\"|'[^']*')",
+    "int": r"-?\d+",
+    "float": r"-?\d*\.?\d+",
+    "word": r"[^\s]+",
+    "": r".*",
+}
+
+# Sample values used to probe patterns against each other
+PARAMETER_SAMPLES = {
+    "string": '"sample"',
+    "int": "42",
+    "float": "4.2",
+    "word": "sample",
+    "": "sample",
+}
+
+
+@dataclass
+class StepDefinition:
+    keyword: str
+    pattern: str
+    source: str
+    accessors: List[str] = field(default_factory=list)
+
+    def body_key(self) -> str:
+        # Argument names and whitespace do not change behaviour
+        body = self.source.split("=>", 1)[-1]
+        return re.sub(r"\s+", "", body)
+
+
+@dataclass
+class StepFile:
+    imports: List[str] = field(default_factory=list)
+    types: List[str] = field(default_factory=list)
+    accessors: Dict[str, str] = field(default_factory=dict)
+    steps: List[StepDefinition] = field(default_factory=list)
+
+# ---------------------------------------------------------
+# PARSER
+# ---------------------------------------------------------
+def _find_call_end(code: str, start: int) -> int:
+    """
+    Index just after the ')' closing the call opened before start.
+    String, template and comment aware.
+    """
+    depth = 1
+    i = start
+    quote = None
+    while i < len(code):
+        ch = code[i]
+        if quote:
+            if ch == "\\":
+                i += 2
+                continue
+            if ch == quote:
+                quote = None
+        elif code.startswith("//", i):
+            newline = code.find("\n", i)
+            i = len(code) if newline == -1 else newline
+            continue
+        elif code.startswith("/*", i):
+            close = code.find("*/", i + 2)
+            i = len(code) if close == -1 else close + 2
+            continue
+        elif ch in "'\"`":
+            quote = ch
+        elif ch in "([{":
+            depth += 1
+        elif ch in ")]}":
+            depth -= 1
+            if depth == 0:
+                end = i + 1
+                while end < len(code) and code[end] in " \t":
+                    end += 1
+                if end < len(code) and code[end] == ";":
+                    end += 1
+                return end
+        i += 1
+    return len(code)
+
+
+def _find_statement_end(code: str, start: int) -> int:
+    """
+    Index just after the ';' ending the statement that continues at start
+    (across lines), or at a blank line when the ';' is missing. String,
+    template and comment aware.
+    """
+    depth = 0
+    i = start
+    quote = None
+    while i < len(code):
+        ch = code[i]
+        if quote:
+            if ch == "\\":
+                i += 2
+                continue
+            if ch == quote:
+                quote = None
+        elif code.startswith("//", i):
+            newline = code.find("\n", i)
+            i = len(code) if newline == -1 else newline
+            continue
+        elif code.startswith("/*", i):
+            close = code.find("*/", i + 2)
+            i = len(code) if close == -1 else close + 2
+            continue
+        elif ch in "'\"`":
+            quote = ch
+        elif ch in "([{":
+            depth += 1
+        elif ch in ")]}":
+            depth -= 1
+            rest = code[i + 1:].lstrip(" \t")
+            # A block or call ending its line without ';' ends the statement unless chained
+            if depth == 0 and not rest.startswith(";") and \
+                    (not rest or rest.startswith("\n") and not rest.lstrip().startswith((".", "?", "?."))):
+                return i + 1
+        elif depth == 0 and ch == ";":
+            return i + 1
+        elif depth == 0 and ch == "\n" and code[i + 1:].lstrip(" \t").startswith("\n"):
+            return i
+        i += 1
+    return len(code)
+
+
+def accessor_complete(source: str) -> bool:
+    # "const x = (m: PageManager): X =>" without its body breaks the next statement
+    return not source.rstrip().rstrip(";").rstrip().endswith("=>")
+
+
+def parse_step_file(code: str) -> StepFile:
+    result = StepFile()
+    result.imports = [m.group(0).strip() for m in IMPORT_LINE.finditer(code)]
+    result.types = [m.group(0).strip() for m in TYPE_BLOCK.finditer(code)]
+    for match in ACCESSOR.finditer(code):
+        end = _find_statement_end(code, match.end())
+        result.accessors[match.group(1)] = code[match.start():end].strip()
+
+    position = 0
+    while True:
+        match = STEP_CALL.search(code, position)
+        if not match:
+            break
+        quote = match.group(2)
+        pattern_start = match.end()
+        pattern_end = pattern_start
+        while pattern_end < len(code) and code[pattern_end] != quote:
+            pattern_end += 2 if code[pattern_end] == "\\" else 1
+        end = _find_call_end(code, code.index("(", match.start()) + 1)
+        source = code[match.start():end].strip()
+        result.steps.append(StepDefinition(
+            keyword=match.group(1),
+            pattern=code[pattern_start:pattern_end],
+            source=source,
+            accessors=[name for name in result.accessors if re.search(rf"\b{name}\s*\(", source)]
+        ))
+        position = end
+
+    # Accessors may be declared after their first use in LLM output
+    for step in result.steps:
+        if not step.accessors:
+            step.accessors = [n for n in result.accessors if re.search(rf"\b{n}\s*\(", step.source)]
+    return result
+
+# ---------------------------------------------------------
+# CUCUMBER EXPRESSIONS
+# ---------------------------------------------------------
+def expression_to_regex(pattern: str) -> re.Pattern:
+    if pattern.startswith("^") or pattern.endswith("$"):
+        return re.compile(pattern)
+
+    parts = []
+    for token in re.split(r"(\{[^}]*\}|\([^)]*\)|\w+/\w+(?:/\w+)*)", pattern):
+        if not token:
+            continue
+        if token.startswith("{") and token.endswith("}"):
+            parts.append(PARAMETER_TYPES.get(token[1:-1], r".*"))
+        elif token.startswith("(") and token.endswith(")"):
+            parts.append(f"(?:{re.escape(token[1:-1])})?")   # optional text
+        elif "/" in token and " " not in token:
+            parts.append("(?:" + "|".join(re.escape(t) for t in token.split("/")) + ")")  # alternation
+        else:
+            parts.append(re.escape(token))
+    return re.compile("^" + "".join(parts) + "$")
+
+
+def sample_text(pattern: str) -> str:
+    text = re.sub(r"\{([^}]*)\}", lambda m: PARAMETER_SAMPLES.get(m.group(1), "sample"), pattern)
+    text = re.sub(r"\(([^)]*)\)", "", text)
+    text = re.sub(r"(\w+)/\w+(?:/\w+)*", r"\1", text)
+    return " ".join(text.split())
+
+# ---------------------------------------------------------
+# REGISTRY MERGE
+# ---------------------------------------------------------
+@dataclass
+class MergeReport:
+    duplicates: int = 0
+    conflicts: List[Tuple[str, str]] = field(default_factory=list)      # (pattern, dropped source)
+    ambiguous: List[Tuple[str, str]] = field(default_factory=list)      # (pattern, other pattern)
+    ambiguous_steps: List[Tuple[str, List[str]]] = field(default_factory=list)
+    undefined_steps: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        lines = [
+            f"Duplicates removed: {self.duplicates}",
+            f"Conflicting definitions: {len(self.conflicts)}",
+            f"Ambiguous pattern pairs: {len(self.ambiguous)}",
+            f"Ambiguous feature steps: {len(self.ambiguous_steps)}",
+            f"Undefined feature steps: {len(self.undefined_steps)}",
+        ]
+        for pattern, _ in self.conflicts:
+            lines.append(f"  CONFLICT  '{pattern}' defined with different bodies (kept first)")
+        for first, second in self.ambiguous:
+            lines.append(f"  AMBIGUOUS '{first}' ↔ '{second}'")
+        for text, patterns in self.ambiguous_steps:
+            lines.append(f"  AMBIGUOUS STEP '{text}' → {patterns}")
+        for text in self.undefined_steps:
+            lines.append(f"  UNDEFINED '{text}'")
+        return "\n".join(lines)
+
+
+def _merge_imports(import_lines: List[str]) -> List[str]:
+    named: Dict[str, List[str]] = {}
+    other: List[str] = []
+    for line in import_lines:
+        match = NAMED_IMPORT.match(line)
+        if not match:
+            if line not in other:
+                other.append(line)
+            continue
+        names = named.setdefault(match.group(3), [])
+        imported = {n for module_names in named.values() for n in module_names}
+        for name in (n.strip() for n in match.group(1).split(",")):
+            # A name imported from two paths (local matcher vs LLM output) is declared once
+            if name and name not in imported:
+                names.append(name)
+                imported.add(name)
+    merged = [f"import {{ {', '.join(names)} }} from '{module}';" for module, names in named.items() if names]
+    return merged + other
+
+
+def _type_name(block: str) -> str:
+    return re.match(r"type\s+(\w+)", block).group(1)
+
+
+def merge_step_files(files: List[StepFile], feature_steps: Optional[List[str]] = None):
+    """
+    Merges step files into one registry.
+
+    Identical definitions are dropped; a pattern redefined with a different
+    body is a conflict (first one wins); two patterns that can match the
+    same text are reported as ambiguous, as are feature steps matched by
+    more than one definition.
+    """
+    report = MergeReport()
+    merged = StepFile()
+    by_pattern: Dict[str, StepDefinition] = {}
+
+    for step_file in files:
+        merged.imports.extend(step_file.imports)
+        for block in step_file.types:
+            # One declaration per type name (LLM output often repeats FixtureContext)
+            if _type_name(block) not in {_type_name(t) for t in merged.types}:
+                merged.types.append(block)
+        for name, source in step_file.accessors.items():
+            # First one wins, unless it lost its body (truncated LLM output or keep file)
+            if name not in merged.accessors or \
+                    (not accessor_complete(merged.accessors[name]) and accessor_complete(source)):
+                merged.accessors[name] = source
+
+        for step in step_file.steps:
+            existing = by_pattern.get(step.pattern)
+            if existing is None:
+                by_pattern[step.pattern] = step
+                merged.steps.append(step)
+            elif existing.body_key() == step.body_key():
+                report.duplicates += 1
+            else:
+                report.conflicts.append((step.pattern, step.source))
+
+    merged.imports = _merge_imports(merged.imports)
+
+    regexes = {s.pattern: expression_to_regex(s.pattern) for s in merged.steps}
+    patterns = list(regexes)
+    for i, first in enumerate(patterns):
+        for second in patterns[i + 1:]:
+            if regexes[second].match(sample_text(first)) or regexes[first].match(sample_text(second)):
+                report.ambiguous.append((first, second))
+
+    for text in feature_steps or []:
+        matches = [p for p, rx in regexes.items() if rx.match(text)]
+        if len(matches) > 1:
+            report.ambiguous_steps.append((text, matches))
+        elif not matches:
+            report.undefined_steps.append(text)
+
+    return merged, report
+
+
+def render_step_file(step_file: StepFile, steps: Optional[List[StepDefinition]] = None) -> str:
+    steps = step_file.steps if steps is None else steps
+    # An accessor without its body would take the next statement as its body
+    used = [n for n in step_file.accessors
+            if any(n in s.accessors for s in steps) and accessor_complete(step_file.accessors[n])]
+
+    parts = ["\n".join(step_file.imports)]
+    parts.extend(step_file.types)
+    if used:
+        parts.append("\n".join(step_file.accessors[n] for n in used))
+    parts.extend(s.source for s in steps)
+    return "\n\n".join(p for p in parts if p).strip() + "\n"
@@ -0,0 +1,140 @@
+# file: step_dependencies.py
+
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from Common.step_definitions import StepFile
+from Common.typescript_pom import PomClass
+
+# ---------------------------------------------------------
+# DEPENDENCY GRAPH (step pattern → POM methods it calls)
+# ---------------------------------------------------------
+
+# const pageLogin = (pm: PageManager): PageLogin => pm.getPageLogin();
+ACCESSOR_RETURN = re.compile(r"\)\s*:\s*(\w+)\s*=>")
+ACCESSOR_GETTER = re.compile(r"\.get(\w+)\s*\(")
+
+
+def accessor_classes(step_file: StepFile) -> Dict[str, str]:
+    """
+    Accessor name → Page Object class it returns.
+    """
+    classes = {}
+    for name, source in step_file.accessors.items():
+        match = ACCESSOR_RETURN.search(source) or ACCESSOR_GETTER.search(source)
+        if match:
+            classes[name] = match.group(1)
+    return classes
+
+
+def step_dependencies(step_file: StepFile) -> Dict[str, List[str]]:
+    """
+    Step pattern → ["PageLogin.fillUsername", ...] called through accessors.
+    """
+    classes = accessor_classes(step_file)
+    graph = {}
+    for step in step_file.steps:
+        calls = []
+        for accessor in step.accessors:
+            call = re.compile(rf"\b{re.escape(accessor)}\s*\([^()]*\)\s*\.\s*(\w+)\s*\(")
+            class_name = classes.get(accessor, accessor)
+            calls.extend(f"{class_name}.{m.group(1)}" for m in call.finditer(step.source))
+        graph[step.pattern] = list(dict.fromkeys(calls))
+    return graph
+
+
+def method_signatures(poms: List[PomClass]) -> Dict[str, str]:
+    return {f"{pom.name}.{method.name}": method.signature for pom in poms for method in pom.methods}
+
+# ---------------------------------------------------------
+# SNAPSHOT (stored next to the generated steps)
+# ---------------------------------------------------------
+@dataclass
+class DependencySnapshot:
+    signatures: Dict[str, str] = field(default_factory=dict)    # "Class.method" → signature
+    steps: Dict[str, List[str]] = field(default_factory=dict)   # step pattern → "Class.method" list
+    files: List[str] = field(default_factory=list)              # step files written by the last run
+
+    @staticmethod
+    def load(path: str) -> Optional["DependencySnapshot"]:
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return DependencySnapshot(data.get("signatures", {}), data.get("steps", {}), data.get("files", []))
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"signatures": self.signatures, "steps": self.steps, "files": self.files},
+                      f, indent=2, sort_keys=True)
+
+
+def build_snapshot(step_file: StepFile, poms: List[PomClass], files: List[str]) -> DependencySnapshot:
+    return DependencySnapshot(method_signatures(poms), step_dependencies(step_file), list(files))
+
+# ---------------------------------------------------------
+# STALENESS
+# ---------------------------------------------------------
+@dataclass
+class StaleReport:
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    stale: Dict[str, List[str]] = field(default_factory=dict)   # step pattern → reasons
+    steps: int = 0
+    baseline: bool = True
+
+    def summary(self) -> str:
+        lines = [f"🔎 POM methods: {len(self.added)} added, {len(self.removed)} removed, "
+                 f"{len(self.changed)} re-signatured"
+                 + ("" if self.baseline else " (no previous snapshot, checking calls only)"),
+                 f"🧾 Stale steps: {len(self.stale)} of {self.steps}"]
+        for pattern, reasons in self.stale.items():
+            lines.append(f"  STALE '{pattern}': {'; '.join(reasons)}")
+        return "\n".join(lines)
+
+
+def find_stale_steps(step_file: StepFile, snapshot: Optional[DependencySnapshot],
+                     poms: List[PomClass]) -> StaleReport:
+    """
+    Steps calling a POM method that was added, removed or re-signatured
+    since the snapshot, or that does not exist in the current POMs.
+    """
+    current = method_signatures(poms)
+    previous = snapshot.signatures if snapshot else current
+    report = StaleReport(
+        added=sorted(set(current) - set(previous)),
+        removed=sorted(set(previous) - set(current)),
+        changed=sorted(m for m in set(current) & set(previous) if current[m] != previous[m]),
+        steps=len(step_file.steps),
+        baseline=snapshot is not None
+    )
+    known_classes = {pom.name for pom in poms}
+
+    for pattern, calls in step_dependencies(step_file).items():
+        reasons = []
+        for call in calls:
+            if call in report.removed:
+                reasons.append(f"{call} removed")
+            elif call in report.changed:
+                reasons.append(f"{call} changed: {previous[call]} → {current[call]}")
+            elif call in report.added:
+                reasons.append(f"{call} added")
+            elif call not in current and call.split(".")[0] in known_classes:
+                reasons.append(f"{call} does not exist")
+        if reasons:
+            report.stale[pattern] = reasons
+    return report
+
+
+def without_steps(step_file: StepFile, patterns) -> StepFile:
+    patterns = set(patterns)
+    return StepFile(
+        imports=list(step_file.imports),
+        types=list(step_file.types),
+        accessors=dict(step_file.accessors),
+        steps=[s for s in step_file.steps if s.pattern not in patterns]
+    )
@@ -0,0 +1,254 @@
+# file: step_matcher.py
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from Common.step_definitions import StepDefinition, StepFile
+from Common.typescript_pom import PomClass, PomMethod, split_camel_case
+
+# ---------------------------------------------------------
+# VOCABULARY
+# ---------------------------------------------------------
+STOP_WORDS = {
+    "i", "the", "a", "an", "my", "should", "be", "is", "are", "am", "into", "in",
+    "on", "to", "of", "with", "and", "or", "for", "from", "field", "that", "it",
+    "this", "user", "can", "will", "have", "has", "been", "now"
+}
+
+# Step wording → the word used in POM method names
+SYNONYMS = {
+    "enter": "fill", "type": "fill", "types": "fill", "enters": "fill", "fills": "fill",
+    "provide": "fill", "write": "fill",
+    "press": "click", "presses": "click", "tap": "click", "clicks": "click", "submit": "click",
+    "open": "navigate", "visit": "navigate", "go": "navigate", "goto": "navigate",
+    "navigates": "navigate", "opens": "navigate", "load": "navigate",
+    "see": "visible", "sees": "visible", "displayed": "visible", "shown": "visible",
+    "appear": "visible", "appears": "visible", "visible": "visible",
+    "assert": "verify", "check": "verify", "expect": "verify",
+    "btn": "button", "msg": "message", "pwd": "password",
+}
+
+# Multi-word step phrases folded before tokenizing
+PHRASES = {
+    "user name": "username", "log in": "login", "sign in": "login",
+    "am on": "navigate", "am at": "navigate",
+}
+
+# Method name prefixes that mark verifications (Then steps) and queries (never steps)
+VERIFY_PREFIXES = ("verify", "assert", "expect", "check", "should")
+QUERY_PREFIXES = ("is", "get", "has", "wait")
+
+QUOTED = re.compile(r'"[^"]*"')
+# Cucumber expression syntax that a literal step text cannot contain
+EXPRESSION_SPECIALS = re.compile(r"[(){}/\\]")
+
+DEFAULT_THRESHOLD = 0.55
+DEFAULT_MARGIN = 0.1
+
+# ---------------------------------------------------------
+# TOKENIZING
+# ---------------------------------------------------------
+def _normalize_tokens(words: List[str]) -> List[str]:
+    tokens = []
+    for word in words:
+        word = SYNONYMS.get(word, word)
+        if word and word not in STOP_WORDS:
+            tokens.append(word)
+    return tokens
+
+
+def step_tokens(text: str) -> List[str]:
+    text = " " + QUOTED.sub(" ", text).lower() + " "
+    for phrase, replacement in PHRASES.items():
+        text = text.replace(f" {phrase} ", f" {replacement} ")
+    return _normalize_tokens(re.findall(r"[a-z0-9]+", text))
+
+
+def method_tokens(method: PomMethod) -> List[str]:
+    words = split_camel_case(method.name)
+    if words and words[0] in VERIFY_PREFIXES:
+        words = words[1:]  # implied by the Then keyword
+    return _normalize_tokens(words)
+
+
+def method_kind(method: PomMethod) -> Optional[str]:
+    first = (split_camel_case(method.name) or [""])[0]
+    if first in VERIFY_PREFIXES:
+        return "Then"
+    if first in QUERY_PREFIXES or method.name.startswith("_") or "private" in method.modifiers:
+        return None
+    return "When"
+
+# ---------------------------------------------------------
+# MATCHING
+# ---------------------------------------------------------
+@dataclass
+class Candidate:
+    pom: PomClass
+    method: PomMethod
+    kind: str
+    tokens: List[str]
+    vector: Dict[str, float] = field(default_factory=dict)
+    norm: float = 0.0
+
+
+@dataclass
+class StepMatch:
+    text: str
+    kind: str
+    candidate: Optional[Candidate] = None
+    score: float = 0.0
+    runner_up: float = 0.0
+    reason: str = ""
+
+    @property
+    def confident(self) -> bool:
+        return self.candidate is not None and not self.reason
+
+
+class StepMatcher:
+    """
+    Scores Gherkin step texts against POM methods with TF-IDF weighted
+    cosine similarity over tokenized camelCase names. Only matches with
+    the right kind and arity, a high score and a clear lead over the
+    runner-up are considered confident.
+    """
+
+    def __init__(self, poms: List[PomClass], threshold: float = DEFAULT_THRESHOLD,
+                 margin: float = DEFAULT_MARGIN):
+        self.threshold = threshold
+        self.margin = margin
+        self.candidates: List[Candidate] = []
+
+        seen = set()
+        for pom in poms:
+            for method in pom.methods:
+                kind = method_kind(method)
+                tokens = method_tokens(method)
+                # verifyX / assertX duplicates: the first declared one wins
+                key = (pom.name, kind, tuple(sorted(tokens)), len(method.params))
+                if kind is None or not tokens or key in seen:
+                    continue
+                seen.add(key)
+                self.candidates.append(Candidate(pom, method, kind, tokens))
+
+        documents = len(self.candidates) or 1
+        frequency = Counter(t for c in self.candidates for t in set(c.tokens))
+        self.idf = {t: math.log((1 + documents) / (1 + n)) + 1.0 for t, n in frequency.items()}
+        for candidate in self.candidates:
+            candidate.vector = self._vector(candidate.tokens)
+            candidate.norm = math.sqrt(sum(w * w for w in candidate.vector.values()))
+
+    def _vector(self, tokens: List[str]) -> Dict[str, float]:
+        counts = Counter(tokens)
+        # Words no method uses carry the weight of the rarest method word
+        unseen = max(self.idf.values(), default=1.0)
+        return {t: n * self.idf.get(t, unseen) for t, n in counts.items()}
+
+    def match(self, text: str, kind: str) -> StepMatch:
+        result = StepMatch(text=text, kind=kind)
+        if EXPRESSION_SPECIALS.search(QUOTED.sub("", text)) or "<" in QUOTED.sub("", text):
+            result.reason = "needs a custom expression"
+            return result
+
+        arity = len(QUOTED.findall(text))
+        expected_kind = "Then" if kind == "Then" else "When"
+        vector = self._vector(step_tokens(text))
+        norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+
+        scored: List[Tuple[float, Candidate]] = []
+        for candidate in self.candidates:
+            if candidate.kind != expected_kind or len(candidate.method.params) != arity:
+                continue
+            dot = sum(w * candidate.vector.get(t, 0.0) for t, w in vector.items())
+            # Every method word should be in the step, not just some of them
+            coverage = sum(candidate.vector[t] for t in candidate.vector if t in vector) / sum(candidate.vector.values())
+            scored.append((dot / (norm * candidate.norm) * coverage, candidate))
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+        if not scored:
+            result.reason = "no method with this kind and arity"
+            return result
+
+        result.score, result.candidate = scored[0]
+        result.runner_up = scored[1][0] if len(scored) > 1 else 0.0
+        if result.score < self.threshold:
+            result.reason = "low similarity"
+        elif result.score - result.runner_up < self.margin:
+            result.reason = "ambiguous"
+        return result
+
+# ---------------------------------------------------------
+# EMITTING
+# ---------------------------------------------------------
+# Same header the step generation prompt asks for
+FIXTURES_IMPORT = "import { Given, When, Then } from '../../support/fixtures';"
+PAGE_OBJECTS_DIR = "../../../pageobjects"
+FIXTURE_CONTEXT_TYPE = "type FixtureContext = {\n  pageManager: PageManager;\n};"
+
+
+def page_import(class_name: str) -> str:
+    return f"import {{ {class_name} }} from '{PAGE_OBJECTS_DIR}/{class_name}';"
+
+
+def accessor_name(pom: PomClass) -> str:
+    return pom.name[0].lower() + pom.name[1:]
+
+
+def accessor_source(pom: PomClass) -> str:
+    name = accessor_name(pom)
+    return (f"const {name} = (pageManager: PageManager): {pom.name} =>\n"
+            f"  pageManager.get{pom.name}();")
+
+
+def step_expression(text: str) -> str:
+    return QUOTED.sub("{string}", text).replace("'", "\\'")
+
+
+def build_step_definition(match: StepMatch) -> StepDefinition:
+    candidate = match.candidate
+    accessor = accessor_name(candidate.pom)
+    params = [name for name, _ in candidate.method.params]
+    signature = "".join(f", {name}: string" for name in params)
+    pattern = step_expression(match.text)
+    keyword = "Then" if match.kind == "Then" else ("Given" if match.kind == "Given" else "When")
+    source = (
+        f"{keyword}('{pattern}', async ({{ pageManager }}: FixtureContext{signature}) => {{\n"
+        f"  await {accessor}(pageManager).{candidate.method.name}({', '.join(params)});\n"
+        f"}});"
+    )
+    return StepDefinition(keyword=keyword, pattern=pattern, source=source, accessors=[accessor])
+
+
+def match_steps(steps: List[Tuple[str, str]], poms: List[PomClass],
+                threshold: float = DEFAULT_THRESHOLD, margin: float = DEFAULT_MARGIN):
+    """
+    Matches (kind, text) feature steps against the POM methods.
+
+    Returns a StepFile with the confident matches and the StepMatch list
+    of steps left for the LLM.
+    """
+    matcher = StepMatcher(poms, threshold, margin)
+    step_file = StepFile(imports=[FIXTURES_IMPORT, page_import("PageManager")], types=[FIXTURE_CONTEXT_TYPE])
+    unresolved = []
+    patterns = set()
+
+    for kind, text in steps:
+        match = matcher.match(text, kind)
+        if not match.confident:
+            unresolved.append(match)
+            continue
+        definition = build_step_definition(match)
+        if definition.pattern in patterns:
+            continue
+        patterns.add(definition.pattern)
+        step_file.steps.append(definition)
+        pom = match.candidate.pom
+        if accessor_name(pom) not in step_file.accessors:
+            step_file.accessors[accessor_name(pom)] = accessor_source(pom)
+            step_file.imports.append(page_import(pom.name))
+
+    return step_file, unresolved
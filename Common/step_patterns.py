@@ -0,0 +1,199 @@
+# file: step_patterns.py
+
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from Common.step_definitions import STEP_CALL, parse_step_file
+from Common.structured_output import (
+    STEP_PATTERN_CATEGORIES, STEP_PATTERNS_SCHEMA, conform, merge_structured, parse_json_output
+)
+from Common.token_budget import ContextBudget
+
+# ---------------------------------------------------------
+# CONFIGURATION
+# ---------------------------------------------------------
+STEP_FILE_EXTENSIONS = (".ts", ".js", ".mjs", ".cjs", ".txt")
+SKIPPED_DIRS = {"node_modules", ".git", "dist", "build", ".venv"}
+
+# Bump when the extraction prompt or schema changes so cached patterns are rebuilt
+PATTERN_VERSION = "1"
+
+# ---------------------------------------------------------
+# DISCOVERY
+# ---------------------------------------------------------
+def step_files(paths: Iterable[str]) -> List[str]:
+    """
+    Explicit files as given; directories are searched for source files
+    that define Given/When/Then steps.
+    """
+    files = []
+    for path in paths:
+        if os.path.isfile(path):
+            files.append(path)
+            continue
+        for root, dirs, names in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if d not in SKIPPED_DIRS)
+            for name in sorted(names):
+                if not name.endswith(STEP_FILE_EXTENSIONS) or name.endswith(".d.ts"):
+                    continue
+                full = os.path.join(root, name)
+                with open(full, "r", encoding="utf-8", errors="ignore") as f:
+                    if STEP_CALL.search(f.read()):
+                        files.append(full)
+    return sorted(dict.fromkeys(os.path.abspath(f) for f in files))
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(f"{PATTERN_VERSION}\n{text}".encode("utf-8")).hexdigest()
+
+# ---------------------------------------------------------
+# CACHE (content hash → extracted patterns)
+# ---------------------------------------------------------
+class PatternCache:
+    """
+    Per-file extraction results keyed by content hash and model, plus the
+    last reduce result, stored in one JSON file. Unchanged (or moved)
+    files are never sent to the model again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.files: Dict[str, dict] = {}
+        self.reduce: Dict[str, str] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.files = data.get("files", {})
+            self.reduce = data.get("reduce", {})
+
+    @staticmethod
+    def key(sha: str, model: str) -> str:
+        return f"{model.strip()}:{sha}"
+
+    def get(self, sha: str, model: str) -> Optional[dict]:
+        return self.files.get(self.key(sha, model))
+
+    def put(self, sha: str, model: str, patterns: dict):
+        self.files[self.key(sha, model)] = patterns
+
+    def prune(self, keys: Iterable[str]):
+        keep = set(keys)
+        self.files = {k: v for k, v in self.files.items() if k in keep}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"files": self.files, "reduce": self.reduce}, f, indent=1)
+
+# ---------------------------------------------------------
+# MAP: patterns per file (parallel, cached)
+# ---------------------------------------------------------
+def extract_file_patterns(text: str, llm, prompt: str) -> Tuple[dict, List[str]]:
+    """
+    (structured patterns, answers that were not JSON) for one file,
+    chunked by the model's context window.
+    """
+    budget = ContextBudget(llm.model, prompt)
+    parsed, raw = [], []
+    for inputs in budget.plan({"steps": text}, "steps"):
+        output = llm.invoke(prompt.format(**inputs)).content
+        data = parse_json_output(output)
+        if data is None:
+            raw.append(output.strip())
+        else:
+            parsed.append(data)
+    return merge_structured(parsed, STEP_PATTERNS_SCHEMA), raw
+
+
+def extract_patterns(files: List[str], llm, prompt: str, cache: PatternCache,
+                     workers: int = 8, refresh: bool = False):
+    """
+    Returns ({file: patterns}, raw answers, files extracted, files reused).
+    Only files whose content hash is not cached are sent to the model.
+    """
+    texts, hashes = {}, {}
+    for path in files:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            texts[path] = f.read()
+        hashes[path] = content_hash(texts[path])
+
+    model = str(llm.model)
+    results = {path: cache.get(hashes[path], model) for path in files} if not refresh else {}
+    pending = [path for path in files if results.get(path) is None]
+    reused = len(files) - len(pending)
+
+    raw: List[str] = []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(pending) or 1))) as executor:
+        for path, (patterns, answers) in zip(pending, executor.map(
+                lambda p: extract_file_patterns(texts[p], llm, prompt), pending)):
+            raw.extend(answers)
+            results[path] = patterns
+            # Answers that were not JSON are not cached, the file is retried next run
+            if not answers:
+                cache.put(hashes[path], model, patterns)
+
+    cache.prune(cache.key(hashes[path], model) for path in files)
+    return results, raw, len(pending), reused
+
+# ---------------------------------------------------------
+# REDUCE: one ranked pattern set + measured statistics
+# ---------------------------------------------------------
+def reduce_patterns(per_file: Dict[str, dict]):
+    """
+    Merged patterns with rules found in most files first, and
+    category → rule identity → number of files it appears in.
+    """
+    counts: Dict[str, Counter] = {key: Counter() for key in STEP_PATTERN_CATEGORIES}
+    for patterns in per_file.values():
+        patterns = conform(patterns, STEP_PATTERNS_SCHEMA)
+        for key in STEP_PATTERN_CATEGORIES:
+            counts[key].update({rule.lower() for rule in patterns[key] if rule})
+
+    merged = merge_structured(list(per_file.values()), STEP_PATTERNS_SCHEMA)
+    for key in STEP_PATTERN_CATEGORIES:
+        merged[key] = sorted((r for r in merged[key] if r), key=lambda r: -counts[key][r.lower()])
+    return merged, {key: dict(counter) for key, counter in counts.items()}
+
+
+PLACEHOLDER = re.compile(r"\{(\w*)\}")
+
+
+def _most_common(counter: Counter, n: int = 8) -> str:
+    return ", ".join(f"{name} {count}" for name, count in counter.most_common(n)) or "none"
+
+
+def measured_statistics(files: List[str]) -> str:
+    """
+    Facts counted locally from the parsed step files (no model involved).
+    """
+    keywords, parameters, accessors = Counter(), Counter(), Counter()
+    steps = 0
+    for path in files:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            step_file = parse_step_file(f.read())
+        for step in step_file.steps:
+            steps += 1
+            keywords[step.keyword] += 1
+            parameters.update(name or "anonymous" for name in PLACEHOLDER.findall(step.pattern))
+            accessors.update(step.accessors)
+
+    if not steps:
+        return ""
+    return "\n".join([
+        f"Measured over {steps} step definitions in {len(files)} file(s):",
+        f"- Keywords: {_most_common(keywords)}",
+        f"- Parameter types: {_most_common(parameters)}",
+        f"- Page accessors used most: {_most_common(accessors)}",
+    ])
+
+
+def reduce_key(*parts: str) -> str:
+    """
+    Hash of everything the final prompt depends on (model, template, patterns).
+    """
+    return hashlib.sha256("\n\0".join(parts).encode("utf-8")).hexdigest()
@@ -0,0 +1,250 @@
+# file: structured_output.py
+
+import json
+import re
+from typing import Callable, Dict, List, Optional
+
+# ---------------------------------------------------------
+# SCHEMAS (passed to ChatOllama(format=...) for JSON-schema output)
+# ---------------------------------------------------------
+_STRING = {"type": "string"}
+_STRINGS = {"type": "array", "items": _STRING}
+
+PAGE_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "page": _STRING,
+        "purpose": _STRING,
+        "elements": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": _STRING,
+                    "kind": {"type": "string", "enum": ["input", "button", "link", "checkbox", "select",
+                                                       "text", "message", "image", "other"]},
+                    "label": _STRING,
+                },
+                "required": ["name", "kind"],
+            },
+        },
+        "actions": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": _STRING,
+                    "kind": {"type": "string", "enum": ["navigation", "action", "composite"]},
+                    "params": _STRINGS,
+                    "elements": _STRINGS,
+                },
+                "required": ["name", "kind"],
+            },
+        },
+        "verifications": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": _STRING,
+                    "params": _STRINGS,
+                    "elements": _STRINGS,
+                },
+                "required": ["name"],
+            },
+        },
+        "flows": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": _STRING,
+                    "kind": {"type": "string", "enum": ["valid", "invalid", "edge"]},
+                    "steps": _STRINGS,
+                    "outcome": _STRING,
+                },
+                "required": ["name", "kind", "steps"],
+            },
+        },
+    },
+    "required": ["page", "elements", "actions", "verifications", "flows"],
+}
+
+STEP_MAPPING_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "mappings": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "keyword": {"type": "string", "enum": ["Given", "When", "Then"]},
+                    "step": _STRING,            # step expression with {string} placeholders
+                    "kind": {"type": "string", "enum": ["navigation", "action", "verification"]},
+                    "page": _STRING,            # Page Object class
+                    "method": _STRING,
+                    "args": _STRINGS,
+                },
+                "required": ["keyword", "step", "method"],
+            },
+        },
+        "unmapped": _STRINGS,                   # steps without a matching POM method
+    },
+    "required": ["mappings"],
+}
+
+# Conventions extracted from one step definition file
+STEP_PATTERN_CATEGORIES = {
+    "naming": "Naming conventions",
+    "grammar": "Step grammar patterns",
+    "parameters": "Parameter styles",
+    "reuse": "Reusability rules",
+    "separation": "Action vs verification separation",
+    "pom_interaction": "Page Object interaction rules",
+}
+
+STEP_PATTERNS_SCHEMA = {
+    "type": "object",
+    "properties": {key: _STRINGS for key in STEP_PATTERN_CATEGORIES},
+    "required": list(STEP_PATTERN_CATEGORIES),
+}
+
+# Added to analysis prompts; the schema itself is enforced by Ollama
+JSON_OUTPUT_RULES = """
+Return ONLY JSON matching the requested schema.
+Use camelCase identifiers for names, at most 12 words for any free text,
+and leave arrays empty instead of guessing.
+"""
+
+# ---------------------------------------------------------
+# PARSING
+# ---------------------------------------------------------
+def parse_json_output(text: str) -> Optional[dict]:
+    """
+    JSON object from a model answer; tolerates code fences and text around it.
+    """
+    text = (text or "").strip()
+    text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text)
+    try:
+        data = json.loads(text)
+    except ValueError:
+        start, end = text.find("{"), text.rfind("}")
+        if start < 0 or end <= start:
+            return None
+        try:
+            data = json.loads(text[start:end + 1])
+        except ValueError:
+            return None
+    return data if isinstance(data, dict) else None
+
+
+def conform(data, schema: dict):
+    """
+    Coerces parsed JSON to the schema shape: missing keys get empty values,
+    items of the wrong type are dropped. Does not reject anything.
+    """
+    kind = schema.get("type")
+    if kind == "object":
+        data = data if isinstance(data, dict) else {}
+        return {key: conform(data.get(key), sub) for key, sub in schema.get("properties", {}).items()}
+    if kind == "array":
+        items = data if isinstance(data, list) else []
+        item_schema = schema.get("items", {})
+        if item_schema.get("type") == "object":
+            items = [i for i in items if isinstance(i, dict)]
+        return [conform(i, item_schema) for i in items]
+    if data is None:
+        return ""
+    return str(data).strip()
+
+
+def _identity(item) -> str:
+    if isinstance(item, dict):
+        return str(item.get("name") or item.get("step") or json.dumps(item, sort_keys=True)).lower()
+    return str(item).lower()
+
+
+def merge_structured(items: List[dict], schema: dict) -> dict:
+    """
+    Merges chunk-level answers: arrays are concatenated without duplicate
+    names, scalars keep the first non-empty value.
+    """
+    merged = conform({}, schema)
+    for item in items:
+        for key, value in conform(item, schema).items():
+            if isinstance(value, list):
+                known = {_identity(v) for v in merged[key]}
+                merged[key].extend(v for v in value if _identity(v) not in known)
+            elif not merged[key]:
+                merged[key] = value
+    return merged
+
+# ---------------------------------------------------------
+# COMPACT RENDERING (input of the second stage)
+# ---------------------------------------------------------
+def _signature(entry: dict) -> str:
+    return f"{entry['name']}({', '.join(entry.get('params', []))})"
+
+
+def render_page_analysis(data: dict) -> str:
+    lines = [f"PAGE: {data['page']}" + (f" — {data['purpose']}" if data["purpose"] else "")]
+    if data["elements"]:
+        lines.append("ELEMENTS:")
+        lines.extend(f"- {e['name']} [{e['kind']}]" + (f" \"{e['label']}\"" if e["label"] else "")
+                     for e in data["elements"])
+    for kind in ("navigation", "action", "composite"):
+        actions = [a for a in data["actions"] if (a["kind"] or "action") == kind]
+        if actions:
+            lines.append(f"{kind.upper()} METHODS: " + "; ".join(_signature(a) for a in actions))
+    if data["verifications"]:
+        lines.append("VERIFICATIONS: " + "; ".join(_signature(v) for v in data["verifications"]))
+    if data["flows"]:
+        lines.append("FLOWS:")
+        for flow in data["flows"]:
+            outcome = f" ⇒ {flow['outcome']}" if flow["outcome"] else ""
+            lines.append(f"- [{flow['kind'] or 'valid'}] {flow['name']}: {' → '.join(flow['steps'])}{outcome}")
+    return "\n".join(lines)
+
+
+def render_step_mapping(data: dict) -> str:
+    lines = []
+    for m in data["mappings"]:
+        target = f"{m['page']}.{m['method']}" if m["page"] else m["method"]
+        lines.append(f"{m['keyword']} {m['step']} → {target}({', '.join(m['args'])})"
+                     + (f" [{m['kind']}]" if m["kind"] else ""))
+    if data["unmapped"]:
+        lines.append("UNMAPPED (no POM method, do not implement): " + "; ".join(data["unmapped"]))
+    return "\n".join(lines)
+
+
+def render_step_patterns(data: dict, counts: Optional[Dict[str, Dict[str, int]]] = None, total: int = 0) -> str:
+    """
+    One section per category; with counts (category → rule → files), each
+    rule shows in how many of the total files it was found.
+    """
+    lines = []
+    for key, title in STEP_PATTERN_CATEGORIES.items():
+        if not data.get(key):
+            continue
+        lines.append(f"{title}:")
+        for rule in data[key]:
+            seen = counts.get(key, {}).get(_identity(rule)) if counts else None
+            lines.append(f"- {rule}" + (f" ({seen}/{total} files)" if seen and total > 1 else ""))
+    return "\n".join(lines)
+
+
+def structured_analysis(outputs: List[str], schema: dict, render: Callable[[dict], str]) -> str:
+    """
+    Parses, merges and renders the answers of a structured analysis stage.
+    Answers that are not valid JSON are passed through as text.
+    """
+    parsed: List[Dict] = []
+    raw: List[str] = []
+    for output in outputs:
+        data = parse_json_output(output)
+        if data is None:
+            raw.append(output.strip())
+        else:
+            parsed.append(data)
+    parts = [render(merge_structured(parsed, schema))] if parsed else []
+    return "\n\n".join(parts + raw)
@@ -0,0 +1,244 @@
+# file: token_budget.py
+
+import itertools
+import math
+import re
+from typing import Dict, Iterable, Iterator, List, Optional
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional, a character estimate is used instead
+    tiktoken = None
+
+# ---------------------------------------------------------
+# MODEL CONTEXT WINDOWS (tokens)
+# ---------------------------------------------------------
+
+# Local models run with Ollama's num_ctx, which is far below their native
+# window unless raised explicitly; chat_model() (Common/ollama_hosts.py)
+# passes these as num_ctx, so a budgeted prompt is never cut by the server.
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-oss:120b-cloud": 131072,
+    "deepseek-v3.1:671b-cloud": 131072,
+    "qwen2.5:14b": 8192,
+    "qwen2.5:32b": 8192,
+    "qwen2.5-coder:14b": 8192,
+    "qwen2.5-coder:32b": 8192,
+    "llama3.2": 8192,
+    "qwen2.5": 8192,
+    "gemma3:12b": 8192,
+}
+
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Tokens kept free for the model's answer
+DEFAULT_OUTPUT_RESERVE = 4096
+
+# Character estimate when tiktoken is not installed (code and HTML are dense)
+CHARS_PER_TOKEN = 3.5
+
+# ---------------------------------------------------------
+# TOKEN COUNTING
+# ---------------------------------------------------------
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    global _encoding
+    if not text:
+        return 0
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding("o200k_base")
+        return len(_encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def context_window(model_name: str) -> int:
+    return MODEL_CONTEXT_WINDOWS.get(model_name.strip(), DEFAULT_CONTEXT_WINDOW)
+
+# ---------------------------------------------------------
+# CHUNKING
+# ---------------------------------------------------------
+def _split_units(text: str) -> List[str]:
+    # Blank lines separate paragraphs, scenarios, methods and step blocks
+    units = [u for u in re.split(r"\n\s*\n", text) if u.strip()]
+    return units or [text]
+
+
+def _hard_split(unit: str, max_tokens: int) -> List[str]:
+    pieces = []
+    current = []
+    current_tokens = 0
+    for line in unit.splitlines():
+        line_tokens = count_tokens(line) + 1
+        if current and current_tokens + line_tokens > max_tokens:
+            pieces.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(line)
+        current_tokens += line_tokens
+    if current:
+        pieces.append("\n".join(current))
+
+    # A single line longer than the budget is cut by characters
+    result = []
+    for piece in pieces:
+        while count_tokens(piece) > max_tokens:
+            cut = max(1, int(max_tokens * CHARS_PER_TOKEN))
+            result.append(piece[:cut])
+            piece = piece[cut:]
+        if piece:
+            result.append(piece)
+    return result
+
+
+def iter_chunks(units: Iterable[str], max_tokens: int) -> Iterator[str]:
+    """
+    Lazily packs units into chunks of at most max_tokens; each chunk is
+    yielded as soon as the next unit no longer fits, so a unit source such
+    as a PDF page generator is only consumed as far as the caller reads.
+    A unit larger than max_tokens is split at line boundaries.
+    """
+    current = []
+    current_tokens = 0
+    for unit in units:
+        unit_tokens = count_tokens(unit)
+        if unit_tokens > max_tokens:
+            if current:
+                yield "\n\n".join(current)
+                current, current_tokens = [], 0
+            yield from _hard_split(unit, max_tokens)
+            continue
+        if current and current_tokens + unit_tokens + 1 > max_tokens:
+            yield "\n\n".join(current)
+            current, current_tokens = [], 0
+        current.append(unit)
+        current_tokens += unit_tokens + 1
+    if current:
+        yield "\n\n".join(current)
+
+
+def pack_units(units: List[str], max_tokens: int) -> List[str]:
+    """
+    Packs whole units (paragraphs, classes, ...) into chunks of at most
+    max_tokens; a unit larger than that is split at line boundaries.
+    """
+    return list(iter_chunks(units, max_tokens))
+
+
+def chunk_text(text: str, max_tokens: int) -> List[str]:
+    """
+    Splits text at paragraph boundaries into chunks of at most max_tokens.
+    """
+    if count_tokens(text) <= max_tokens:
+        return [text]
+    return pack_units(_split_units(text), max_tokens)
+
+def iter_text_chunks(texts: Iterable[str], max_tokens: int) -> Iterator[str]:
+    """
+    Streaming chunk_text over a sequence of texts (e.g. PDF pages): every
+    text is split at paragraph boundaries and the paragraphs are packed
+    across text borders as they arrive.
+    """
+    return iter_chunks(
+        (unit for text in texts if text and text.strip() for unit in _split_units(text)),
+        max_tokens
+    )
+
+# ---------------------------------------------------------
+# BUDGET
+# ---------------------------------------------------------
+class ContextBudget:
+    """
+    Token budget of one prompt: model window minus template and output reserve.
+    """
+
+    def __init__(self, model_name: str, template: str = "",
+                 output_reserve: int = DEFAULT_OUTPUT_RESERVE):
+        self.model_name = model_name
+        self.window = context_window(model_name)
+        self.output_reserve = min(output_reserve, self.window // 2)
+        self.template_tokens = count_tokens(template)
+        self.available = max(256, self.window - self.output_reserve - self.template_tokens)
+
+    def allocate(self, inputs: Dict[str, str],
+                 weights: Optional[Dict[str, float]] = None) -> Dict[str, int]:
+        """
+        Splits the available tokens across inputs proportionally to weights.
+        Inputs smaller than their share keep their full size and the
+        remainder is redistributed to the others.
+        """
+        weights = weights or {}
+        sizes = {name: count_tokens(text) for name, text in inputs.items()}
+        allocation = {}
+        remaining = self.available
+        pending = set(inputs)
+
+        while pending:
+            total_weight = sum(weights.get(n, 1.0) for n in pending)
+            fitted = {
+                n for n in pending
+                if sizes[n] <= remaining * weights.get(n, 1.0) / total_weight
+            }
+            if not fitted:
+                for n in pending:
+                    allocation[n] = int(remaining * weights.get(n, 1.0) / total_weight)
+                break
+            for n in fitted:
+                allocation[n] = sizes[n]
+                remaining -= sizes[n]
+            pending -= fitted
+        return allocation
+
+    def plan(self, inputs: Dict[str, str], chunk_key: str,
+             weights: Optional[Dict[str, float]] = None,
+             units: Optional[Dict[str, List[str]]] = None) -> List[Dict[str, str]]:
+        """
+        Returns one input mapping per prompt call.
+
+        Everything is sent in a single call when it fits. Otherwise the
+        chunk_key input is split into chunks that fit its share, and the
+        other inputs are repeated whole in every call. An other input that
+        alone exceeds its share is sharded too (packing its units, e.g. one
+        POM class each, else paragraphs) and every chunk is sent with every
+        shard, so nothing is dropped.
+        """
+        allocation = self.allocate(inputs, weights)
+        if all(count_tokens(text) <= allocation[name] for name, text in inputs.items()):
+            return [dict(inputs)]
+
+        units = units or {}
+        shards = {}
+        for name, text in inputs.items():
+            if name == chunk_key:
+                continue
+            if count_tokens(text) <= allocation[name]:
+                shards[name] = [text]
+                continue
+            budget = max(1, allocation[name])
+            shards[name] = pack_units(units[name], budget) if units.get(name) else chunk_text(text, budget)
+            print(f"✂️ '{name}' exceeds its {allocation[name]}-token budget for {self.model_name}; "
+                  f"sent in {len(shards[name])} shards (one call per shard and '{chunk_key}' chunk).")
+
+        fixed_tokens = sum(max(count_tokens(s) for s in parts) for parts in shards.values())
+        chunk_budget = max(256, self.available - fixed_tokens)
+        names = list(shards)
+        return [
+            {**dict(zip(names, combination)), chunk_key: chunk}
+            for chunk in chunk_text(inputs[chunk_key], chunk_budget)
+            for combination in itertools.product(*(shards[n] for n in names))
+        ]
+
+    def stream(self, inputs: Dict[str, str], chunk_key: str,
+               texts: Iterable[str]) -> Iterator[Dict[str, str]]:
+        """
+        Lazy plan() for a chunk_key input that arrives piece by piece
+        (e.g. iter_pdf_pages): yields one input mapping per prompt call as
+        soon as its chunk is full, so the first call is sent while later
+        pieces are still being extracted. The other inputs are repeated
+        whole in every call.
+        """
+        fixed_tokens = sum(count_tokens(text) for name, text in inputs.items() if name != chunk_key)
+        chunk_budget = max(256, self.available - fixed_tokens)
+        for chunk in iter_text_chunks(texts, chunk_budget):
+            yield {**inputs, chunk_key: chunk}
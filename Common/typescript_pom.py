@@ -0,0 +1,188 @@
+# file: typescript_pom.py
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# ---------------------------------------------------------
+# MODEL
+# ---------------------------------------------------------
+CLASS_DECL = re.compile(r"(?:export\s+)?class\s+(\w+)[^{]*\{")
+IMPORT_LINE = re.compile(r"^import\s+.*?;?\s*$", re.MULTILINE)
+FIELD_DECL = re.compile(r"^\s*((?:(?:private|protected|public|readonly|static)\s+)*)(\w+)\s*:\s*([\w<>\[\], ]+);", re.MULTILINE)
+LOCATOR_ASSIGN = re.compile(r"this\.(\w+)\s*=\s*(page\.\w+\((?:[^()]|\([^()]*\))*\)(?:\.\w+\((?:[^()]|\([^()]*\))*\))*)\s*;")
+METHOD_DECL = re.compile(r"^\s*((?:(?:private|protected|public|static|async)\s+)*)(\w+)\s*\(([^)]*(?:\{[^}]*\}[^)]*)*)\)\s*(?::\s*([^{]+?))?\s*\{", re.MULTILINE)
+
+# Common camelCase name fragments that identify locator roles
+LOCATOR_ROLE_WORDS = (
+    "input", "button", "link", "text", "label", "title", "table", "dropDown",
+    "dropdown", "checkbox", "radio", "select", "image", "icon", "message", "menu"
+)
+
+
+@dataclass
+class PomMethod:
+    name: str
+    params: List[Tuple[str, str]]
+    return_type: str
+    modifiers: str
+    body: str
+    source: str
+
+    @property
+    def signature(self) -> str:
+        params = ", ".join(f"{n}: {t}" if t else n for n, t in self.params)
+        return_type = self.return_type or ("Promise<void>" if "async" in self.modifiers else "void")
+        return f"{self.name}({params}): {return_type}"
+
+
+@dataclass
+class PomClass:
+    name: str
+    imports: List[str] = field(default_factory=list)
+    fields: Dict[str, Tuple[str, str]] = field(default_factory=dict)   # name → (modifiers, type)
+    locators: Dict[str, str] = field(default_factory=dict)             # name → page.locator(...) expression
+    methods: List[PomMethod] = field(default_factory=list)
+    source: str = ""
+
+    def method(self, name: str) -> Optional[PomMethod]:
+        return next((m for m in self.methods if m.name == name), None)
+
+# ---------------------------------------------------------
+# PARSER
+# ---------------------------------------------------------
+def matching_brace(code: str, open_index: int) -> int:
+    depth = 0
+    i = open_index
+    quote = None
+    while i < len(code):
+        ch = code[i]
+        if quote:
+            if ch == "\\":
+                i += 2
+                continue
+            if ch == quote:
+                quote = None
+        elif code.startswith("//", i):
+            newline = code.find("\n", i)
+            i = len(code) if newline == -1 else newline
+            continue
+        elif code.startswith("/*", i):
+            close = code.find("*/", i + 2)
+            i = len(code) if close == -1 else close + 2
+            continue
+        elif ch in "'\"`":
+            quote = ch
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return len(code) - 1
+
+
+def _parse_params(raw: str) -> List[Tuple[str, str]]:
+    params = []
+    depth = 0
+    current = ""
+    for ch in raw:
+        if ch in "{<[(":
+            depth += 1
+        elif ch in "}>])":
+            depth -= 1
+        if ch == "," and depth == 0:
+            params.append(current)
+            current = ""
+        else:
+            current += ch
+    if current.strip():
+        params.append(current)
+
+    result = []
+    for param in params:
+        name, _, type_ = param.partition(":")
+        name = name.strip().split("=")[0].strip().rstrip("?")
+        if name:
+            result.append((name, " ".join(type_.split())))
+    return result
+
+
+def parse_pom_classes(code: str) -> List[PomClass]:
+    """
+    Parses Playwright page object classes (TypeScript) into fields,
+    locator expressions and method signatures/bodies.
+    """
+    file_imports = [m.group(0).strip() for m in IMPORT_LINE.finditer(code)]
+    classes = []
+    last_end = 0
+
+    for match in CLASS_DECL.finditer(code):
+        if match.start() < last_end:
+            continue  # nested inside a previous class
+        open_index = match.end() - 1
+        close_index = matching_brace(code, open_index)
+        body = code[open_index + 1:close_index]
+
+        # Concatenated corpora: each class owns the imports just above it
+        imports = [m.group(0).strip() for m in IMPORT_LINE.finditer(code, last_end, match.start())]
+        pom = PomClass(name=match.group(1), imports=imports or file_imports,
+                       source=code[match.start():close_index + 1])
+        last_end = close_index + 1
+
+        # Members live at class depth 0; method bodies are skipped
+        position = 0
+        while True:
+            method = METHOD_DECL.search(body, position)
+            if not method:
+                break
+            # Class-level fields between the previous member and this method
+            for field_match in FIELD_DECL.finditer(body, position, method.start()):
+                pom.fields[field_match.group(2)] = (field_match.group(1).strip(), field_match.group(3).strip())
+
+            brace = method.end() - 1
+            end = matching_brace(body, brace)
+            name = method.group(2)
+            if name not in ("if", "for", "while", "switch", "catch", "function"):
+                method_body = body[brace + 1:end]
+                if name == "constructor":
+                    for assign in LOCATOR_ASSIGN.finditer(method_body):
+                        pom.locators[assign.group(1)] = assign.group(2)
+                else:
+                    pom.methods.append(PomMethod(
+                        name=name,
+                        params=_parse_params(method.group(3)),
+                        return_type=(method.group(4) or "").strip(),
+                        modifiers=method.group(1).strip(),
+                        body=method_body,
+                        source=body[method.start():end + 1].strip("\n")
+                    ))
+            position = end + 1
+
+        for field_match in FIELD_DECL.finditer(body, position):
+            pom.fields[field_match.group(2)] = (field_match.group(1).strip(), field_match.group(3).strip())
+
+        classes.append(pom)
+    return classes
+
+# ---------------------------------------------------------
+# NAME HELPERS
+# ---------------------------------------------------------
+def split_camel_case(name: str) -> List[str]:
+    words = re.findall(r"[A-Z]+(?=[A-Z][a-z]|\d|\b)|[A-Z]?[a-z]+|[A-Z]+|\d+", name)
+    return [w.lower() for w in words]
+
+
+def locator_role(name: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    ('prefix', 'input') for inputUsername, ('suffix', 'input') for
+    usernameInput, (None, None) when no role word is found.
+    """
+    lowered = name.lower()
+    for word in LOCATOR_ROLE_WORDS:
+        if lowered.startswith(word.lower()) and len(name) > len(word):
+            return "prefix", word
+        if lowered.endswith(word.lower()) and len(name) > len(word):
+            return "suffix", word
+    return None, None
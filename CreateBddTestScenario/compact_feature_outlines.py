@@ -0,0 +1,49 @@
+# file: compact_feature_outlines.py
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.gherkin import compact_feature_text
+
+# ---------------------------------------------------------
+# PATHS
+# ---------------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+OUTPUT_DIR = os.path.join(BASE_DIR, "Output")
+
+FEATURE_FILE = os.path.join(OUTPUT_DIR, "GeneratedBDD_FromHtml.feature")
+
+# ---------------------------------------------------------
+# RUN
+# ---------------------------------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Collapse scenarios that differ only in literal values into Scenario Outlines."
+    )
+    parser.add_argument("features", nargs="*", default=[FEATURE_FILE],
+                        help="Feature files to compact (rewritten in place)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Report the reduction without writing")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        for path in args.features:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+
+            compacted, report = compact_feature_text(text)
+            print(f"🗜️ {os.path.basename(path)}: {report.summary()}")
+
+            if report.outlines and not args.dry_run:
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(compacted + "\n")
+                print(f"💾 Saved to: {path}")
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
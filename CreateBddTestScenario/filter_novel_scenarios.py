@@ -0,0 +1,63 @@
+# file: filter_novel_scenarios.py
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.scenario_index import DUPLICATE_TAG, filter_novel_text, load_corpus_index
+
+# ---------------------------------------------------------
+# PATHS
+# ---------------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+FEATURE_FILE = os.path.join(BASE_DIR, "Output", "GeneratedBDD_FromHtml.feature")
+CORPUS_PATHS = [os.path.join(BASE_DIR, "Docs", "ExistingBDD.txt")]
+SCENARIO_INDEX_FILE = os.path.join(BASE_DIR, "Output", "ScenarioIndex.json")
+
+# ---------------------------------------------------------
+# RUN
+# ---------------------------------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Remove generated scenarios that already exist in the feature corpus."
+    )
+    parser.add_argument("features", nargs="*", default=[FEATURE_FILE],
+                        help="Generated feature files to filter (rewritten in place)")
+    parser.add_argument("--corpus", nargs="+", default=CORPUS_PATHS,
+                        help="Existing feature files or folders (searched for *.feature)")
+    parser.add_argument("--index", default=SCENARIO_INDEX_FILE,
+                        help="Stored corpus index; only changed corpus files are parsed again")
+    parser.add_argument("--flag", action="store_true",
+                        help=f"Tag duplicates {DUPLICATE_TAG} instead of dropping them")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Report duplicates without writing")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        index = load_corpus_index(args.corpus, args.index)
+
+        for path in args.features:
+            # Generated files are checked against the corpus, never against themselves
+            if os.path.abspath(path) in index.files:
+                print(f"⚠️ {path} is part of the corpus, skipped")
+                continue
+
+            with open(path, "r", encoding="utf-8") as f:
+                text, report = filter_novel_text(f.read(), index, drop=not args.flag)
+            print(f"📄 {path}")
+            print(report.summary())
+
+            if not text.strip():
+                print(f"⚠️ Every scenario in {path} already exists in the corpus, file left unchanged")
+            elif not args.dry_run:
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(text)
+                print(f"💾 Saved to: {path}")
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
@@ -1,9 +1,23 @@
 # file: generate_bdd_from_html.py
 
+import argparse
 import os
-from langchain_ollama import ChatOllama
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.profiling import PROFILER  # first, so --profile also times the imports below
+
 from langchain_core.prompts import PromptTemplate
 
+from Common.feature_sharding import format_shards, shard_feature_text
+from Common.gherkin import compact_feature_text, merge_feature_texts
+from Common.html_reducer import reduce_html_file
+from Common.model_router import ModelRouter, valid_feature, valid_json
+from Common.ollama_hosts import chat_model
+from Common.page_analysis import analyze_page
+from Common.scenario_index import filter_novel_text, load_corpus_index
+from Common.structured_output import PAGE_ANALYSIS_SCHEMA
+from Common.token_budget import ContextBudget
+
 # ---------------------------------------------------------
 # PATHS
 # ---------------------------------------------------------
@@ -15,20 +29,37 @@ OUTPUT_DIR = os.path.join(BASE_DIR, "Output")
 HTML_FILE = os.path.join(DOCS_DIR, "HtmlStructure.txt")
 OUTPUT_FILE = os.path.join(OUTPUT_DIR, "GeneratedBDD_FromHtml.feature")
 
+COST_MODEL_FILE = os.path.join(OUTPUT_DIR, "ScenarioCostModel.json")
+
+# Existing scenarios generated ones are checked against (files or folders of *.feature)
+CORPUS_PATHS = [os.path.join(DOCS_DIR, "ExistingBDD.txt")]
+SCENARIO_INDEX_FILE = os.path.join(OUTPUT_DIR, "ScenarioIndex.json")
+MODEL_STATS_FILE = os.path.join(OUTPUT_DIR, "ModelStats.json")
+
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 # ---------------------------------------------------------
 # LLM MODELS
 # ---------------------------------------------------------
-draft_model = ChatOllama(
-    model="gpt-oss:120b-cloud",
-    temperature=0.3
-)
+# Candidates per stage, small/local first: (model, max input tokens or None).
+# The router sends each call to the fastest model that fits the input and
+# keeps passing validation; the cloud model at the end takes the rest.
+MODEL_ROUTES = {
+    "analyze": [("llama3.2", 2000), ("qwen2.5", 4000), ("gpt-oss:120b-cloud", None)],
+    "generate": [("qwen2.5", 2000), ("gemma3:12b", 3000), ("deepseek-v3.1:671b-cloud", None)],
+}
+
+MODEL_TEMPERATURES = {"analyze": 0.3, "generate": 0.2}
+
 
-refine_model = ChatOllama(
-    model="deepseek-v3.1:671b-cloud",
-    temperature=0.2
-)
+def create_model(model: str, stage: str):
+    # Analysis answers as JSON constrained to PAGE_ANALYSIS_SCHEMA
+    if stage == "analyze":
+        return chat_model(model=model, temperature=MODEL_TEMPERATURES[stage], format=PAGE_ANALYSIS_SCHEMA)
+    return chat_model(model=model, temperature=MODEL_TEMPERATURES[stage])
+
+
+router = ModelRouter(MODEL_STATS_FILE, MODEL_ROUTES, create_model)
 
 # ---------------------------------------------------------
 # LOAD HTML STRUCTURE
@@ -36,31 +67,13 @@ refine_model = ChatOllama(
 def load_html_structure(path: str) -> str:
     if not os.path.exists(path):
         raise FileNotFoundError(f"Missing HTML structure file: {path}")
-    with open(path, "r", encoding="utf-8") as f:
-        return f.read()
+    # Streamed and pruned to a bounded structural summary
+    return reduce_html_file(path)
 
 # ---------------------------------------------------------
 # PROMPTS
 # ---------------------------------------------------------
-ANALYZE_HTML_PROMPT = """
-You are a QA Automation Architect.
-
-Analyze the following HTML or DOM structure and extract:
-- User-visible pages or components
-- Possible user actions
-- Valid interaction flows
-- Invalid and edge-case behaviors
-- Business-relevant user intent
-
-DO NOT write Gherkin.
-DO NOT write code.
-ONLY describe behavioral intent in clear text.
-
-HTML STRUCTURE:
-----------------
-{html}
-----------------
-"""
+# Page analysis (Model 1) uses the shared prompt in Common/page_analysis.py
 
 STRICT_BDD_PROMPT = """
 # BDD Scenario Generator Prompt
@@ -81,36 +94,89 @@ Generate complete, clean Gherkin feature files.
 # ---------------------------------------------------------
 # PIPELINE
 # ---------------------------------------------------------
-def generate_bdd_from_html() -> str:
+def generate_bdd_from_html(refresh_analysis: bool = False) -> str:
     print("📄 Reading HTML structure...")
-    html_text = load_html_structure(HTML_FILE)[:3000]
+    with PROFILER.stage("html read"):
+        html_text = load_html_structure(HTML_FILE)
 
     print("🤖 Step 1: Extracting behavior intent (Model 1)...")
-    analyze_prompt = PromptTemplate.from_template(ANALYZE_HTML_PROMPT)
-    analyze_input = analyze_prompt.format(html=html_text)
-    behavior_description = draft_model.invoke(analyze_input).content
+    with PROFILER.stage("analyze (LLM)"):
+        # Cached per page content and model; the full-size analysis is shared with
+        # pom_creator2models.py, answers of smaller routed models are kept apart
+        draft_model = router.bind("analyze", html_text, valid_json)
+        behavior_description = analyze_page(html_text, draft_model, refresh=refresh_analysis,
+                                            shared_model=MODEL_ROUTES["analyze"][-1][0])
 
     print("🤖 Step 2: Generating STRICT BDD scenarios (Model 2)...")
-    bdd_prompt = PromptTemplate.from_template(STRICT_BDD_PROMPT)
-    final_prompt = bdd_prompt.format(behavior=behavior_description)
-    final_bdd = refine_model.invoke(final_prompt).content
+    with PROFILER.stage("generate (LLM)"):
+        bdd_prompt = PromptTemplate.from_template(STRICT_BDD_PROMPT)
+        refine_model = router.bind("generate", behavior_description, valid_feature)
+        bdd_budget = ContextBudget(refine_model.model, STRICT_BDD_PROMPT)
+        # One feature per page, even when the behavior needed several chunks
+        final_bdd = merge_feature_texts([
+            refine_model.invoke(bdd_prompt.format(**inputs)).content
+            for inputs in bdd_budget.plan({"behavior": behavior_description}, "behavior")
+        ])
 
     return final_bdd.strip()
 
 # ---------------------------------------------------------
 # RUN
 # ---------------------------------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate BDD scenarios from an HTML structure.")
+    parser.add_argument("--no-compact", action="store_true",
+                        help="Keep scenarios that differ only in literal values instead of merging them into outlines")
+    parser.add_argument("--corpus", nargs="+", default=CORPUS_PATHS,
+                        help="Existing feature files or folders; generated scenarios already in them are removed")
+    parser.add_argument("--novelty", choices=["drop", "flag", "off"], default="drop",
+                        help="Drop scenarios duplicating the corpus, only tag them @duplicate, or skip the check")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="Split the output into N runtime-balanced shard files tagged @shard-<n>")
+    parser.add_argument("--refresh-analysis", action="store_true",
+                        help="Re-run the page analysis even if a cached one exists for this page")
+    parser.add_argument("--no-route", action="store_true",
+                        help="Always use the largest model of each stage instead of routing by size and history")
+    parser.add_argument("--profile", action="store_true",
+                        help="Record per-stage cProfile / tracemalloc stats to Output/Profiles")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    router.enabled = not args.no_route
     try:
-        result = generate_bdd_from_html()
+        result = generate_bdd_from_html(refresh_analysis=args.refresh_analysis)
+        if args.novelty != "off":
+            with PROFILER.stage("novelty filter"):
+                index = load_corpus_index(args.corpus, SCENARIO_INDEX_FILE)
+                result, novelty = filter_novel_text(result, index, drop=args.novelty == "drop")
+            print(novelty.summary())
+
+        if not args.no_compact:
+            with PROFILER.stage("outline compaction"):
+                result, report = compact_feature_text(result)
+            print(f"🗜️ Outline compaction: {report.summary()}")
 
         print("\n🎉 GENERATED BDD FROM HTML STRUCTURE:\n")
         print(result)
 
-        with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-            f.write(result)
-
-        print(f"\n💾 BDD saved to: {OUTPUT_FILE}\n")
+        shards, written = [], []
+        if args.shards > 1:
+            with PROFILER.stage("file write"):
+                shards, written = shard_feature_text(result, OUTPUT_FILE, args.shards, COST_MODEL_FILE)
+
+        if written:
+            print(f"\n🧩 Split into {len(written)} shard(s) by estimated runtime:")
+            print(format_shards(shards))
+            for path in written:
+                print(f"💾 Shard saved to: {path}")
+            print()
+        else:
+            with PROFILER.stage("file write"), open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+                f.write(result)
+
+            print(f"\n💾 BDD saved to: {OUTPUT_FILE}\n")
 
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -1,8 +1,21 @@
 # file: generate_bdd_from_pdf.py
 
+import argparse
 import os
-from langchain_ollama import ChatOllama
-from langchain_community.document_loaders import UnstructuredPDFLoader
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.profiling import PROFILER  # first, so --profile also times the imports below
+
+from Common.concurrency import format_limits, limited, set_max_concurrency
+from Common.feature_sharding import format_shards, shard_feature_text
+from Common.gherkin import compact_feature_text, merge_feature_texts, merge_features, parse_features, render_features
+from Common.ollama_hosts import chat_model
+from Common.pdf_extractor import iter_pdf_pages
+from Common.scenario_index import filter_novel_text, load_corpus_index
+from Common.token_budget import ContextBudget
 
 # ---------------------------------------------------------
 # PATHS
@@ -15,28 +28,36 @@ OUTPUT_DIR = os.path.join(BASE_DIR, "Output")
 PDF_FILE = os.path.join(DOCS_DIR, "LoginDocumentation.pdf")
 OUTPUT_FILE = os.path.join(OUTPUT_DIR, "GeneratedBDD_FromPdf.feature")
 
+COST_MODEL_FILE = os.path.join(OUTPUT_DIR, "ScenarioCostModel.json")
+
+# Existing scenarios generated ones are checked against (files or folders of *.feature)
+CORPUS_PATHS = [os.path.join(DOCS_DIR, "ExistingBDD.txt")]
+SCENARIO_INDEX_FILE = os.path.join(OUTPUT_DIR, "ScenarioIndex.json")
+
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 # ---------------------------------------------------------
 # LLM MODELS
 # ---------------------------------------------------------
+# Calls go through per-model AIMD limiters (Common/concurrency.py): parallel
+# requests ramp up until latency degrades or the service throttles
 
 # Model 1 → Extract & normalize requirements
-draft_model = ChatOllama(
+draft_model = limited(chat_model(
     model="gpt-oss:120b-cloud",
     temperature=0.3
-)
+))
 
 # Model 2 → Enforce strict BDD style contract
-refine_model = ChatOllama(
+refine_model = limited(chat_model(
     model="deepseek-v3.1:671b-cloud",
     temperature=0.2
-)
+))
 
 # ---------------------------------------------------------
 # UNIVERSAL BDD PROMPT (STYLE CONTRACT)
 # ---------------------------------------------------------
-BDD_STYLE_PROMPT = """
+STYLE_CONTRACT = """
 You are a Behavior-Driven Development (BDD) expert.
 Generate high-quality Gherkin scenarios following the STRICT style contract below.
 Apply these rules consistently.
@@ -52,7 +73,9 @@ Apply these rules consistently.
 - Use Background for shared Given steps
 - Prefer Scenario Outline + Examples for data-driven flows
 - Steps must be reusable and automation-ready
+"""
 
+BDD_STYLE_PROMPT = STYLE_CONTRACT + """
 ================ REQUIREMENTS ==================
 
 {requirements}
@@ -62,30 +85,34 @@ Apply these rules consistently.
 Generate COMPLETE Gherkin feature files.
 """
 
+# One section of a larger specification (parallel section mode)
+SECTION_BDD_PROMPT = STYLE_CONTRACT + """
+================ REQUIREMENTS SECTION ==================
+
+{requirements}
+
+================ OUTPUT ==================
+
+Generate ONE Gherkin feature covering ONLY this section.
+Name it exactly:
+Feature: {feature_name}
+Output pure Gherkin. No commentary.
+"""
+
 # ---------------------------------------------------------
 # STEP 1: READ PDF
 # ---------------------------------------------------------
-def load_requirements_from_pdf() -> str:
+def load_requirements_from_pdf() -> Iterator[str]:
     if not os.path.exists(PDF_FILE):
         raise FileNotFoundError(f"Missing PDF file: {PDF_FILE}")
 
-    loader = UnstructuredPDFLoader(
-        file_path=PDF_FILE,
-        languages=["eng"]
-    )
-
-    docs = loader.load()
-
-    raw_text = "\n\n".join(doc.page_content.strip() for doc in docs)
-
-    # Prompt-safe size
-    return raw_text[:3000]
+    # Text layer first, OCR only for image-only pages; pages arrive lazily
+    return iter_pdf_pages(PDF_FILE)
 
 # ---------------------------------------------------------
 # STEP 2: NORMALIZE REQUIREMENTS (MODEL 1)
 # ---------------------------------------------------------
-def extract_clean_requirements(raw_text: str) -> str:
-    prompt = f"""
+NORMALIZE_PROMPT = """
 You are a senior QA analyst.
 
 Extract and normalize functional requirements from the text below.
@@ -96,38 +123,195 @@ TEXT:
 {raw_text}
 """
 
-    response = draft_model.invoke(prompt)
-    return response.content.strip()
+def extract_clean_requirements(pages: Iterable[str]) -> str:
+    # Pages are packed into chunks as they are extracted, so the first
+    # model call starts before the rest of the PDF is parsed
+    budget = ContextBudget(draft_model.model, NORMALIZE_PROMPT)
+    parts = []
+
+    for inputs in budget.stream({}, "raw_text", pages):
+        response = draft_model.invoke(NORMALIZE_PROMPT.format(**inputs))
+        parts.append(response.content.strip())
+
+    return "\n\n".join(parts)
 
 # ---------------------------------------------------------
 # STEP 3: GENERATE STRICT BDD (MODEL 2)
 # ---------------------------------------------------------
 def generate_bdd_from_requirements(requirements: str) -> str:
-    prompt = BDD_STYLE_PROMPT.format(requirements=requirements)
-    response = refine_model.invoke(prompt)
-    return response.content.strip()
+    budget = ContextBudget(refine_model.model, BDD_STYLE_PROMPT)
+    features = []
+
+    for inputs in budget.plan({"requirements": requirements}, "requirements"):
+        response = refine_model.invoke(BDD_STYLE_PROMPT.format(**inputs))
+        features.append(response.content)
+
+    # Chunk answers are parts of one feature, not features of their own
+    return merge_feature_texts(features)
+
+# ---------------------------------------------------------
+# STEP 3 (SECTION MODE): PARALLEL PER-SECTION GENERATION
+# ---------------------------------------------------------
+
+# Small sections are packed together so each call has enough context
+MIN_SECTION_CHARS = 800
+
+HEADING_PATTERNS = [
+    re.compile(r"^#{1,6}\s+(.+?)\s*#*$"),
+    re.compile(r"^\*\*(.+?)\*\*:?$"),
+    re.compile(r"^\d+(?:\.\d+)*[.)]?\s+([A-Z].{2,60})$"),
+]
+
+
+def _heading(line: str):
+    stripped = line.strip()
+    for pattern in HEADING_PATTERNS:
+        match = pattern.match(stripped)
+        if match:
+            return match.group(1).strip(" :*")
+    return None
+
+
+def split_sections(requirements: str) -> list:
+    """
+    Splits normalized requirements at headings into (title, text) sections.
+    """
+    sections = []
+    title, lines = "Requirements", []
+
+    for line in requirements.splitlines():
+        heading = _heading(line)
+        if heading and any(l.strip() for l in lines):
+            sections.append((title, "\n".join(lines).strip()))
+            title, lines = heading, []
+        elif heading:
+            title = heading
+        lines.append(line)
+    if any(l.strip() for l in lines):
+        sections.append((title, "\n".join(lines).strip()))
+
+    packed = []
+    for title, text in sections:
+        if packed and len(packed[-1][1]) < MIN_SECTION_CHARS:
+            packed[-1] = (packed[-1][0], packed[-1][1] + "\n\n" + text)
+        else:
+            packed.append((title, text))
+    return packed
+
+
+def _generate_section(title: str, text: str, feature_name: str) -> str:
+    budget = ContextBudget(refine_model.model, SECTION_BDD_PROMPT)
+    outputs = []
+    for inputs in budget.plan({"requirements": text}, "requirements"):
+        prompt = SECTION_BDD_PROMPT.format(feature_name=feature_name or title, **inputs)
+        outputs.append(refine_model.invoke(prompt).content)
+    return merge_feature_texts(outputs, feature_name=feature_name or title)
+
+
+def generate_bdd_by_sections(requirements: str, workers: int = 8, feature_name: str = None) -> str:
+    """
+    Generates scenarios for each requirements section concurrently and
+    merges them locally into one feature (feature_name, else the first
+    section's): equivalent scenarios are dropped and shared Given steps
+    become Background.
+    """
+    sections = split_sections(requirements)
+    print(f"🧩 {len(sections)} sections → up to {min(workers, len(sections))} parallel calls")
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        outputs = list(executor.map(
+            lambda section: _generate_section(section[0], section[1], feature_name),
+            sections
+        ))
+    print(format_limits())
+
+    features = []
+    for output in outputs:
+        features.extend(parse_features(output))
+
+    # One .feature file holds one Feature, so the sections are always merged
+    merged = merge_features(features, feature_name=feature_name or (features[0].name if features else None))
+    scenario_count = sum(len(f.scenarios) for f in merged)
+    print(f"🔗 Merged {len(features)} section feature(s) into '{merged[0].name if merged else '-'}', {scenario_count} unique scenarios")
+    return render_features(merged).strip()
 
 # ---------------------------------------------------------
 # MAIN
 # ---------------------------------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate BDD feature files from a PDF requirements document.")
+    parser.add_argument("--parallel-sections", action="store_true",
+                        help="Generate scenarios per requirements section concurrently and merge them")
+    parser.add_argument("--workers", type=int, default=8,
+                        help="Upper bound of concurrent model calls in section mode; the number in flight "
+                             "adapts to model latency and throttling")
+    parser.add_argument("--feature-name",
+                        help="Name of the merged feature in section mode (default: the first section's feature name)")
+    parser.add_argument("--no-compact", action="store_true",
+                        help="Keep scenarios that differ only in literal values instead of merging them into outlines")
+    parser.add_argument("--corpus", nargs="+", default=CORPUS_PATHS,
+                        help="Existing feature files or folders; generated scenarios already in them are removed")
+    parser.add_argument("--novelty", choices=["drop", "flag", "off"], default="drop",
+                        help="Drop scenarios duplicating the corpus, only tag them @duplicate, or skip the check")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="Split the output into N runtime-balanced shard files tagged @shard-<n>")
+    parser.add_argument("--profile", action="store_true",
+                        help="Record per-stage cProfile / tracemalloc stats to Output/Profiles")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    set_max_concurrency(args.workers)
     try:
         print("📄 Reading requirements from PDF...")
-        raw_requirements = load_requirements_from_pdf()
+        raw_pages = load_requirements_from_pdf()
 
         print("🤖 Model 1: Normalizing requirements...")
-        clean_requirements = extract_clean_requirements(raw_requirements)
+        with PROFILER.stage("pdf load + normalize (LLM)"):
+            clean_requirements = extract_clean_requirements(raw_pages)
 
         print("🤖 Model 2: Generating STRICT BDD scenarios...")
-        bdd_output = generate_bdd_from_requirements(clean_requirements)
+        with PROFILER.stage("generate (LLM)"):
+            if args.parallel_sections:
+                bdd_output = generate_bdd_by_sections(
+                    clean_requirements,
+                    workers=args.workers,
+                    feature_name=args.feature_name
+                )
+            else:
+                bdd_output = generate_bdd_from_requirements(clean_requirements)
+
+        if args.novelty != "off":
+            with PROFILER.stage("novelty filter"):
+                index = load_corpus_index(args.corpus, SCENARIO_INDEX_FILE)
+                bdd_output, novelty = filter_novel_text(bdd_output, index, drop=args.novelty == "drop")
+            print(novelty.summary())
+
+        if not args.no_compact:
+            with PROFILER.stage("outline compaction"):
+                bdd_output, report = compact_feature_text(bdd_output)
+            print(f"🗜️ Outline compaction: {report.summary()}")
 
         print("\n🎉 GENERATED BDD SCENARIOS:\n")
         print(bdd_output)
 
-        with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-            f.write(bdd_output)
-
-        print(f"\n💾 BDD saved to: {OUTPUT_FILE}\n")
+        shards, written = [], []
+        if args.shards > 1:
+            with PROFILER.stage("file write"):
+                shards, written = shard_feature_text(bdd_output, OUTPUT_FILE, args.shards, COST_MODEL_FILE)
+
+        if written:
+            print(f"\n🧩 Split into {len(written)} shard(s) by estimated runtime:")
+            print(format_shards(shards))
+            for path in written:
+                print(f"💾 Shard saved to: {path}")
+            print()
+        else:
+            with PROFILER.stage("file write"), open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+                f.write(bdd_output)
+
+            print(f"\n💾 BDD saved to: {OUTPUT_FILE}\n")
 
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -1,18 +1,31 @@
 # file: generate_bdd_from_pdf.py
 
-from langchain_ollama import ChatOllama
+import argparse
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.profiling import PROFILER  # first, so --profile also times the imports below
+
 from langchain_core.prompts import PromptTemplate
-from langchain_community.document_loaders import UnstructuredPDFLoader
+
+from Common.ollama_hosts import chat_model
+from Common.pdf_extractor import iter_pdf_pages
+from Common.token_budget import ContextBudget
+from Common.gherkin import merge_feature_texts, parse_features, render_features
+from Common.scenario_coverage import EXTENDED_TAG, minimize_features
+from Common.typescript_pom import parse_pom_classes
+
+POM_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "CreatePomPattern", "Output", "PageLogin.ts")
 
 # ---------------------------------------------------------
 #  LLM INITIALIZATION
 # ---------------------------------------------------------
 
 # ⭐ Recommended: DeepSeek Cloud – fastest + highest quality ⭐
-deepseekcloud_llm = ChatOllama(
+deepseekcloud_llm = chat_model(
     #model="deepseek-v3.1:671b-cloud",
     model="gpt-oss:120b-cloud",
-    base_url="http://localhost:11434",
     temperature=0.5
 )
 
@@ -28,12 +41,7 @@ def generate_bdd_test_cases_from_pdf(user_story: str) -> str:
     """
 
     pdf_file = "./Docs/LoginDocumentation.pdf"
-    loader = UnstructuredPDFLoader(
-        file_path=pdf_file,
-        languages=["eng"]
-    )
-    docs = loader.load()
-    requirements_text = "\n\n".join([doc.page_content.strip() for doc in docs])[:2000]
+    pages = iter_pdf_pages(pdf_file)
 
     # STRICT controlled output for consistent Gherkin
     prompt_template = PromptTemplate.from_template(
@@ -75,10 +83,19 @@ def generate_bdd_test_cases_from_pdf(user_story: str) -> str:
         """
     )
 
-    prompt = prompt_template.format(requirements_text=requirements_text)
-    response = deepseekcloud_llm.invoke(prompt)
+    # Large documents are split into chunks that fit the model's context;
+    # pages are chunked as they are extracted, so the first call starts early
+    budget = ContextBudget(deepseekcloud_llm.model, prompt_template.template)
+    results = []
 
-    return response.content if hasattr(response, "content") else str(response)
+    with PROFILER.stage("pdf load + generate (LLM)"):
+        for inputs in budget.stream({}, "requirements_text", pages):
+            prompt = prompt_template.format(**inputs)
+            response = deepseekcloud_llm.invoke(prompt)
+            results.append(response.content if hasattr(response, "content") else str(response))
+
+    # Chunk answers are parts of one feature file
+    return merge_feature_texts(results)
 
 
 # ---------------------------------------------------------
@@ -92,12 +109,7 @@ def generate_single_bdd_test_case_from_pdf(user_story: str) -> str:
     """
 
     pdf_file = "./Docs/LoginDocumentation.pdf"
-    loader = UnstructuredPDFLoader(
-        file_path=pdf_file,
-        languages=["eng"]
-    )
-    docs = loader.load()
-    requirements_text = "\n\n".join([doc.page_content.strip() for doc in docs])[:2000]
+    pages = iter_pdf_pages(pdf_file)
 
     prompt_template = PromptTemplate.from_template(
         """
@@ -133,17 +145,64 @@ def generate_single_bdd_test_case_from_pdf(user_story: str) -> str:
         """
     )
 
-    prompt = prompt_template.format(requirements_text=requirements_text)
-    response = deepseekcloud_llm.invoke(prompt)
+    # ONE scenario → only the first chunk that fits the model's context;
+    # pages after it are never extracted
+    budget = ContextBudget(deepseekcloud_llm.model, prompt_template.template)
+    with PROFILER.stage("pdf load"):
+        chunks = budget.stream({}, "requirements_text", pages)
+        inputs = next(chunks, {"requirements_text": ""})
+        chunks.close()
+        pages.close()
+
+    with PROFILER.stage("generate (LLM)"):
+        prompt = prompt_template.format(**inputs)
+        response = deepseekcloud_llm.invoke(prompt)
 
     return response.content if hasattr(response, "content") else str(response)
 
 
+# ---------------------------------------------------------
+#  MINIMIZE GENERATED SUITE
+# ---------------------------------------------------------
+
+def minimize_bdd(bdd_text: str, pom_paths: list, methods_only: bool = False) -> str:
+    """
+    Keeps a minimal set of scenarios covering every step / POM method and
+    tags the overlapping rest as @extended (excluded from the default run).
+    """
+    poms = []
+    for path in pom_paths:
+        with open(path, "r", encoding="utf-8") as f:
+            poms.extend(parse_pom_classes(f.read()))
+
+    features = parse_features(bdd_text)
+    if not features:
+        return bdd_text
+
+    features, report = minimize_features(features, poms, methods_only=methods_only)
+    print(report.summary() + "\n")
+    return render_features(features)
+
+
 # ---------------------------------------------------------
 #  MAIN ENTRY POINT
 # ---------------------------------------------------------
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate login BDD scenarios from the PDF requirements.")
+    parser.add_argument("--minimize", action="store_true",
+                        help=f"Tag scenarios that add no step / POM method coverage as {EXTENDED_TAG}")
+    parser.add_argument("--methods-only", action="store_true",
+                        help="With --minimize, cover POM methods only")
+    parser.add_argument("--poms", nargs="*", default=[POM_FILE],
+                        help="Page Objects used to map steps to methods")
+    parser.add_argument("--profile", action="store_true",
+                        help="Record per-stage cProfile / tracemalloc stats to Output/Profiles")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = parse_args()
     user_story_input = "Generate BDD test cases from PDF"
 
     try:
@@ -151,6 +210,10 @@ if __name__ == "__main__":
         # result = generate_single_bdd_test_case_from_pdf(user_story_input)
         result = generate_bdd_test_cases_from_pdf(user_story_input)
 
+        if args.minimize:
+            with PROFILER.stage("suite minimization"):
+                result = minimize_bdd(result, args.poms, methods_only=args.methods_only)
+
         print("📄 Generated BDD Test Cases from PDF:\n")
         print(result)
 
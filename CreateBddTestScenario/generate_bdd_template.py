@@ -1,26 +1,40 @@
 # file: pom_creator.py
 
+import argparse
 import os
 import re
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.profiling import PROFILER  # first, so --profile also times the imports below
+
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_ollama import ChatOllama
+
+from Common.ollama_hosts import chat_model
+from Common.page_manager import write_page_manager
+from Common.pom_patch import EDIT_RULES, POM_EDIT_SCHEMA, PatchError, apply_edit_response
+from Common.pom_style_profile import render_style_profile
 
 # ---------------------------------------------------------
 # LLM CONFIGURATION (2 MODELS)
 # ---------------------------------------------------------
-draft_llm = ChatOllama(
+draft_llm = chat_model(
     model="gpt-oss:120b-cloud",
-    base_url="http://localhost:11434",
     temperature=0.25
 )
 
-refine_llm = ChatOllama(
+refine_llm = chat_model(
     model="deepseek-v3.1:671b-cloud",
-    base_url="http://localhost:11434",
     temperature=0.1
 )
 
+# Same model, answering with a JSON edit list for the draft (patch mode)
+refine_patch_llm = chat_model(
+    model=refine_llm.model,
+    temperature=0.1,
+    format=POM_EDIT_SCHEMA
+)
+
 # ---------------------------------------------------------
 # CLASS NAME INFERENCE
 # ---------------------------------------------------------
@@ -36,7 +50,7 @@ def infer_class_name(file_path: str) -> str:
 # DRAFT PROMPT (STRUCTURE + COVERAGE)
 # ---------------------------------------------------------
 draft_prompt = PromptTemplate(
-    input_variables=["class_name", "page_description", "mode"],
+    input_variables=["class_name", "page_description", "mode", "style_profile"],
     template="""
 You are a Senior QA Automation Engineer.
 
@@ -47,12 +61,8 @@ GOALS:
 - Create action, composite, verification, and utility methods
 - Follow clean Playwright architecture
 
-RULES:
-- Use page.locator()
-- Semantic camelCase names
-- Verb-first method naming
-- Output ONLY TypeScript code
-- No markdown, no comments, no explanations
+PROJECT STYLE PROFILE:
+{style_profile}
 
 CLASS NAME:
 {class_name}
@@ -72,24 +82,15 @@ Generate a full Playwright Page Object class.
 # REFINEMENT PROMPT (STRICT BDD + ENTERPRISE RULES)
 # ---------------------------------------------------------
 refine_prompt = PromptTemplate(
-    input_variables=["draft_code", "class_name"],
+    input_variables=["draft_code", "style_profile"],
     template="""
 You are a Principal QA Architect.
 
 Refine the following Playwright Page Object Model to STRICTLY comply with
-BDD-driven enterprise standards.
-
-MANDATORY RULES:
-- Class name MUST be {class_name}
-- camelCase, verb-first methods
-- Private locators only
-- No assertions inside action methods
-- verify... = soft checks
-- assert... = hard expectations
-- No raw locator exposure
-- No navigation mixed with verification
-- Output ONLY TypeScript code
-- No comments, no markdown, no explanations
+the project style profile below.
+
+PROJECT STYLE PROFILE:
+{style_profile}
 
 CODE TO REFINE:
 {draft_code}
@@ -99,58 +100,116 @@ Return the corrected, production-ready Playwright POM.
 """
 )
 
+# Patch mode: only the changes come back, applied locally to the draft
+refine_patch_prompt = PromptTemplate(
+    input_variables=["draft_code", "style_profile"],
+    template="""
+You are a Principal QA Architect.
+
+Review the following Playwright Page Object Model against the project
+style profile below and list ONLY the edits needed to make it comply.
+
+PROJECT STYLE PROFILE:
+{style_profile}
+
+CODE TO REVIEW:
+{draft_code}
+""" + EDIT_RULES
+)
+
 # ---------------------------------------------------------
 # INPUT / OUTPUT
 # ---------------------------------------------------------
 INPUT_FILE = "./Docs/Login.txt"
 OUTPUT_DIR = "./Output"
 
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate a Playwright POM with a draft + refine model pair.")
+    parser.add_argument("--full-refine", action="store_true",
+                        help="Let the refine model rewrite the whole class instead of returning an edit list")
+    parser.add_argument("--profile", action="store_true",
+                        help="Record per-stage cProfile / tracemalloc stats to Output/Profiles")
+    return parser.parse_args()
+
+
+args = parse_args()
+
 if not os.path.exists(INPUT_FILE):
     raise FileNotFoundError(f"{INPUT_FILE} not found")
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-with open(INPUT_FILE, "r", encoding="utf-8") as f:
-    page_description = f.read()
+with PROFILER.stage("html read"):
+    with open(INPUT_FILE, "r", encoding="utf-8") as f:
+        page_description = f.read()
 
 mode = "HTML mode" if "<" in page_description and ">" in page_description else "Description mode"
 class_name = infer_class_name(INPUT_FILE)
 
+# Compiled once from CreatePomPattern/Docs/ExistingPOM.txt and cached
+with PROFILER.stage("template formatting"):
+    style_profile = render_style_profile(class_name)
+
 # ---------------------------------------------------------
 # PIPELINE
 # ---------------------------------------------------------
 
 # Step 1: Draft generation
-draft_chain = draft_prompt | draft_llm | StrOutputParser()
-draft_code = draft_chain.invoke({
-    "class_name": class_name,
-    "page_description": page_description,
-    "mode": mode
-})
-
-# Step 2: Refinement
-refine_chain = refine_prompt | refine_llm | StrOutputParser()
-final_code = refine_chain.invoke({
-    "draft_code": draft_code,
-    "class_name": class_name
-})
+with PROFILER.stage("draft (LLM)"):
+    draft_chain = draft_prompt | draft_llm | StrOutputParser()
+    draft_code = draft_chain.invoke({
+        "class_name": class_name,
+        "page_description": page_description,
+        "mode": mode,
+        "style_profile": style_profile
+    })
+
+# Step 2: Refinement (edit list applied to the draft, full rewrite as fallback)
+final_code = None
+if not args.full_refine:
+    with PROFILER.stage("refine (LLM, patch)"):
+        patch_chain = refine_patch_prompt | refine_patch_llm | StrOutputParser()
+        edit_response = patch_chain.invoke({
+            "draft_code": draft_code,
+            "style_profile": style_profile
+        })
+    try:
+        final_code, edit_count = apply_edit_response(draft_code, edit_response)
+        print(f"🩹 Refinement applied as {edit_count} edit(s) to the draft")
+    except PatchError as e:
+        print(f"⚠️ Edit list could not be applied ({e}), regenerating the full class...")
+
+if final_code is None:
+    with PROFILER.stage("refine (LLM)"):
+        refine_chain = refine_prompt | refine_llm | StrOutputParser()
+        final_code = refine_chain.invoke({
+            "draft_code": draft_code,
+            "style_profile": style_profile
+        })
 
 # ---------------------------------------------------------
 # CLEANUP SAFETY NET
 # ---------------------------------------------------------
-for banned in ["```", "###", "**", "Explanation", "analysis", "markdown"]:
-    final_code = final_code.replace(banned, "")
+with PROFILER.stage("cleanup"):
+    for banned in ["```", "###", "**", "Explanation", "analysis", "markdown"]:
+        final_code = final_code.replace(banned, "")
 
-final_code = final_code.strip()
+    final_code = final_code.strip()
 
 # ---------------------------------------------------------
 # OUTPUT
 # ---------------------------------------------------------
 output_file = os.path.join(OUTPUT_DIR, f"{class_name}.ts")
 
-with open(output_file, "w", encoding="utf-8") as f:
-    f.write(final_code)
+with PROFILER.stage("file write"):
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(final_code)
+
+    # Register the page (and every other page in OUTPUT_DIR) in the lazy PageManager
+    manager_file = write_page_manager(OUTPUT_DIR, [class_name])
 
 print("\n✅ Playwright POM generated successfully (2-model pipeline):\n")
 print(final_code)
-print(f"\n💾 Saved to: {output_file}\n")
+print(f"\n💾 Saved to: {output_file}")
+print(f"🧭 PageManager updated: {manager_file}\n")
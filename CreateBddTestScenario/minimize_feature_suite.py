@@ -0,0 +1,67 @@
+# file: minimize_feature_suite.py
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.gherkin import parse_features, render_features
+from Common.scenario_coverage import EXTENDED_TAG, minimize_features
+from Common.typescript_pom import parse_pom_classes
+
+# ---------------------------------------------------------
+# PATHS
+# ---------------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BASE_DIR)
+
+FEATURE_FILE = os.path.join(BASE_DIR, "Output", "GeneratedBDD_FromHtml.feature")
+POM_FILE = os.path.join(ROOT_DIR, "CreatePomPattern", "Output", "PageLogin.ts")
+
+# ---------------------------------------------------------
+# RUN
+# ---------------------------------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=f"Keep a minimal scenario set covering every POM method and tag the rest {EXTENDED_TAG}."
+    )
+    parser.add_argument("features", nargs="*", default=[FEATURE_FILE],
+                        help="Feature files to minimize (rewritten in place)")
+    parser.add_argument("--poms", nargs="*", default=[POM_FILE],
+                        help="Page Objects used to map steps to methods")
+    parser.add_argument("--methods-only", action="store_true",
+                        help="Cover POM methods only; ignore step wordings that match no method")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Report the core suite without writing")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        poms = []
+        for path in args.poms:
+            with open(path, "r", encoding="utf-8") as f:
+                poms.extend(parse_pom_classes(f.read()))
+
+        features = {}
+        for path in args.features:
+            with open(path, "r", encoding="utf-8") as f:
+                features[path] = parse_features(f.read())
+
+        # Coverage is computed across all files together
+        _, report = minimize_features(
+            [f for parsed in features.values() for f in parsed],
+            poms,
+            methods_only=args.methods_only
+        )
+        print(report.summary())
+
+        if not args.dry_run:
+            for path, parsed in features.items():
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(render_features(parsed))
+                print(f"💾 Saved to: {path}")
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
@@ -0,0 +1,64 @@
+# file: shard_features.py
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.feature_sharding import (
+    CostModel, format_shards, read_timing_report, shard_features, update_cost_model, write_shards
+)
+from Common.gherkin import parse_features
+
+# ---------------------------------------------------------
+# PATHS
+# ---------------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+OUTPUT_DIR = os.path.join(BASE_DIR, "Output")
+
+FEATURE_FILE = os.path.join(OUTPUT_DIR, "GeneratedBDD_FromHtml.feature")
+COST_MODEL_FILE = os.path.join(OUTPUT_DIR, "ScenarioCostModel.json")
+
+# ---------------------------------------------------------
+# RUN
+# ---------------------------------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Split feature files into runtime-balanced shards for parallel Playwright workers."
+    )
+    parser.add_argument("features", nargs="*", default=[FEATURE_FILE],
+                        help="Feature files to shard (each gets its own shard files)")
+    parser.add_argument("--shards", type=int, default=4, help="Number of shard files")
+    parser.add_argument("--timings", nargs="*", default=[],
+                        help="cucumber-js or Playwright JSON reports used to update the cost model")
+    parser.add_argument("--cost-model", default=COST_MODEL_FILE, help="Cost model JSON")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        model = CostModel.load(args.cost_model)
+        parsed = {}
+        for path in args.features:
+            with open(path, "r", encoding="utf-8") as f:
+                parsed[path] = parse_features(f.read())
+
+        if args.timings:
+            all_features = [f for features in parsed.values() for f in features]
+            for report in args.timings:
+                matched = update_cost_model(model, all_features, read_timing_report(report))
+                print(f"⏱️ {os.path.basename(report)}: {matched} scenario timing(s) matched")
+            model.save(args.cost_model)
+            print(f"💾 Cost model saved to: {args.cost_model}")
+
+        for path, features in parsed.items():
+            shards = shard_features(features, args.shards, model)
+            print(f"🧩 {os.path.basename(path)} → {args.shards} shard(s):")
+            print(format_shards(shards))
+            for written in write_shards(shards, path):
+                print(f"💾 Saved to: {written}")
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
@@ -0,0 +1,15 @@
+import { Page } from '@playwright/test';
+import { PageLogin } from './PageLogin';
+
+export class PageManager {
+    private readonly page: Page;
+    private pageLogin?: PageLogin;
+
+    constructor(page: Page) {
+        this.page = page;
+    }
+
+    getPageLogin(): PageLogin {
+        return this.pageLogin ??= new PageLogin(this.page);
+    }
+}
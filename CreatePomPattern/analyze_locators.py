@@ -0,0 +1,53 @@
+# file: analyze_locators.py
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.locator_quality import analyze_pom_locators, format_report, rewrite_pom
+from Common.typescript_pom import parse_pom_classes
+
+# ---------------------------------------------------------
+# PATHS
+# ---------------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+HTML_FILE = os.path.join(BASE_DIR, "Docs", "Login.txt")
+POM_FILE = os.path.join(BASE_DIR, "Output", "PageLogin.ts")
+
+# ---------------------------------------------------------
+# RUN
+# ---------------------------------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Check generated POM locators against the source HTML offline and propose unique alternatives."
+    )
+    parser.add_argument("--pom", default=POM_FILE, help="Generated Page Object (TypeScript)")
+    parser.add_argument("--html", default=HTML_FILE, help="HTML the Page Object was generated from")
+    parser.add_argument("--write", action="store_true",
+                        help="Rewrite flagged locators in the Page Object with the best alternative")
+    parser.add_argument("--output", help="Write the rewritten Page Object here instead of in place")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        with open(args.pom, "r", encoding="utf-8") as f:
+            code = f.read()
+        with open(args.html, "r", encoding="utf-8") as f:
+            html = f.read()
+
+        print("🔍 Evaluating locators against the source HTML...")
+        findings = analyze_pom_locators(parse_pom_classes(code), html)
+        print(format_report(findings))
+
+        if args.write or args.output:
+            path = args.output or args.pom
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(rewrite_pom(code, findings))
+            print(f"\n💾 Rewritten Page Object saved to: {path}")
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
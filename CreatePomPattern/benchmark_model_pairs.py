@@ -0,0 +1,128 @@
+# file: benchmark_model_pairs.py
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.profiling import PROFILER  # first, so --profile also times the imports below
+
+from Common.model_benchmark import (
+    FixtureStore, MissingFixture, PageRun, PairResult, analysis_failures, format_matrix, pom_failures, timed_call
+)
+from Common.ollama_hosts import chat_model
+from Common.page_analysis import PAGE_ANALYSIS_PROMPT
+from Common.pom_style_profile import render_style_profile
+from Common.structured_output import PAGE_ANALYSIS_SCHEMA, merge_structured, parse_json_output, render_page_analysis
+from Common.token_budget import ContextBudget
+from pom_creator2models import (
+    ANALYZE_TEMPERATURE, GENERATE_POM_PROMPT, GENERATE_TEMPERATURE, MODEL_PAIRS,
+    clean_code, infer_class_name, read_page
+)
+
+# ---------------------------------------------------------
+# PATHS
+# ---------------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Fixed corpus: one HTML page and one description page
+CORPUS = [
+    os.path.join(BASE_DIR, "Docs", "Login.txt"),
+    os.path.join(BASE_DIR, "Docs", "ParsedLoginPage.txt"),
+]
+
+FIXTURE_DIR = os.path.join(BASE_DIR, "Docs", "BenchmarkFixtures")
+REPORT_DIR = os.path.join(BASE_DIR, "Output", "Benchmarks")
+
+# ---------------------------------------------------------
+# ONE PAGE THROUGH ONE PAIR (same prompts as pom_creator2models.py)
+# ---------------------------------------------------------
+def run_page(input_file: str, analyze_llm, generate_llm, store: FixtureStore, live: bool, record: bool) -> PageRun:
+    page_name = os.path.basename(input_file)
+    run = PageRun(page_name)
+    mode, page_description = read_page(input_file)
+    class_name = infer_class_name(input_file)
+
+    try:
+        # Analysis is not read from or written to the shared page cache,
+        # every pair has to produce its own
+        responses = []
+        budget = ContextBudget(analyze_llm.model, PAGE_ANALYSIS_PROMPT)
+        for inputs in budget.plan({"page": page_description}, "page"):
+            recording = timed_call(analyze_llm, PAGE_ANALYSIS_PROMPT.format(mode=mode, **inputs), store, live, record)
+            responses.append(recording.response)
+            run.seconds += recording.seconds
+            run.output_tokens += recording.output_tokens
+        run.failures += analysis_failures(responses)
+
+        parsed = [d for d in (parse_json_output(r) for r in responses) if d is not None]
+        raw = [r.strip() for r in responses if parse_json_output(r) is None]
+        pom_contract = "\n\n".join(
+            ([render_page_analysis(merge_structured(parsed, PAGE_ANALYSIS_SCHEMA))] if parsed else []) + raw
+        )
+
+        prompt = GENERATE_POM_PROMPT.format(pom_contract=pom_contract, style_profile=render_style_profile(class_name))
+        recording = timed_call(generate_llm, prompt, store, live, record)
+    except MissingFixture:
+        run.missing = True
+        return run
+
+    run.seconds += recording.seconds
+    run.output_tokens += recording.output_tokens
+    run.generate_seconds = recording.seconds
+    run.generate_tokens = recording.output_tokens
+    code = clean_code(recording.response)
+    run.output_chars = len(code)
+    run.failures += pom_failures(code, class_name)
+    return run
+
+# ---------------------------------------------------------
+# RUN
+# ---------------------------------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Compare analyze/generate model pairs on a fixed page corpus (offline from recorded fixtures by default)."
+    )
+    parser.add_argument("inputs", nargs="*", default=CORPUS, help="Page inputs (default: Docs/Login.txt, Docs/ParsedLoginPage.txt)")
+    parser.add_argument("--pairs", nargs="+", choices=sorted(MODEL_PAIRS), help="Pairs to run (default: all)")
+    parser.add_argument("--live", action="store_true", help="Call the models through Ollama instead of replaying fixtures")
+    parser.add_argument("--record", action="store_true", help="With --live: store the answers as fixtures for offline runs")
+    parser.add_argument("--base-url", help="Single Ollama server for --live (default: the OLLAMA_HOSTS pool)")
+    parser.add_argument("--fixtures", default=FIXTURE_DIR, help="Fixture directory")
+    parser.add_argument("--profile", action="store_true",
+                        help="Record per-stage cProfile / tracemalloc stats to Output/Profiles")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        store = FixtureStore(args.fixtures)
+        source = "live Ollama" if args.live else f"fixtures in {args.fixtures}"
+        print(f"📏 Benchmarking {len(args.inputs)} page(s) against {source}...")
+
+        results = []
+        for name in args.pairs or list(MODEL_PAIRS):
+            analyze_model, generate_model = MODEL_PAIRS[name]
+            analyze_llm = chat_model(model=analyze_model, base_url=args.base_url,
+                                     temperature=ANALYZE_TEMPERATURE, format=PAGE_ANALYSIS_SCHEMA)
+            generate_llm = chat_model(model=generate_model, base_url=args.base_url, temperature=GENERATE_TEMPERATURE)
+
+            result = PairResult(name, analyze_model, generate_model)
+            with PROFILER.stage(f"pair {name}"):
+                for input_file in args.inputs:
+                    result.pages.append(run_page(input_file, analyze_llm, generate_llm, store, args.live, args.record))
+            print(f"✅ {name}: {len(result.measured)}/{len(result.pages)} page(s) measured")
+            results.append(result)
+
+        print("\n" + format_matrix(results) + "\n")
+
+        os.makedirs(REPORT_DIR, exist_ok=True)
+        report_file = os.path.join(REPORT_DIR, f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json")
+        with open(report_file, "w", encoding="utf-8") as f:
+            json.dump({"source": source, "inputs": args.inputs, "pairs": [r.as_dict() for r in results]}, f, indent=2)
+        print(f"💾 Report saved to: {report_file}")
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
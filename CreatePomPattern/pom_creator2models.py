@@ -1,10 +1,26 @@
 # file: pom_creator.py
 
+import argparse
 import os
 import re
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.profiling import PROFILER  # first, so --profile also times the imports below
+
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_ollama import ChatOllama
+
+from Common.html_reducer import reduce_html, reduce_html_file, looks_like_html
+from Common.model_scheduler import DEFAULT_MEMORY_GB, ModelScheduler, Stage
+from Common.ollama_hosts import chat_model, unload_model
+from Common.page_analysis import analyze_page
+from Common.page_manager import write_page_manager
+from Common.pom_style_profile import render_style_profile
+from Common.shared_components import (
+    component_file, ensure_composition, find_shared_components, render_component_usage, set_component_code
+)
+from Common.structured_output import PAGE_ANALYSIS_SCHEMA
+from Common.token_budget import count_tokens
 
 # ---------------------------------------------------------
 # LLM CONFIGURATION
@@ -18,22 +34,33 @@ from langchain_ollama import ChatOllama
 #ANALYZE → deepseek-v3.1 (cloud)
 #GENERATE → qwen2.5-coder (local)
 
+# Pairings compared by benchmark_model_pairs.py: name → (analyze model, generate model)
+MODEL_PAIRS = {
+    "CURRENT": ("gpt-oss:120b-cloud", "deepseek-v3.1:671b-cloud"),
+    "FULL LOCAL 14b": ("qwen2.5:14b", "qwen2.5-coder:14b"),
+    "FULL LOCAL 32b": ("qwen2.5:32b", "qwen2.5-coder:32b"),
+    "BEST QUALITY": ("deepseek-v3.1:671b-cloud", "qwen2.5-coder:32b"),
+}
+
+ANALYZE_TEMPERATURE = 0.3
+GENERATE_TEMPERATURE = 0.05
 
 # Model 1 → HTML / Description ANALYSIS (reasoning)
-analyze_llm = ChatOllama(
+analyze_llm = chat_model(
     #model="deepseek-v3.1:671b-cloud",
     #qwen2.5:32b - best model for analysis
     #qwen2.5:14b
 
     model="gpt-oss:120b-cloud",
-    temperature=0.3
+    temperature=ANALYZE_TEMPERATURE,
+    format=PAGE_ANALYSIS_SCHEMA     # JSON contract instead of free text
 )
 
 # Model 2 → STRICT POM GENERATION (code only)
-generate_llm = ChatOllama(
+generate_llm = chat_model(
     #model="qwen2.5-coder:32b",
     model=" deepseek-v3.1:671b-cloud",  
-    temperature=0.05
+    temperature=GENERATE_TEMPERATURE
 )
 
 # ---------------------------------------------------------
@@ -48,148 +75,269 @@ def infer_class_name(file_path: str) -> str:
     return "Page" + "".join(w.capitalize() for w in words)
 
 # ---------------------------------------------------------
-# ANALYZE PROMPT (NO CODE)
+# GENERATE PROMPT (STRICT FRAMEWORK FORMAT)
 # ---------------------------------------------------------
-ANALYZE_PROMPT = PromptTemplate(
-    input_variables=["page_description", "mode"],
+GENERATE_POM_PROMPT = PromptTemplate(
+    input_variables=["pom_contract", "style_profile"],
     template="""
-You are a Senior QA Automation Architect.
-
-Analyze the following page input and define a STRICT Page Object contract.
-
-RULES:
-- DO NOT generate code
-- DO NOT generate locators
-- DO NOT explain
-- DO NOT add comments
-- DO NOT invent functionality
+You are a Senior QA Automation Engineer.
 
-OUTPUT ONLY:
-- Page purpose
-- Required semantic elements (inputs, buttons, links, messages)
-- Allowed navigation methods
-- Allowed action methods
-- Allowed verification methods
-- Allowed composite methods
+Generate a Playwright Page Object Model (POM) in TypeScript
+that STRICTLY follows the project style profile.
 
-MODE:
-{mode}
+PROJECT STYLE PROFILE (MANDATORY):
+{style_profile}
 
-PAGE CONTENT:
-{page_description}
+USE ONLY THIS POM CONTRACT:
+{pom_contract}
 
 OUTPUT:
-Return ONLY the structured POM contract.
+Generate ONE Playwright Page Object class.
 """
 )
 
-# ---------------------------------------------------------
-# GENERATE PROMPT (STRICT FRAMEWORK FORMAT)
-# ---------------------------------------------------------
-GENERATE_POM_PROMPT = PromptTemplate(
-    input_variables=["class_name", "pom_contract"],
+# Shared blocks (--shared-components): generated once, composed by the pages
+GENERATE_COMPONENT_PROMPT = PromptTemplate(
+    input_variables=["pom_contract", "style_profile", "class_name", "root_selector"],
     template="""
 You are a Senior QA Automation Engineer.
 
-Generate a Playwright Page Object Model (POM) in TypeScript
-that STRICTLY follows BDD-compatible architecture rules.
-
-STRICT RULES (MANDATORY):
-
-1. Naming:
-   - Page class name: {class_name}
-   - camelCase methods
-   - verb-first naming
-
-2. Method structure:
-   - Navigation methods (goto, navigateToX)
-   - Action methods (fillUsername, clickLoginButton)
-   - Composite methods (loginWithCredentials)
-   - Verification methods (verify..., assert...)
-   - Boolean helpers (is..., get...)
-
-3. Encapsulation:
-   - All locators MUST be private
-   - No raw locators exposed
-   - No assertions inside action methods
-
-4. Verification rules:
-   - Soft checks → verify...
-   - Hard expectations → assert...
-
-5. Output rules:
-   - Output ONLY TypeScript code
-   - NO markdown
-   - NO comments
-   - NO explanations
-   - Ready to paste into a real Playwright project
-
-6. Locator rules:
-   - Use page.locator()
-   - Semantic camelCase names
-   - Extract inputs, buttons, links, messages, errors
+Generate a Playwright component object in TypeScript for a block that
+appears on several pages. Follow the project style profile, except:
+- Class name: {class_name}
+- The constructor takes (page: Page) and stores a root locator:
+  this.root = page.locator('{root_selector}');
+- Every element locator is scoped to the root (this.root.locator(...), this.root.getByRole(...))
+- No goto() or navigation methods
 
-USE ONLY THIS POM CONTRACT:
+PROJECT STYLE PROFILE (MANDATORY):
+{style_profile}
+
+USE ONLY THIS COMPONENT CONTRACT:
 {pom_contract}
 
 OUTPUT:
-Generate ONE Playwright Page Object class.
+Generate ONE Playwright component class.
 """
 )
 
+# First line of a component file; unchanged components are not regenerated
+COMPONENT_HEADER = "// shared-component: "
+
 # ---------------------------------------------------------
 # INPUT / OUTPUT
 # ---------------------------------------------------------
 INPUT_FILE = "./Docs/Login.txt"
 OUTPUT_DIR = "./Output"
 
-if not os.path.exists(INPUT_FILE):
-    raise FileNotFoundError(f"{INPUT_FILE} not found")
-
-os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-with open(INPUT_FILE, "r", encoding="utf-8") as f:
-    page_description = f.read()
-
-mode = "HTML mode" if "<" in page_description and ">" in page_description else "Description mode"
-class_name = infer_class_name(INPUT_FILE)
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate Playwright POMs with an analyze + generate model pair.")
+    parser.add_argument("inputs", nargs="*", default=[INPUT_FILE],
+                        help="Page descriptions or HTML files (one POM each)")
+    parser.add_argument("--memory-gb", type=float, default=DEFAULT_MEMORY_GB,
+                        help="Memory available for resident local models; decides how calls are grouped")
+    parser.add_argument("--refresh-analysis", action="store_true",
+                        help="Re-run the page analysis even if a cached one exists for this page")
+    parser.add_argument("--shared-components", action="store_true",
+                        help="Multi-page mode: generate blocks shared by several HTML pages once as "
+                             "Output/Components/*.ts and compose them in the page POMs")
+    parser.add_argument("--profile", action="store_true",
+                        help="Record per-stage cProfile / tracemalloc stats to Output/Profiles")
+    return parser.parse_args()
 
 # ---------------------------------------------------------
-# PIPELINE
+# PIPELINE STAGES (one call per input file each)
 # ---------------------------------------------------------
 
+def read_page(input_file: str):
+    """
+    (mode, page description) with HTML reduced to its structural summary.
+    """
+    if looks_like_html(input_file):
+        return "HTML mode", reduce_html_file(input_file)
+    with open(input_file, "r", encoding="utf-8") as f:
+        return "Description mode", f.read()
+
+
+# Set in multi-page mode: detected components and each page's HTML without them
+components = []
+stripped_pages = {}
+
+
+def page_components(input_file: str) -> list:
+    return [c for c in components if input_file in c.pages]
+
+
 # Phase 1 → ANALYZE
-analyze_chain = ANALYZE_PROMPT | analyze_llm | StrOutputParser()
+def analyze(input_file: str, _, refresh: bool = False) -> dict:
+    with PROFILER.stage("html read"):
+        if input_file in stripped_pages:
+            mode, page_description = "HTML mode", reduce_html(stripped_pages[input_file])
+        else:
+            mode, page_description = read_page(input_file)
+
+    class_name = infer_class_name(input_file)
+
+    # Compiled once from CreatePomPattern/Docs/ExistingPOM.txt and cached
+    with PROFILER.stage("template formatting"):
+        style_profile = render_style_profile(class_name)
+
+    # Shared page analysis (Common/page_analysis.py): cached per page content and
+    # reused by generate_bdd_from_html.py
+    with PROFILER.stage("analyze (LLM)"):
+        pom_contract = analyze_page(page_description, analyze_llm, mode=mode, refresh=refresh)
+
+    usage = render_component_usage(page_components(input_file))
+    if usage:
+        pom_contract += "\n\n" + usage
+
+    return {"class_name": class_name, "style_profile": style_profile, "pom_contract": pom_contract}
 
-pom_contract = analyze_chain.invoke({
-    "page_description": page_description,
-    "mode": mode
-}).strip()
 
 # Phase 2 → GENERATE
-generate_chain = GENERATE_POM_PROMPT | generate_llm | StrOutputParser()
+def generate(input_file: str, page: dict) -> dict:
+    with PROFILER.stage("generate (LLM)"):
+        generate_chain = GENERATE_POM_PROMPT | generate_llm | StrOutputParser()
 
-generated_code = generate_chain.invoke({
-    "class_name": class_name,
-    "pom_contract": pom_contract
-}).strip()
+        page["code"] = generate_chain.invoke({
+            "pom_contract": page["pom_contract"],
+            "style_profile": page["style_profile"]
+        }).strip()
+    return page
 
-# ---------------------------------------------------------
-# CLEANUP (SAFETY NET)
-# ---------------------------------------------------------
-for banned in ["```", "###", "**", "Explanation", "analysis", "markdown"]:
-    generated_code = generated_code.replace(banned, "")
 
-generated_code = generated_code.strip()
+def clean_code(generated_code: str) -> str:
+    for banned in ["```", "###", "**", "Explanation", "analysis", "markdown"]:
+        generated_code = generated_code.replace(banned, "")
+    return generated_code.strip()
+
+
+# CLEANUP (SAFETY NET) + OUTPUT
+def save(input_file: str, page: dict) -> dict:
+    with PROFILER.stage("cleanup"):
+        page["code"] = ensure_composition(clean_code(page["code"]), page_components(input_file))
+
+    page["output_file"] = os.path.join(OUTPUT_DIR, f"{page['class_name']}.ts")
+
+    with PROFILER.stage("file write"):
+        with open(page["output_file"], "w", encoding="utf-8") as f:
+            f.write(page["code"])
+
+    print(f"💾 {input_file} → {page['output_file']}")
+    return page
 
 # ---------------------------------------------------------
-# OUTPUT
+# SHARED COMPONENTS (multi-page mode)
 # ---------------------------------------------------------
-output_file = os.path.join(OUTPUT_DIR, f"{class_name}.ts")
-
-with open(output_file, "w", encoding="utf-8") as f:
-    f.write(generated_code)
+def detect_components(input_files: list):
+    html_files = [f for f in input_files if looks_like_html(f)]
+    if len(html_files) < 2:
+        print("⚠️ --shared-components needs at least two HTML pages, generating pages as usual")
+        return [], {}
+
+    pages = {}
+    for input_file in html_files:
+        with open(input_file, "r", encoding="utf-8", errors="replace") as f:
+            pages[input_file] = f.read()
+    with PROFILER.stage("component detection"):
+        found, stripped = find_shared_components(pages)
+
+    before = sum(count_tokens(reduce_html(html)) for html in pages.values())
+    after = sum(count_tokens(reduce_html(html)) for html in stripped.values())
+    print(f"🧩 {len(found)} shared component(s) across {len(pages)} HTML page(s)")
+    for component in found:
+        print(f"  {component.name} ('{component.root_selector}'): {component.elements} element(s) "
+              f"on {len(component.pages)} page(s)")
+    if found:
+        print(f"🧩 Page inputs: {before} → {after} tokens without the shared blocks")
+    return found, stripped
+
+
+def analyze_component(component, _, refresh: bool = False) -> dict:
+    path = component_file(OUTPUT_DIR, component)
+    if os.path.exists(path) and not refresh:
+        with open(path, "r", encoding="utf-8") as f:
+            code = f.read()
+        if code.startswith(COMPONENT_HEADER + component.signature):
+            print(f"♻️ Reusing {path}")
+            return {"code": code, "reused": True}
+
+    with PROFILER.stage("analyze (LLM)"):
+        pom_contract = analyze_page(component.summary, analyze_llm, refresh=refresh)
+    return {"pom_contract": pom_contract, "style_profile": render_style_profile(component.name), "reused": False}
+
+
+def generate_component(component, result: dict) -> dict:
+    if result["reused"]:
+        return result
+    with PROFILER.stage("generate (LLM)"):
+        generate_chain = GENERATE_COMPONENT_PROMPT | generate_llm | StrOutputParser()
+        code = clean_code(generate_chain.invoke({
+            "pom_contract": result["pom_contract"],
+            "style_profile": result["style_profile"],
+            "class_name": component.name,
+            "root_selector": component.root_selector,
+        }))
+    result["code"] = f"{COMPONENT_HEADER}{component.signature}\n{code}\n"
+    return result
+
+
+def save_component(component, result: dict) -> dict:
+    set_component_code(component, result["code"])
+    if not result["reused"]:
+        path = component_file(OUTPUT_DIR, component)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with PROFILER.stage("file write"):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(result["code"])
+        print(f"💾 {component.name} → {path}")
+    return result
 
-print("\n✅ Playwright POM generated successfully:\n")
-print(generated_code)
-print(f"\n💾 Saved to: {output_file}\n")
+# ---------------------------------------------------------
+# RUN
+# ---------------------------------------------------------
+if __name__ == "__main__":
+    args = parse_args()
+
+    for input_file in args.inputs:
+        if not os.path.exists(input_file):
+            raise FileNotFoundError(f"{input_file} not found")
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    # Local model pairs cannot always stay resident together: the scheduler
+    # runs all analyze calls before all generate calls in that case, and
+    # unloads the analyze model once its stage is done
+    scheduler = ModelScheduler(memory_gb=args.memory_gb, unload=unload_model)
+
+    # Shared blocks first, so the page prompts can list the component methods
+    if args.shared_components:
+        components, stripped_pages = detect_components(args.inputs)
+        if components:
+            _, component_schedule = scheduler.run(components, [
+                Stage("analyze", analyze_llm,
+                      lambda component, _: analyze_component(component, _, refresh=args.refresh_analysis)),
+                Stage("generate", generate_llm, generate_component),
+                Stage("save", None, save_component),
+            ])
+            print(component_schedule.summary())
+
+    pages, schedule = scheduler.run(args.inputs, [
+        Stage("analyze", analyze_llm, lambda input_file, _: analyze(input_file, _, refresh=args.refresh_analysis)),
+        Stage("generate", generate_llm, generate),
+        Stage("save", None, save),
+    ])
+
+    # Register the pages (and every other page in OUTPUT_DIR) in the lazy PageManager
+    with PROFILER.stage("file write"):
+        manager_file = write_page_manager(OUTPUT_DIR, [page["class_name"] for page in pages])
+
+    if len(pages) == 1:
+        print("\n✅ Playwright POM generated successfully:\n")
+        print(pages[0]["code"])
+        print(f"\n💾 Saved to: {pages[0]['output_file']}")
+    else:
+        print(f"\n✅ {len(pages)} Playwright POMs generated successfully")
+    print(schedule.summary())
+    print(f"🧭 PageManager updated: {manager_file}\n")
@@ -1,5 +1,9 @@
 import os
-from langchain_ollama import ChatOllama
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.profiling import PROFILER  # first, so --profile also times the imports below
+
+from Common.ollama_hosts import chat_model
 
 # ---------------------------------------------------------
 # Paths
@@ -21,18 +25,19 @@ def load_file(path):
     with open(path, "r", encoding="utf-8") as f:
         return f.read()
 
-bdd_content = load_file(BDD_FILE)
-pom_content = load_file(POM_FILE)
+with PROFILER.stage("file read"):
+    bdd_content = load_file(BDD_FILE)
+    pom_content = load_file(POM_FILE)
 
 # ---------------------------------------------------------
 # LLM MODELS
 # ---------------------------------------------------------
-draft_model = ChatOllama(
+draft_model = chat_model(
     model="gpt-oss:120b-cloud",
     temperature=0.3
 )
 
-refine_model = ChatOllama(
+refine_model = chat_model(
     model="deepseek-v3.1:671b-cloud",
     temperature=0.2
 )
@@ -99,21 +104,24 @@ NOW produce the final Playwright BDD steps with imports, typing, and correct POM
 # RUN PIPELINE
 # ---------------------------------------------------------
 print("🔥 Step 1: Generating draft step definitions...")
-draft_result = draft_model.invoke(DRAFT_PROMPT)
-draft_text = draft_result.content.strip()
+with PROFILER.stage("draft (LLM)"):
+    draft_result = draft_model.invoke(DRAFT_PROMPT)
+    draft_text = draft_result.content.strip()
 
 print("🔥 Step 2: Refining into real Playwright BDD steps...")
-refine_prompt = REFINE_PROMPT_TEMPLATE.format(draft=draft_text)
-final_result = refine_model.invoke(refine_prompt)
-final_steps = final_result.content.strip()
+with PROFILER.stage("refine (LLM)"):
+    refine_prompt = REFINE_PROMPT_TEMPLATE.format(draft=draft_text)
+    final_result = refine_model.invoke(refine_prompt)
+    final_steps = final_result.content.strip()
 
 # ---------------------------------------------------------
 # SAVE OUTPUT
 # ---------------------------------------------------------
 os.makedirs(STEPS_DIR, exist_ok=True)
 
-with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-    f.write(final_steps)
+with PROFILER.stage("file write"):
+    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+        f.write(final_steps)
 
 print("\n🎉 DONE!")
 print(f"Generated steps saved to:\n➡ {OUTPUT_FILE}")
@@ -1,9 +1,27 @@
 # file: generate_steps_from_feature_and_pom.py
 
+import argparse
 import os
-from langchain_ollama import ChatOllama
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.profiling import PROFILER  # first, so --profile also times the imports below
+
 from langchain_core.prompts import PromptTemplate
 
+from Common.concurrency import format_limits, limited, set_max_concurrency
+from Common.ollama_hosts import chat_model
+from Common.token_budget import ContextBudget
+from Common.gherkin import Feature, Scenario, normalize_text, parse_features, render_feature
+from Common.step_definitions import StepFile, expression_to_regex, merge_step_files, parse_step_file, render_step_file
+from Common.step_dependencies import DependencySnapshot, build_snapshot, find_stale_steps, without_steps
+from Common.step_matcher import DEFAULT_THRESHOLD, match_steps
+from Common.structured_output import (
+    JSON_OUTPUT_RULES, STEP_MAPPING_SCHEMA, render_step_mapping, structured_analysis
+)
+from Common.typescript_pom import parse_pom_classes
+
 # ---------------------------------------------------------
 # PATHS
 # ---------------------------------------------------------
@@ -16,23 +34,29 @@ FEATURE_FILE = os.path.join(DOCS_DIR, "GeneratedBDD_FromHtml.feature")
 POM_FILE = os.path.join(DOCS_DIR, "PageLogin.ts")
 OUTPUT_FILE = os.path.join(OUTPUT_DIR, "GeneratedSteps.ts")
 
+# Step → POM method graph and method signatures of the last run
+DEPENDENCY_FILE = os.path.join(OUTPUT_DIR, "StepDependencies.json")
+
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 # ---------------------------------------------------------
 # LLM MODELS
 # ---------------------------------------------------------
+# Calls go through per-model AIMD limiters (Common/concurrency.py): parallel
+# requests ramp up until latency degrades or the service throttles
 
-# Model 1 → Analyze BDD + POM (structure & intent)
-draft_model = ChatOllama(
+# Model 1 → Analyze BDD + POM (structure & intent), JSON step → method mappings
+draft_model = limited(chat_model(
     model="gpt-oss:120b-cloud",
-    temperature=0.3
-)
+    temperature=0.3,
+    format=STEP_MAPPING_SCHEMA
+))
 
 # Model 2 → Generate STRICT step definitions (framework-compliant)
-refine_model = ChatOllama(
+refine_model = limited(chat_model(
     model="deepseek-v3.1:671b-cloud",
     temperature=0.1
-)
+))
 
 # ---------------------------------------------------------
 # LOAD FILES
@@ -41,7 +65,7 @@ def load_file(path: str) -> str:
     if not os.path.exists(path):
         raise FileNotFoundError(f"Missing file: {path}")
     with open(path, "r", encoding="utf-8") as f:
-        return f.read()[:5000]
+        return f.read()
 
 # ---------------------------------------------------------
 # PROMPTS
@@ -64,11 +88,11 @@ Your responsibilities:
 - DO NOT generate code
 
 ONLY OUTPUT:
-- Navigation step intents
-- Action step intents
-- Verification step intents
-- Valid mapping rules
-
+- mappings: one entry per distinct step with keyword, reusable step text
+  (quoted values replaced by {{string}}), kind (navigation / action /
+  verification), Page Object class, method and argument names
+- unmapped: steps no existing method can implement
+""" + JSON_OUTPUT_RULES + """
 FEATURE FILE:
 ----------------
 {feature}
@@ -160,28 +184,51 @@ Generate STRICT, framework-compliant step definitions now.
 # ---------------------------------------------------------
 # PIPELINE
 # ---------------------------------------------------------
-def generate_steps() -> str:
-    print("📄 Loading feature and Page Object...")
-    feature_text = load_file(FEATURE_FILE)
-    pom_text = load_file(POM_FILE)
+def _without_resolved(data: dict) -> dict:
+    # A step unmapped against one POM shard may be mapped by another shard's answer
+    patterns = [expression_to_regex(m["step"]) for m in data["mappings"]]
+    unmapped = []
+    for step in data["unmapped"]:
+        text = re.sub(r"^(Given|When|Then|And|But)\s+", "", step.strip())
+        if not any(p.match(text) for p in patterns):
+            unmapped.append(step)
+    return dict(data, unmapped=unmapped)
+
+
+def generate_steps(feature_text: str = None, pom_text: str = None) -> str:
+    if feature_text is None or pom_text is None:
+        print("📄 Loading feature and Page Object...")
+        feature_text = load_file(FEATURE_FILE)
+        pom_text = load_file(POM_FILE)
 
     print("🤖 Model 1: Analyzing step intent & mappings...")
     analyze_prompt = PromptTemplate.from_template(ANALYZE_PROMPT)
-    analysis = draft_model.invoke(
-        analyze_prompt.format(
-            feature=feature_text,
-            pom=pom_text
-        )
-    ).content.strip()
+
+    # The feature is chunked if needed; a POM too large for its share is
+    # sent in shards of whole classes, each with every feature chunk
+    analyze_budget = ContextBudget(draft_model.model, ANALYZE_PROMPT)
+    analysis = structured_analysis(
+        [draft_model.invoke(analyze_prompt.format(**inputs)).content
+         for inputs in analyze_budget.plan(
+             {"feature": feature_text, "pom": pom_text},
+             chunk_key="feature",
+             weights={"feature": 1.0, "pom": 1.0},
+             units={"pom": [pom.source for pom in parse_pom_classes(pom_text)]}
+         )],
+        STEP_MAPPING_SCHEMA,
+        lambda data: render_step_mapping(_without_resolved(data))
+    )
 
     print("🤖 Model 2: Generating STRICT step definitions...")
+    generate_budget = ContextBudget(refine_model.model, GENERATE_STEPS_PROMPT)
+    step_chunks = []
 
-    # 🚨 CRITICAL FIX: NEVER use .format() with LLM output
-    safe_prompt = GENERATE_STEPS_PROMPT.replace("{analysis}", analysis)
+    for inputs in generate_budget.plan({"analysis": analysis}, "analysis"):
+        # 🚨 CRITICAL FIX: NEVER use .format() with LLM output
+        safe_prompt = GENERATE_STEPS_PROMPT.replace("{analysis}", inputs["analysis"])
+        step_chunks.append(refine_model.invoke(safe_prompt).content.strip())
 
-    steps_code = refine_model.invoke(
-        safe_prompt
-    ).content.strip()
+    steps_code = "\n\n".join(step_chunks)
 
     # Safety cleanup (extra protection)
     for banned in ["```", "Explanation", "analysis", "markdown"]:
@@ -189,18 +236,221 @@ def generate_steps() -> str:
 
     return steps_code.strip()
 
+# ---------------------------------------------------------
+# SHARDING
+# ---------------------------------------------------------
+def _without_steps(feature: Feature, skip_steps: set) -> Feature:
+    # Scenarios keep only the steps still needing the LLM
+    scenarios = []
+    for scenario in feature.scenarios:
+        steps = [s for s in scenario.steps if normalize_text(s.text) not in skip_steps]
+        if steps:
+            scenarios.append(Scenario(name=scenario.name, keyword=scenario.keyword, tags=scenario.tags,
+                                      steps=steps, examples=scenario.examples))
+    background = [s for s in feature.background if normalize_text(s.text) not in skip_steps]
+    if background and not scenarios:
+        scenarios.append(Scenario(name="Background steps", steps=background))
+        background = []
+    return Feature(name=feature.name, tags=feature.tags, background=background, scenarios=scenarios)
+
+
+def build_shards(feature_paths: list, scenarios_per_shard: int = 0, skip_steps: set = None) -> list:
+    """
+    One shard per feature file, or per group of N scenarios when
+    scenarios_per_shard is set (Background is repeated in every group).
+    Steps in skip_steps (already resolved locally) are left out.
+    """
+    shards = []
+    for path in feature_paths:
+        text = load_file(path)
+        if not scenarios_per_shard and not skip_steps:
+            shards.append(text)
+            continue
+        for feature in parse_features(text):
+            if skip_steps:
+                feature = _without_steps(feature, skip_steps)
+            if not feature.scenarios:
+                continue
+            size = scenarios_per_shard or len(feature.scenarios)
+            for start in range(0, len(feature.scenarios), size):
+                shards.append(render_feature(Feature(
+                    name=feature.name,
+                    tags=feature.tags,
+                    background=feature.background,
+                    scenarios=feature.scenarios[start:start + size]
+                )))
+    return shards
+
+
+def feature_steps(feature_paths: list) -> list:
+    steps = []
+    for path in feature_paths:
+        for feature in parse_features(load_file(path)):
+            steps.extend((step.kind, step.text) for step in feature.background)
+            for scenario in feature.scenarios:
+                steps.extend((step.kind, step.text) for step in scenario.steps)
+    return list(dict.fromkeys(steps))
+
+
+def feature_step_texts(feature_paths: list) -> list:
+    return list(dict.fromkeys(text for _, text in feature_steps(feature_paths)))
+
+
+def match_local_steps(feature_paths: list, pom_text: str, threshold: float = DEFAULT_THRESHOLD,
+                      skip_steps: set = frozenset()):
+    """
+    Resolves trivial steps (one POM call, matching arity) without the LLM.
+    Returns the local step file and the normalized texts it covers.
+    """
+    steps = [(kind, text) for kind, text in feature_steps(feature_paths) if normalize_text(text) not in skip_steps]
+    local, unresolved = match_steps(steps, parse_pom_classes(pom_text), threshold)
+    pending = {normalize_text(m.text) for m in unresolved}
+    resolved = {normalize_text(text) for _, text in steps} - pending
+    print(f"🎯 Matched {len(resolved)} step(s) locally, {len(pending)} left for the models")
+    return local, resolved
+
+
+def generate_sharded_steps(feature_paths: list, pom_paths: list,
+                           workers: int = 8, scenarios_per_shard: int = 0,
+                           local_match: bool = True, threshold: float = DEFAULT_THRESHOLD,
+                           keep: StepFile = None):
+    """
+    Generates step definitions per shard concurrently and merges the shards
+    into one deduplicated registry, checked against the feature steps.
+    With local_match, steps that map directly to a POM method are written
+    without the LLM and only the remaining steps are sharded.
+    With keep (still valid definitions of a previous run), only feature
+    steps none of them matches are generated.
+    """
+    with PROFILER.stage("file read"):
+        pom_text = "\n\n".join(load_file(path) for path in pom_paths)
+
+    step_files = []
+    resolved = set()
+    if keep is not None:
+        regexes = [expression_to_regex(s.pattern) for s in keep.steps]
+        resolved = {normalize_text(t) for t in feature_step_texts(feature_paths) if any(rx.match(t) for rx in regexes)}
+        step_files.append(keep)
+        print(f"♻️ Keeping {len(keep.steps)} definition(s) covering {len(resolved)} feature step(s)")
+
+    if local_match:
+        with PROFILER.stage("local step matching"):
+            local, matched = match_local_steps(feature_paths, pom_text, threshold, skip_steps=resolved)
+        resolved |= matched
+        step_files.append(local)
+
+    with PROFILER.stage("sharding"):
+        shards = build_shards(feature_paths, scenarios_per_shard, skip_steps=resolved)
+    print(f"🧩 {len(shards)} shard(s) from {len(feature_paths)} feature file(s), {len(pom_paths)} POM(s)")
+
+    with PROFILER.stage("generate (LLM)"), ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        outputs = list(executor.map(lambda shard: generate_steps(shard, pom_text), shards))
+    step_files.extend(parse_step_file(code) for code in outputs)
+
+    print("🔗 Merging shards into the step registry...")
+    with PROFILER.stage("registry merge"):
+        registry, report = merge_step_files(
+            step_files,
+            feature_steps=feature_step_texts(feature_paths)
+        )
+    print(report.summary())
+    print(format_limits())
+    return registry, report
+
+
+def load_incremental_base(pom_paths: list):
+    """
+    Definitions of the last run whose POM methods did not change, or None
+    when there is no previous output to build on.
+    """
+    snapshot = DependencySnapshot.load(DEPENDENCY_FILE)
+    files = [f for f in (snapshot.files if snapshot else [OUTPUT_FILE]) if os.path.exists(f)]
+    if not files:
+        return None
+
+    existing, _ = merge_step_files([parse_step_file(load_file(path)) for path in files])
+    poms = parse_pom_classes("\n\n".join(load_file(path) for path in pom_paths))
+    stale = find_stale_steps(existing, snapshot, poms)
+    print(stale.summary())
+    return without_steps(existing, stale.stale)
+
+
+def write_registry(registry, split_by_page: bool = False) -> list:
+    if not split_by_page:
+        with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+            f.write(render_step_file(registry))
+        return [OUTPUT_FILE]
+
+    # One file per page accessor; steps touching several pages stay shared
+    groups = {}
+    for step in registry.steps:
+        name = step.accessors[0] if len(step.accessors) == 1 else None
+        groups.setdefault(name, []).append(step)
+
+    written = []
+    for name, steps in groups.items():
+        file_name = f"Steps{name[0].upper() + name[1:]}.ts" if name else os.path.basename(OUTPUT_FILE)
+        path = os.path.join(OUTPUT_DIR, file_name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(render_step_file(registry, steps))
+        written.append(path)
+    return written
+
 # ---------------------------------------------------------
 # RUN
 # ---------------------------------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate Playwright step definitions from features and POMs.")
+    parser.add_argument("--features", nargs="+", default=[FEATURE_FILE],
+                        help="Feature files to generate steps for")
+    parser.add_argument("--poms", nargs="+", default=[POM_FILE],
+                        help="Page Object files the steps may call")
+    parser.add_argument("--workers", type=int, default=8,
+                        help="Upper bound of concurrent shards; the number in flight adapts to model latency and throttling")
+    parser.add_argument("--scenarios-per-shard", type=int, default=0,
+                        help="Split features into groups of N scenarios (0 = one shard per feature)")
+    parser.add_argument("--split-by-page", action="store_true",
+                        help="Write one step file per Page Object accessor")
+    parser.add_argument("--no-local-match", action="store_true",
+                        help="Send every step to the models instead of matching trivial ones locally")
+    parser.add_argument("--match-threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Minimum similarity for a local step → POM method match")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Keep existing steps and regenerate only those whose POM methods were added, "
+                             "removed or re-signatured since the last run")
+    parser.add_argument("--profile", action="store_true",
+                        help="Record per-stage cProfile / tracemalloc stats to Output/Profiles")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    set_max_concurrency(args.workers)
     try:
-        steps = generate_steps()
+        keep = load_incremental_base(args.poms) if args.incremental else None
+
+        registry, report = generate_sharded_steps(
+            args.features,
+            args.poms,
+            workers=args.workers,
+            scenarios_per_shard=args.scenarios_per_shard,
+            local_match=not args.no_local_match,
+            threshold=args.match_threshold,
+            keep=keep
+        )
 
-        with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-            f.write(steps)
+        if report.conflicts or report.ambiguous or report.ambiguous_steps:
+            print("⚠️ Conflicting or ambiguous step patterns found (see above); first definitions kept.")
+
+        with PROFILER.stage("file write"):
+            written = write_registry(registry, split_by_page=args.split_by_page)
+            poms = parse_pom_classes("\n\n".join(load_file(path) for path in args.poms))
+            build_snapshot(registry, poms, written).save(DEPENDENCY_FILE)
 
-        print("\n✅ Step definitions generated successfully")
-        print(f"💾 Saved to: {OUTPUT_FILE}\n")
+        print(f"\n✅ {len(registry.steps)} step definitions generated successfully")
+        for path in written:
+            print(f"💾 Saved to: {path}")
+        print()
 
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -1,9 +1,21 @@
 # file: generate_universal_steps_prompt.py
 
+import argparse
 import os
-from langchain_ollama import ChatOllama
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.profiling import PROFILER  # first, so --profile also times the imports below
+
 from langchain_core.prompts import PromptTemplate
 
+from Common.concurrency import format_limits, limited, set_max_concurrency
+from Common.ollama_hosts import chat_model
+from Common.step_patterns import (
+    PatternCache, extract_patterns, measured_statistics, reduce_key, reduce_patterns, step_files
+)
+from Common.structured_output import JSON_OUTPUT_RULES, STEP_PATTERNS_SCHEMA, render_step_patterns
+from Common.token_budget import ContextBudget
+
 # ---------------------------------------------------------
 # PATHS
 # ---------------------------------------------------------
@@ -15,6 +27,9 @@ OUTPUT_DIR = os.path.join(BASE_DIR, "Output")
 INPUT_FILE = os.path.join(DOCS_DIR, "ExistingSteps.txt")
 OUTPUT_FILE = os.path.join(OUTPUT_DIR, "UniversalStepsPrompt.txt")
 
+# Patterns per step file (by content hash) and the last reduce result
+PATTERN_CACHE_FILE = os.path.join(OUTPUT_DIR, "StepPatternCache.json")
+
 # Ensure Output folder exists
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
@@ -22,28 +37,19 @@ os.makedirs(OUTPUT_DIR, exist_ok=True)
 # LLM MODELS
 # ---------------------------------------------------------
 
-# Model 1 → Analyze existing steps
-draft_model = ChatOllama(
+# Model 1 → Analyze existing steps, one file per call, JSON constrained to STEP_PATTERNS_SCHEMA
+draft_model = limited(chat_model(
     model="gpt-oss:120b-cloud",
-    temperature=0.3
-)
+    temperature=0.3,
+    format=STEP_PATTERNS_SCHEMA
+))
 
 # Model 2 → Normalize into universal contract
-refine_model = ChatOllama(
+refine_model = chat_model(
     model="deepseek-v3.1:671b-cloud",
     temperature=0.15
 )
 
-# ---------------------------------------------------------
-# LOAD EXISTING STEPS
-# ---------------------------------------------------------
-def load_existing_steps() -> str:
-    if not os.path.exists(INPUT_FILE):
-        raise FileNotFoundError(f"Missing input file: {INPUT_FILE}")
-
-    with open(INPUT_FILE, "r", encoding="utf-8") as f:
-        return f.read()[:4000]  # keep prompt-safe size
-
 # ---------------------------------------------------------
 # PROMPTS
 # ---------------------------------------------------------
@@ -51,7 +57,7 @@ def load_existing_steps() -> str:
 ANALYZE_STEPS_PROMPT = """
 You are a Senior QA Automation Architect.
 
-Analyze the following existing BDD step definitions.
+Analyze the following existing BDD step definitions file.
 
 Extract:
 - Naming conventions
@@ -64,7 +70,8 @@ Extract:
 DO NOT rewrite steps.
 DO NOT generate code.
 ONLY extract structural and behavioral patterns.
-
+Phrase each rule so it applies to any file, not only this one.
+""" + JSON_OUTPUT_RULES + """
 EXISTING STEPS:
 ----------------
 {steps}
@@ -104,32 +111,80 @@ This prompt is used to generate consistent, automation-ready BDD steps.
 # ---------------------------------------------------------
 # PIPELINE
 # ---------------------------------------------------------
-def generate_universal_steps_prompt() -> str:
-    print("📄 Reading existing steps...")
-    steps_text = load_existing_steps()
-
-    print("🤖 Model 1: Extracting patterns...")
-    analyze_prompt = PromptTemplate.from_template(ANALYZE_STEPS_PROMPT)
-    patterns = draft_model.invoke(
-        analyze_prompt.format(steps=steps_text)
-    ).content.strip()
-
-    print("🤖 Model 2: Creating universal steps prompt...")
-    final_prompt = PromptTemplate.from_template(UNIVERSAL_STEPS_PROMPT)
-    universal_prompt = refine_model.invoke(
-        final_prompt.format(patterns=patterns)
-    ).content.strip()
-
+def generate_universal_steps_prompt(paths: list, workers: int = 8, refresh: bool = False) -> str:
+    print("📄 Scanning existing steps...")
+    with PROFILER.stage("steps read"):
+        files = step_files(paths)
+    if not files:
+        raise FileNotFoundError(f"No step definition files found in: {', '.join(paths)}")
+
+    cache = PatternCache(PATTERN_CACHE_FILE)
+
+    print(f"🤖 Model 1: Extracting patterns from {len(files)} file(s)...")
+    with PROFILER.stage("analyze (LLM)"):
+        # One call per new or changed file, in parallel; unchanged files come from the cache
+        per_file, raw, extracted, reused = extract_patterns(
+            files, draft_model, ANALYZE_STEPS_PROMPT, cache, workers=workers, refresh=refresh
+        )
+    print(f"♻️ {reused} file(s) unchanged, {extracted} extracted")
+    if extracted:
+        print(format_limits())
+
+    with PROFILER.stage("pattern reduce"):
+        merged, counts = reduce_patterns(per_file)
+        patterns = "\n\n".join(part for part in [
+            measured_statistics(files),
+            render_step_patterns(merged, counts, total=len(files)),
+            *raw
+        ] if part)
+
+        # Rules found in most files come first, so a cut keeps the common ones
+        budget = ContextBudget(refine_model.model, UNIVERSAL_STEPS_PROMPT)
+        chunks = budget.plan({"patterns": patterns}, "patterns")
+        if len(chunks) > 1:
+            print(f"⚠️ Patterns exceed the {refine_model.model} budget; keeping the most common ones")
+        patterns = chunks[0]["patterns"]
+
+    key = reduce_key(refine_model.model, UNIVERSAL_STEPS_PROMPT, patterns)
+    if not refresh and cache.reduce.get("key") == key:
+        print("♻️ Patterns unchanged, reusing the previous universal prompt")
+        universal_prompt = cache.reduce["prompt"]
+    else:
+        print("🤖 Model 2: Creating universal steps prompt...")
+        with PROFILER.stage("generate (LLM)"):
+            final_prompt = PromptTemplate.from_template(UNIVERSAL_STEPS_PROMPT)
+            universal_prompt = refine_model.invoke(
+                final_prompt.format(patterns=patterns)
+            ).content.strip()
+        if not raw:
+            cache.reduce = {"key": key, "prompt": universal_prompt}
+
+    cache.save()
     return universal_prompt
 
 # ---------------------------------------------------------
 # RUN
 # ---------------------------------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(description="Derive a universal steps prompt from existing step definitions.")
+    parser.add_argument("paths", nargs="*", default=[INPUT_FILE],
+                        help="Step definition files or folders (searched for .ts/.js/.txt files defining steps)")
+    parser.add_argument("--workers", type=int, default=8,
+                        help="Upper bound of files analyzed concurrently")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Ignore cached per-file patterns and the cached prompt")
+    parser.add_argument("--profile", action="store_true",
+                        help="Record per-stage cProfile / tracemalloc stats to Output/Profiles")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    set_max_concurrency(args.workers)
     try:
-        result = generate_universal_steps_prompt()
+        result = generate_universal_steps_prompt(args.paths, workers=args.workers, refresh=args.refresh)
 
-        with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+        with PROFILER.stage("file write"), open(OUTPUT_FILE, "w", encoding="utf-8") as f:
             f.write(result)
 
         print("\n✅ Universal Steps Prompt generated successfully")
@@ -137,4 +192,3 @@ if __name__ == "__main__":
 
     except Exception as e:
         print(f"❌ Error: {e}")
-